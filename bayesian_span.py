@@ -0,0 +1,259 @@
+import time
+import numpy as np
+from sequence_bank import SequenceBank, MAX_SEQUENCE_LENGTH
+from span_engine import DEFAULT_PROTOCOL, Trial
+from span_distribution import direction_distribution, expected_score
+from protocol_design import FORWARD_SPAN, BACKWARD_SPAN
+
+# Grid of span values the posterior is kept on
+SPAN_GRID = np.arange(0.0, MAX_SEQUENCE_LENGTH + 2.0, 0.05)
+
+# Psychometric function: recall drops around the span with this slope, and any
+# trial is failed with the lapse probability regardless of length
+SLOPE = 2.0
+LAPSE = 0.03
+
+# Prior sd of the span; wider than the population so scores are not pulled to the mean
+PRIOR_SD = 3.0
+
+# A direction stops once the posterior sd falls below STOP_SD, but not before
+# MIN_TRIALS and not after MAX_TRIALS trials
+STOP_SD = 0.6
+MIN_TRIALS = 3
+MAX_TRIALS = 12
+
+# Trials per direction in practice mode
+PRACTICE_TRIALS = 3
+
+
+def recall_probability(lengths, spans, slope=SLOPE, lapse=LAPSE):
+    """
+    Returns the probability of recalling each length for each span.
+
+    Args:
+    - lengths (array-like): The sequence lengths.
+    - spans (array-like): The span values.
+    - slope (float): How sharply recall drops around the span.
+    - lapse (float): The probability of failing any trial.
+
+    Returns:
+    - np.ndarray: A (len(lengths), len(spans)) array of recall probabilities.
+    """
+    lengths = np.asarray(lengths, dtype=np.float64)
+    spans = np.asarray(spans, dtype=np.float64)
+    return (1.0 - lapse) / (1.0 + np.exp(slope * (lengths[:, None] - spans[None, :])))
+
+
+def _entropy(p):
+    p = np.clip(p, 1e-12, 1.0 - 1e-12)
+    return -(p * np.log(p) + (1.0 - p) * np.log(1.0 - p))
+
+
+class SpanPosterior:
+    """
+    A grid posterior over one participant's span in one direction.
+
+    Attributes:
+    - lengths: the candidate sequence lengths
+    - likelihood: a (len(lengths), len(SPAN_GRID)) array of recall probabilities
+    - log_posterior: the unnormalised log posterior on SPAN_GRID
+    - staircase_scores: the expected staircase score of every grid span, used to report compatible scores
+    """
+    def __init__(self, prior_mean, lengths, staircase_scores, prior_sd=PRIOR_SD):
+        """
+        Initializes the SpanPosterior object with a normal prior.
+
+        Args:
+        - prior_mean: the prior mean of the span
+        - lengths: the candidate sequence lengths
+        - staircase_scores: the expected staircase score of every grid span
+        - prior_sd: the prior sd of the span (default PRIOR_SD)
+        """
+        self.lengths = np.asarray(lengths)
+        self.likelihood = recall_probability(self.lengths, SPAN_GRID)
+        self.log_posterior = -0.5 * ((SPAN_GRID - prior_mean) / prior_sd) ** 2
+        self.staircase_scores = staircase_scores
+
+    @property
+    def weights(self):
+        w = np.exp(self.log_posterior - self.log_posterior.max())
+        return w / w.sum()
+
+    @property
+    def mean(self):
+        return float(self.weights @ SPAN_GRID)
+
+    @property
+    def sd(self):
+        w = self.weights
+        mean = w @ SPAN_GRID
+        return float(np.sqrt(w @ (SPAN_GRID - mean) ** 2))
+
+    def best_length(self):
+        """
+        Returns the length whose outcome is expected to be most informative about the span.
+
+        The information of a length is the mutual information between its
+        outcome and the span, H(E[p]) - E[H(p)] under the current posterior.
+
+        Returns:
+        - int: the chosen length
+        """
+        w = self.weights
+        marginal = self.likelihood @ w
+        information = _entropy(marginal) - _entropy(self.likelihood) @ w
+        return int(self.lengths[np.argmax(information)])
+
+    def update(self, length, correct):
+        """
+        Updates the posterior with the outcome of one trial.
+
+        Args:
+        - length: the length of the sequence presented
+        - correct: whether it was recalled correctly
+        """
+        p = self.likelihood[np.searchsorted(self.lengths, length)]
+        self.log_posterior += np.log(p if correct else 1.0 - p)
+
+    def score(self):
+        """
+        Returns the posterior mean of the staircase score, rounded to a whole length.
+
+        Returns:
+        - int: the score on the scale of DigitSpanEngine's longest length passed
+        """
+        return int(round(float(self.weights @ self.staircase_scores)))
+
+
+class BayesianSpanEngine:
+    """
+    An adaptive span procedure choosing each length to maximise information about the span.
+
+    A drop-in alternative to DigitSpanEngine: each direction keeps a
+    SpanPosterior, presents the most informative length next, and stops once
+    the posterior is tight enough. The reported forward and backward scores are
+    the expected DigitSpanEngine scores under the posterior, so they are on the
+    same scale as staircase results.
+
+    Attributes:
+    - protocol: the Protocol of the procedure; start_length is the shortest length presented
+    - practice_mode: whether each direction stops after PRACTICE_TRIALS trials
+    - sequence_bank: the source of sequences, anything with get(forward, length, attempt)
+    - clock: a function returning monotonic time in ns
+    - forward: whether the current trial is a forward trial
+    - sequence_length: the length of the current sequence
+    - sequence_attempts: the number of times the current length was presented before in this direction
+    - posteriors: the SpanPosterior of each direction keyed by forward
+    - max_forward_length: the forward score
+    - max_backward_length: the backward score
+    - sequence: the sequence of the current trial
+    - notice_pending: whether the procedure has just switched to backward
+    - finished: whether the procedure has ended
+    - trials: the completed Trial records
+    """
+    def __init__(self, practice_mode=False, sequence_bank=None, clock=time.perf_counter_ns, protocol=DEFAULT_PROTOCOL,
+                 max_length=MAX_SEQUENCE_LENGTH):
+        """
+        Initializes the BayesianSpanEngine object.
+
+        Args:
+        - practice_mode: whether to stop each direction after PRACTICE_TRIALS trials (default False)
+        - sequence_bank: the source of sequences (default None, a freshly seeded SequenceBank)
+        - clock: a function returning monotonic time in ns (default time.perf_counter_ns)
+        - protocol: the Protocol of the procedure (default DEFAULT_PROTOCOL)
+        - max_length: the longest length presented (default 16)
+        """
+        self.protocol = protocol
+        self.practice_mode = practice_mode
+        self.max_trials = PRACTICE_TRIALS if practice_mode else MAX_TRIALS
+        if sequence_bank is None:
+            sequence_bank = SequenceBank(max_length=max_length, start_length=protocol.start_length, attempts=self.max_trials)
+        self.sequence_bank = sequence_bank
+        self.clock = clock
+
+        if practice_mode:
+            max_length = min(max_length, protocol.practice_max_length)
+        lengths = np.arange(protocol.start_length, max_length + 1)
+        curves = np.zeros((SPAN_GRID.size, MAX_SEQUENCE_LENGTH + 1))
+        curves[:, 1:] = recall_probability(np.arange(1, MAX_SEQUENCE_LENGTH + 1), SPAN_GRID).T
+        staircase_scores = expected_score(direction_distribution(curves, practice_mode, protocol)[0])
+        self.posteriors = {True: SpanPosterior(FORWARD_SPAN[0], lengths, staircase_scores),
+                           False: SpanPosterior(BACKWARD_SPAN[0], lengths, staircase_scores)}
+
+        self.forward = True
+        self.sequence_length = None
+        self.sequence_attempts = 0
+        self.presented = {}
+        self.direction_trials = 0
+        self.max_forward_length = 0
+        self.max_backward_length = 0
+        self.sequence = None
+        self.notice_pending = False
+        self.finished = False
+        self.trials = []
+
+    @property
+    def combined_score(self):
+        return self.max_forward_length + self.max_backward_length
+
+    def expected_response(self):
+        """
+        Returns the correct response to the current sequence.
+
+        Returns:
+        - str: the digits in order for forward trials, reversed for backward trials
+        """
+        expected = ''.join(self.sequence)
+        return expected if self.forward else expected[::-1]
+
+    def next_stimulus(self):
+        """
+        Returns the sequence of the most informative next trial, clearing a pending backwards notice.
+
+        Returns:
+        - list or None: the digits as strings, or None once the procedure has ended
+        """
+        if self.finished:
+            return None
+        self.notice_pending = False
+        self.sequence_length = self.posteriors[self.forward].best_length()
+        self.sequence_attempts = self.presented.get((self.forward, self.sequence_length), 0)
+        self.sequence = self.sequence_bank.get(self.forward, self.sequence_length, self.sequence_attempts)
+        self.presented_ns = self.clock()
+        return self.sequence
+
+    def submit(self, response):
+        """
+        Scores the response to the current trial and updates the posterior.
+
+        Args:
+        - response: the typed response
+
+        Returns:
+        - bool: whether the response was correct
+        """
+        correct = response == self.expected_response()
+        self.trials.append(Trial(self.forward, self.sequence_length, self.sequence_attempts, self.sequence,
+                                 response, correct, self.presented_ns, self.clock()))
+        self.presented[(self.forward, self.sequence_length)] = self.sequence_attempts + 1
+        posterior = self.posteriors[self.forward]
+        posterior.update(self.sequence_length, correct)
+        self.direction_trials += 1
+
+        done = self.direction_trials >= self.max_trials
+        if not self.practice_mode and self.direction_trials >= MIN_TRIALS and posterior.sd < STOP_SD:
+            done = True
+        if done:
+            self._finish_direction()
+        return correct
+
+    def _finish_direction(self):
+        posterior = self.posteriors[self.forward]
+        if self.forward:
+            self.max_forward_length = posterior.score()
+            self.forward = False
+            self.direction_trials = 0
+            self.notice_pending = True
+        else:
+            self.max_backward_length = posterior.score()
+            self.finished = True
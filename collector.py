@@ -0,0 +1,348 @@
+import os
+import json
+import time
+import socket
+import asyncio
+import argparse
+from score_store import STORE_MAGIC, TEST_TYPE_CODES, pack_record, store_path
+
+# Address the collector listens on by default
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Append-only log of every collected session, one JSON object per line
+COLLECTED_FILENAME = 'collected.jsonl'
+
+# A batch is committed once it holds BATCH_SIZE sessions or has waited BATCH_MS
+BATCH_SIZE = 1024
+BATCH_MS = 10
+
+# Seconds a station waits for the collector before the submission counts as failed
+CLIENT_TIMEOUT = 5.0
+
+FIELDS = ('session_id', 'user_id', 'test_type', 'forward', 'backward', 'combined')
+
+
+class RejectedError(ValueError):
+    """
+    Raised when a result's target refuses it as invalid, so resubmitting it cannot succeed.
+    """
+
+
+def validate(session):
+    """
+    Checks a submitted session and normalises its types.
+
+    Args:
+    - session (dict): The submitted fields.
+
+    Returns:
+    - dict: The session with FIELDS plus a timestamp.
+
+    Raises:
+    - ValueError: If a field is missing or invalid.
+    """
+    try:
+        record = {'session_id': int(session['session_id']), 'user_id': str(int(session['user_id'])),
+                  'test_type': session['test_type'], 'forward': int(session['forward']),
+                  'backward': int(session['backward']), 'combined': int(session['combined']),
+                  'timestamp': float(session.get('timestamp', time.time()))}
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"invalid session: {e}")
+    if record['test_type'] not in TEST_TYPE_CODES:
+        raise ValueError(f"invalid test type: {record['test_type']}")
+    return record
+
+
+def read_collected(path):
+    """
+    Reads the collected sessions, ignoring a last line torn by a crash.
+
+    Args:
+    - path (str): The collected log path.
+
+    Returns:
+    - list: The sessions as dicts, in commit order.
+    """
+    if not os.path.exists(path):
+        return []
+    sessions = []
+    with open(path) as f:
+        for line in f:
+            try:
+                sessions.append(json.loads(line))
+            except ValueError:
+                break
+    return sessions
+
+
+def export_store(path, data_dir):
+    """
+    Writes the collected sessions as the consolidated score store the analysis scripts load.
+
+    The store is written to a temporary file and renamed into place, so a
+    reader never sees a partial export.
+
+    Args:
+    - path (str): The collected log path.
+    - data_dir (str): The directory to write scores.bin into.
+
+    Returns:
+    - int: The number of sessions exported.
+    """
+    sessions = read_collected(path)
+    records = [pack_record(s['user_id'], s['test_type'], s['forward'], s['backward'], s['combined'], s['timestamp'])
+               for s in sessions]
+    target = store_path(data_dir)
+    with open(target + '.tmp', 'wb') as f:
+        f.write(STORE_MAGIC + b''.join(records))
+    os.replace(target + '.tmp', target)
+    return len(records)
+
+
+class Collector:
+    """
+    An asyncio service collecting session results from many test stations.
+
+    Stations send one JSON object per line and receive one JSON
+    acknowledgement per line, {"session_id": ..., "status": ...}, once the
+    session is on disk. Acknowledgements may arrive out of order, so a
+    station can pipeline many sessions on one connection. Sessions are
+    committed in batches with one write and one fsync each, and a session id
+    that was already collected is acknowledged as 'duplicate' without being
+    stored again, so stations can resubmit safely. A batch that cannot be
+    written is acknowledged with an 'error: ...' status and nothing of it is
+    kept, so its stations can resubmit it later.
+
+    Attributes:
+    - path: the collected log path
+    - batch_size: the number of sessions that triggers a commit
+    - batch_ms: the longest time a session waits for its batch to be committed
+    - sessions: the ids of all committed sessions
+    - pending: the futures of the sessions waiting for the next commit, keyed by session id
+    """
+    def __init__(self, path, batch_size=BATCH_SIZE, batch_ms=BATCH_MS):
+        """
+        Initializes the Collector object from the sessions already collected.
+
+        Args:
+        - path: the collected log path
+        - batch_size: the number of sessions that triggers a commit (default 1024)
+        - batch_ms: the longest wait for a commit in ms (default 10)
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_ms = batch_ms
+        self.sessions = {s['session_id'] for s in read_collected(path)}
+        self.pending = {}
+        self.batch = []
+        self.server = None
+        self.closing = False
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Starts listening and committing.
+
+        Args:
+        - host: the interface to listen on (default 127.0.0.1)
+        - port: the port to listen on, 0 for any free port (default 8765)
+
+        Returns:
+        - int: the port listened on
+        """
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self.full = asyncio.Event()
+        self.committer = asyncio.create_task(self._commit_loop())
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """
+        Stops listening, commits the last batch and closes the log.
+        """
+        self.server.close()
+        await self.server.wait_closed()
+        self.closing = True
+        self.full.set()
+        await self.committer
+        os.close(self.fd)
+
+    def submit(self, session):
+        """
+        Queues a session for the next commit.
+
+        Args:
+        - session (dict): The submitted fields.
+
+        Returns:
+        - asyncio.Future: resolves to 'stored', 'duplicate', an 'invalid: ...' or an 'error: ...' message.
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            record = validate(session)
+        except ValueError as e:
+            future.set_result(f"invalid: {e}")
+            return future
+        session_id = record['session_id']
+        if session_id in self.sessions:
+            future.set_result('duplicate')
+        elif session_id in self.pending:
+            # Resubmitted before the first copy was committed; if that commit fails, so does this one
+            self.pending[session_id].add_done_callback(
+                lambda first: future.set_result('duplicate' if first.result() == 'stored' else first.result()))
+        else:
+            self.pending[session_id] = future
+            self.batch.append(record)
+            if len(self.batch) >= self.batch_size:
+                self.full.set()
+        return future
+
+    async def _commit_loop(self):
+        # The only task that commits, so batches are written in order
+        while not self.closing:
+            try:
+                await asyncio.wait_for(self.full.wait(), self.batch_ms / 1000)
+            except asyncio.TimeoutError:
+                pass
+            self.full.clear()
+            await self._commit()
+        await self._commit()
+
+    async def _commit(self):
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, []
+        payload = ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in batch).encode()
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._write, payload)
+        except OSError as e:
+            # A full or failing disk fails this batch only; the commit loop keeps serving the next ones
+            for record in batch:
+                self.pending.pop(record['session_id']).set_result(f"error: {e}")
+            return
+        for record in batch:
+            self.sessions.add(record['session_id'])
+            self.pending.pop(record['session_id']).set_result('stored')
+
+    def _write(self, payload):
+        end = os.fstat(self.fd).st_size
+        try:
+            os.write(self.fd, payload)
+            os.fsync(self.fd)
+        except OSError:
+            # Cut a partly written batch, or the next batch would be joined onto its torn last line
+            os.ftruncate(self.fd, end)
+            raise
+
+    async def _handle(self, reader, writer):
+        def acknowledge(session_id, future):
+            if not writer.is_closing():
+                writer.write((json.dumps({'session_id': session_id, 'status': future.result()}) + '\n').encode())
+
+        # The sessions of this connection still waiting for their commit
+        outstanding = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    session = json.loads(line)
+                except ValueError:
+                    session = {}
+                if not isinstance(session, dict):
+                    session = {}
+                future = self.submit(session)
+                future.add_done_callback(lambda f, session_id=session.get('session_id'): acknowledge(session_id, f))
+                if not future.done():
+                    outstanding.add(future)
+                    future.add_done_callback(outstanding.discard)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            # Let the acknowledgements of this connection's last sessions go out before closing
+            if outstanding:
+                await asyncio.wait(set(outstanding))
+            writer.close()
+
+
+def submit_session(address, session, timeout=CLIENT_TIMEOUT):
+    """
+    Sends one session to a collector and waits for its acknowledgement.
+
+    This is the blocking client used by a test station's result writer thread.
+
+    Args:
+    - address (tuple): The collector's (host, port).
+    - session (dict): The session with FIELDS.
+    - timeout (float): Seconds to wait for the collector (default 5).
+
+    Returns:
+    - str: 'stored' or 'duplicate'.
+
+    Raises:
+    - OSError: If the collector is unreachable, does not answer in time, sends a malformed reply
+      or could not store the session.
+    - RejectedError: If the collector rejected the session as invalid.
+    """
+    with socket.create_connection(address, timeout=timeout) as sock:
+        sock.sendall((json.dumps(session) + '\n').encode())
+        with sock.makefile() as f:
+            line = f.readline()
+    if not line.endswith('\n'):
+        raise ConnectionError("collector closed the connection")
+    try:
+        status = str(json.loads(line)['status'])
+    except (ValueError, KeyError, TypeError):
+        # A garbled reply says nothing about the session; it is retried like a dropped connection
+        raise ConnectionError(f"malformed reply from the collector: {line!r}")
+    if status.startswith('invalid'):
+        raise RejectedError(status)
+    if status.startswith('error'):
+        raise OSError(status)
+    return status
+
+
+def parse_address(text):
+    """
+    Parses a HOST:PORT string.
+
+    Args:
+    - text (str): The address, e.g. 127.0.0.1:8765.
+
+    Returns:
+    - tuple: (host, port).
+    """
+    host, _, port = text.rpartition(':')
+    return host or DEFAULT_HOST, int(port)
+
+
+async def serve(path, host, port):
+    collector = Collector(path)
+    port = await collector.start(host, port)
+    print(f"Collecting into {path} on {host}:{port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await collector.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collect Digit Span Test results from many stations")
+    parser.add_argument('--path', default=os.path.join('data', COLLECTED_FILENAME), help="the collected log (default %(default)s)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help="run the collector")
+    serve_parser.add_argument('--host', default=DEFAULT_HOST)
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    export_parser = commands.add_parser('export', help="write the collected sessions as scores.bin")
+    export_parser.add_argument('data_dir', help="the directory to write scores.bin into")
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        try:
+            asyncio.run(serve(args.path, args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+    else:
+        print(f"Exported {export_store(args.path, args.data_dir)} sessions to {store_path(args.data_dir)}")
@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata
+
+# Largest number of non-zero pairs whose 2^n sign patterns are enumerated exactly
+MAX_EXACT = 25
+
+# Random sign patterns drawn beyond MAX_EXACT, and per vectorised batch
+DEFAULT_RESAMPLES = 1_000_000
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Relative tolerance under which a flipped statistic counts as equal to the observed one
+TIE_TOLERANCE = 1e-9
+
+# Pre and post columns of df_diff compared by paired_tests
+SCORE_PAIRS = [('Forward_pre', 'Forward_post'), ('Backward_pre', 'Backward_post'), ('Combined_pre', 'Combined_post')]
+
+
+def subset_sums(weights):
+    """
+    Computes the sum of every subset of the weights, indexed by the bit pattern of the subset.
+
+    Args:
+    - weights (np.ndarray): The m weights.
+
+    Returns:
+    - np.ndarray: A (2^m,) array; entry b is the sum of the weights whose bits are set in b.
+    """
+    patterns = np.arange(2 ** len(weights), dtype=np.int64)
+    bits = (patterns[:, None] >> np.arange(len(weights))) & 1
+    return bits @ np.asarray(weights, dtype=np.float64)
+
+
+def exact_tail_counts(weights, observed):
+    """
+    Counts the sign patterns whose positive sum is at least and at most the observed one.
+
+    A pattern's bits split into a low and a high half; its sum is the sum of
+    the two halves' subset sums, which are tabulated once. With the low sums
+    sorted, the patterns sharing one high half are counted with a binary
+    search, so all 2^m patterns are counted from 2^(m/2) searches.
+
+    Args:
+    - weights (np.ndarray): The m weights.
+    - observed (float): The observed sum of the positive weights.
+
+    Returns:
+    - int: The number of patterns with a sum >= observed.
+    - int: The number of patterns with a sum <= observed.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    half = len(weights) // 2
+    low = np.sort(subset_sums(weights[:half]))
+    high = subset_sums(weights[half:])
+    tolerance = TIE_TOLERANCE * max(1.0, abs(observed))
+    greater = len(low) * len(high) - np.searchsorted(low, observed - tolerance - high, side='left').sum()
+    less = np.searchsorted(low, observed + tolerance - high, side='right').sum()
+    return int(greater), int(less)
+
+
+def monte_carlo_tail_counts(weights, observed, resamples=DEFAULT_RESAMPLES, seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Counts random sign patterns whose positive sum is at least and at most the observed one.
+
+    Args:
+    - weights (np.ndarray): The m weights.
+    - observed (float): The observed sum of the positive weights.
+    - resamples (int): The number of random patterns (default 1,000,000).
+    - seed (int): The seed of the patterns (default None, fresh entropy).
+    - chunk_size (int): The number of patterns per vectorised batch.
+
+    Returns:
+    - int: The number of patterns with a sum >= observed.
+    - int: The number of patterns with a sum <= observed.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    tolerance = TIE_TOLERANCE * max(1.0, abs(observed))
+    greater = less = 0
+    for start in range(0, resamples, chunk_size):
+        sums = rng.integers(0, 2, (min(chunk_size, resamples - start), len(weights)), dtype=np.int8) @ weights
+        greater += int((sums >= observed - tolerance).sum())
+        less += int((sums <= observed + tolerance).sum())
+    return greater, less
+
+
+def sign_flip_test(pre, post, statistic='mean', max_exact=MAX_EXACT, resamples=DEFAULT_RESAMPLES, seed=None,
+                   chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Tests whether paired scores changed by flipping the signs of the within-participant differences.
+
+    Under the null hypothesis each difference is as likely to be positive as
+    negative. Zero differences carry no sign and are dropped. The test
+    statistic is the sum of the weights of the positive differences: their
+    absolute values for 'mean' (equivalent to the mean difference) or their
+    midranks for 'wilcoxon' (the signed-rank W+). Up to max_exact non-zero
+    pairs all 2^n patterns are counted exactly; beyond that random patterns
+    are drawn and the p-values include the observed pattern. The two-sided
+    p-value doubles the smaller one-sided one.
+
+    Args:
+    - pre (array-like): The scores before.
+    - post (array-like): The scores after, paired with pre.
+    - statistic (str): 'mean' or 'wilcoxon' (default 'mean').
+    - max_exact (int): The largest number of non-zero pairs enumerated exactly (default 25).
+    - resamples (int): The number of random patterns beyond max_exact (default 1,000,000).
+    - seed (int): The seed of the random patterns (default None, fresh entropy).
+    - chunk_size (int): The number of random patterns per vectorised batch.
+
+    Returns:
+    - dict: n (non-zero pairs), observed (the mean difference post - pre over all pairs, or W+), p, p_greater
+      (post tends higher), p_less, the number of patterns evaluated and whether it was exact.
+    """
+    differences = np.asarray(post, dtype=np.float64) - np.asarray(pre, dtype=np.float64)
+    mean_difference = differences.mean() if len(differences) else 0.0
+    differences = differences[differences != 0]
+    if statistic == 'mean':
+        weights = np.abs(differences)
+    elif statistic == 'wilcoxon':
+        weights = rankdata(np.abs(differences))
+    else:
+        raise ValueError(f"invalid statistic: {statistic}")
+    positive = weights[differences > 0].sum()
+
+    n = len(differences)
+    exact = n <= max_exact
+    if exact:
+        greater, less = exact_tail_counts(weights, positive)
+        patterns = 2 ** n
+        p_greater, p_less = greater / patterns, less / patterns
+    else:
+        greater, less = monte_carlo_tail_counts(weights, positive, resamples, seed, chunk_size)
+        patterns = resamples
+        p_greater, p_less = (greater + 1) / (patterns + 1), (less + 1) / (patterns + 1)
+
+    observed = positive if statistic == 'wilcoxon' else mean_difference
+    return {'n': n, 'observed': float(observed), 'p': min(1.0, 2 * min(p_greater, p_less)), 'p_greater': p_greater,
+            'p_less': p_less, 'patterns': patterns, 'exact': exact}
+
+
+def paired_tests(df, pairs=SCORE_PAIRS, statistics=('mean', 'wilcoxon'), **kwargs):
+    """
+    Runs sign-flip tests for several pre/post column pairs.
+
+    Args:
+    - df (pd.DataFrame): The paired data, e.g. df_diff.
+    - pairs (list): (pre column, post column) pairs (default the forward, backward and combined scores).
+    - statistics (tuple): The statistics, see sign_flip_test.
+    - **kwargs: Passed to sign_flip_test (max_exact, resamples, seed, chunk_size).
+
+    Returns:
+    - pd.DataFrame: One row per pair and statistic with the sign_flip_test results.
+    """
+    rows = []
+    for pre, post in pairs:
+        for statistic in statistics:
+            rows.append({'pre': pre, 'post': post, 'statistic': statistic,
+                         **sign_flip_test(df[pre], df[post], statistic, **kwargs)})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    from score_loader import load_scores, pair_scores
+
+    df_diff, _ = pair_scores(load_scores('data'))
+    print(paired_tests(df_diff).to_string(index=False))
@@ -0,0 +1,233 @@
+from math import comb
+from multiprocessing import Pool
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata
+
+# Permutations evaluated per vectorised batch
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Relative tolerance under which a permuted statistic counts as equal to the observed one
+TIE_TOLERANCE = 1e-9
+
+
+def mean_difference(values, in_x):
+    """
+    Computes the difference of group means for many assignments at once.
+
+    Args:
+    - values (np.ndarray): The pooled (n, k) outcomes.
+    - in_x (np.ndarray): A (p, n) boolean array; row i marks the first group of assignment i.
+
+    Returns:
+    - np.ndarray: A (p, k) array of mean(x) - mean(y).
+    """
+    n_x = in_x[0].sum()
+    x_sums = in_x.astype(np.float64) @ values
+    return x_sums / n_x - (values.sum(axis=0) - x_sums) / (values.shape[0] - n_x)
+
+
+def _group_medians(ordered, sorted_in, size):
+    # The median of a group is found where its running count in sorted order reaches the middle
+    counts = np.cumsum(sorted_in, axis=1)
+    low = np.argmax(counts >= (size + 1) // 2, axis=1)
+    high = np.argmax(counts >= size // 2 + 1, axis=1)
+    return (ordered[low] + ordered[high]) / 2
+
+
+def median_difference(values, in_x):
+    """
+    Computes the difference of group medians for many assignments at once.
+
+    Args:
+    - values (np.ndarray): The pooled (n, k) outcomes.
+    - in_x (np.ndarray): A (p, n) boolean array; row i marks the first group of assignment i.
+
+    Returns:
+    - np.ndarray: A (p, k) array of median(x) - median(y).
+    """
+    n, n_x = values.shape[0], in_x[0].sum()
+    result = np.empty((in_x.shape[0], values.shape[1]))
+    for column in range(values.shape[1]):
+        order = np.argsort(values[:, column], kind='stable')
+        ordered = values[order, column]
+        sorted_in = in_x[:, order]
+        result[:, column] = (_group_medians(ordered, sorted_in, n_x) - _group_medians(ordered, ~sorted_in, n - n_x))
+    return result
+
+
+def mann_whitney_u(values, in_x):
+    """
+    Computes the Mann-Whitney U of the first group for many assignments at once.
+
+    The pooled midranks do not change under permutation, so U is a rank sum.
+
+    Args:
+    - values (np.ndarray): The pooled (n, k) outcomes.
+    - in_x (np.ndarray): A (p, n) boolean array; row i marks the first group of assignment i.
+
+    Returns:
+    - np.ndarray: A (p, k) array of U statistics.
+    """
+    n_x = in_x[0].sum()
+    return in_x.astype(np.float64) @ rankdata(values, axis=0) - n_x * (n_x + 1) / 2
+
+
+# Statistics available by name; a statistic maps (values, in_x) to a (p, k) array
+STATISTICS = {'mean_difference': mean_difference, 'median_difference': median_difference, 'U': mann_whitney_u}
+
+
+def combination_masks(n, k, ranks):
+    """
+    Builds the group masks of combinations from their lexicographic ranks.
+
+    Uses the combinatorial number system, one vectorised step per position, so
+    any slice of the C(n, k) combinations can be built without enumerating
+    the ones before it. The combinations of the smaller of the two groups are
+    ranked and the masks complemented if needed, which keeps every entry of
+    the binomial table at most C(n, k).
+
+    Args:
+    - n (int): The number of pooled observations.
+    - k (int): The size of the first group.
+    - ranks (np.ndarray): Ranks in [0, C(n, k)).
+
+    Returns:
+    - np.ndarray: A (len(ranks), n) boolean array; row i marks the members of combination ranks[i].
+    """
+    if k > n - k:
+        return ~combination_masks(n, n - k, ranks)
+    ranks = np.array(ranks, dtype=np.int64)
+    remaining = np.full(ranks.shape, k, dtype=np.int64)
+    masks = np.zeros((ranks.size, n), dtype=bool)
+    # With k <= n / 2, C(a, b) <= C(n, k) for all a <= n and b <= k
+    table = np.array([[comb(a, b) for b in range(k + 1)] for a in range(n + 1)], dtype=np.int64)
+    for position in range(n):
+        # Combinations taking this position come first; there are C(n - position - 1, remaining - 1) of them
+        taking = table[n - position - 1, np.maximum(remaining - 1, 0)]
+        take = (remaining > 0) & (ranks < taking)
+        masks[:, position] = take
+        ranks = np.where(take | (remaining == 0), ranks, ranks - taking)
+        remaining -= take
+    return masks
+
+
+def _count_chunk(args):
+    values, n_x, statistics, observed, seed, start, size, exact = args
+    n = values.shape[0]
+    if exact:
+        in_x = combination_masks(n, n_x, np.arange(start, start + size))
+    else:
+        rng = np.random.default_rng(seed)
+        # Random assignments: the first group is the n_x smallest of n uniform keys per row
+        keys = rng.random((size, n))
+        in_x = np.zeros((size, n), dtype=bool)
+        np.put_along_axis(in_x, np.argpartition(keys, n_x - 1, axis=1)[:, :n_x], True, axis=1)
+    greater, less = [], []
+    for name, observed_value in zip(statistics, observed):
+        permuted = STATISTICS[name](values, in_x) if isinstance(name, str) else name(values, in_x)
+        tolerance = TIE_TOLERANCE * np.maximum(1.0, np.abs(observed_value))
+        greater.append((permuted >= observed_value - tolerance).sum(axis=0))
+        less.append((permuted <= observed_value + tolerance).sum(axis=0))
+    return np.array(greater), np.array(less)
+
+
+def permutation_test(x, y, statistics=('mean_difference',), permutations=1_000_000, seed=None,
+                     chunk_size=DEFAULT_CHUNK_SIZE, processes=1):
+    """
+    Tests whether two groups differ by permuting the group labels.
+
+    The group assignments of a chunk are built as one boolean matrix and every
+    statistic is evaluated for the whole chunk at once. If there are no more
+    distinct assignments than requested permutations, all C(n, n_x) of them
+    are enumerated and the p-values are exact; otherwise random permutations
+    are drawn and the p-values include the observed assignment, (count + 1) /
+    (permutations + 1). The two-sided p-value doubles the smaller one-sided
+    one, which suits asymmetric permutation distributions such as those of
+    medians.
+
+    Args:
+    - x (array-like): The (n_x,) or (n_x, k) outcomes of the first group.
+    - y (array-like): The (n_y,) or (n_y, k) outcomes of the second group.
+    - statistics (tuple): Names from STATISTICS or functions (values, in_x) -> (p, k) array; functions
+      must be defined at module level to be used with processes > 1.
+    - permutations (int): The number of random permutations (default 1,000,000).
+    - seed (int): The seed of the permutations (default None, fresh entropy).
+    - chunk_size (int): The number of assignments evaluated per vectorised batch.
+    - processes (int): The number of worker processes (default 1, in-process).
+
+    Returns:
+    - pd.DataFrame: Per statistic and outcome column the observed value, the two-sided p-value,
+      the one-sided p_greater and p_less, the number of assignments evaluated and whether it was exact.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    values = np.concatenate([x.reshape(len(x), -1), y.reshape(len(y), -1)])
+    n_x = len(x)
+    observed_in_x = np.zeros((1, values.shape[0]), dtype=bool)
+    observed_in_x[0, :n_x] = True
+    observed = [(STATISTICS[name] if isinstance(name, str) else name)(values, observed_in_x)[0] for name in statistics]
+
+    total = comb(values.shape[0], n_x)
+    exact = total <= permutations
+    count = total if exact else permutations
+    starts = list(range(0, count, chunk_size))
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    jobs = [(values, n_x, tuple(statistics), observed, chunk_seed, start, min(chunk_size, count - start), exact)
+            for start, chunk_seed in zip(starts, seeds)]
+
+    if processes > 1:
+        with Pool(processes) as pool:
+            results = pool.map(_count_chunk, jobs)
+    else:
+        results = [_count_chunk(job) for job in jobs]
+
+    greater = sum(r[0] for r in results)
+    less = sum(r[1] for r in results)
+    if exact:
+        p_greater, p_less = greater / count, less / count
+    else:
+        p_greater, p_less = (greater + 1) / (count + 1), (less + 1) / (count + 1)
+
+    rows = []
+    for idx, name in enumerate(statistics):
+        for column in range(values.shape[1]):
+            rows.append({'statistic': name if isinstance(name, str) else name.__name__, 'column': column,
+                         'observed': observed[idx][column], 'p': min(1.0, 2 * min(p_greater[idx, column], p_less[idx, column])),
+                         'p_greater': p_greater[idx, column], 'p_less': p_less[idx, column],
+                         'permutations': count, 'exact': exact})
+    return pd.DataFrame(rows)
+
+
+def group_permutation_tests(df, columns, group_column='Category', x='TikTok', y='Video',
+                            statistics=('mean_difference', 'median_difference', 'U'), **kwargs):
+    """
+    Runs permutation tests of two groups of a DataFrame for several outcome columns in one pass.
+
+    All columns and statistics share the same permutations.
+
+    Args:
+    - df (pd.DataFrame): The data, e.g. df_diff.
+    - columns (list): The outcome columns.
+    - group_column (str): The grouping column (default 'Category').
+    - x: The value of the first group (default 'TikTok').
+    - y: The value of the second group (default 'Video').
+    - statistics (tuple): The statistics, see permutation_test.
+    - **kwargs: Passed to permutation_test (permutations, seed, chunk_size, processes).
+
+    Returns:
+    - pd.DataFrame: The permutation_test results with the column names filled in.
+    """
+    groups = df[group_column].to_numpy()
+    results = permutation_test(df.loc[groups == x, columns].to_numpy(), df.loc[groups == y, columns].to_numpy(),
+                               statistics, **kwargs)
+    results['column'] = [columns[column] for column in results['column']]
+    return results
+
+
+if __name__ == "__main__":
+    from score_loader import load_scores, pair_scores
+    from rank_tests import DIFFERENCE_COLUMNS
+
+    df_diff, _ = pair_scores(load_scores('data'))
+    print(group_permutation_tests(df_diff, DIFFERENCE_COLUMNS).to_string(index=False))
@@ -1,13 +1,9 @@
 import numpy as np
 import pandas as pd
 from scipy import stats
-from statsmodels.stats.power import TTestIndPower
 from scipy.stats import norm
-import math
-import warnings
-
-# Suppress specific warnings
-warnings.filterwarnings("ignore", category=UserWarning, module="statsmodels")
+from bootstrap_ci import bootstrap_effects
+from power_grid import sample_size_grid
 
 def calculate_cohens_d(group1, group2):
     # Calculates mean differences for each group
@@ -33,11 +29,13 @@ def calculate_effect_size(sample_size, alpha, beta):
     return effect_size
 
 def calculate_sample_size_ttest(effect_size, alpha, power):
-    analysis = TTestIndPower()
-    sample_size = analysis.solve_power(effect_size=effect_size, alpha=alpha, power=power, ratio=1.0, alternative='two-sided')
-    return round(sample_size)
+    # Solves the noncentral t power equation; arrays are paired elementwise and broadcast, as in calculate_sample_size_manual
+    shape = np.broadcast(effect_size, alpha, power).shape
+    sample_size = sample_size_grid(effect_size, alpha, power, ratios=1.0, alternative='two-sided', elementwise=True)['nobs1']
+    return round(sample_size.iloc[0]) if not shape else np.round(sample_size.to_numpy()).astype(int).reshape(shape)
 
 def calculate_sample_size_manual(alpha, beta, effect_size):
+    # Arrays are paired elementwise and broadcast, as in calculate_sample_size_ttest
     # Calculates critical values
     z_alpha_over_2 = norm.ppf(1 - alpha/2)
     z_beta = norm.ppf(1 - beta)
@@ -47,7 +45,7 @@ def calculate_sample_size_manual(alpha, beta, effect_size):
     sample_size = (2 * (z_alpha_over_2 + z_beta)**2) / effect_size**2
     # we can't have 0.1 particiåant so we want the next bigger number
 
-    return math.ceil(sample_size), z_alpha_over_2, z_beta
+    return np.ceil(sample_size).astype(int), z_alpha_over_2, z_beta
 
 # CSV file into a DataFrame
 df_diff = pd.read_csv('df_diff.csv')
@@ -70,6 +68,9 @@ print("TikTok Group:", tiktok_group)
 # Calculates Cohen's d
 effect_size = calculate_cohens_d(video_group, tiktok_group)
 
+# Bootstraps the uncertainty of d and of the group differences
+effect_intervals = bootstrap_effects(video_group, tiktok_group, seed=0)
+
 # Sets alpha and desired power
 sample_size_lit = 106
 simple_size_our_data = 25
@@ -90,6 +91,7 @@ calculated_effect_size_our_sample = calculate_effect_size(simple_size_our_data,
 
 # Print the result
 print(f"Cohen's d from our analysis: {effect_size}")
+print(f"Bootstrap confidence intervals (95%):\n{effect_intervals.to_string(index=False)}")
 print(f"Builtin ttest function: Required sample size per group: {sample_size_builtin}")
 print(f"Manual function: Required sample size per group: {sample_size_manual}")
 print(f"Calculated Effect Size from similar literature: {calculated_effect_size}")
@@ -0,0 +1,225 @@
+import itertools
+import numpy as np
+import pandas as pd
+from scipy.stats import nct, norm, t
+
+# Smallest group size the solvers consider; the t distribution needs at least one degree of freedom
+MIN_NOBS = 1.5
+
+# Iterations and relative tolerance of the vectorised root finder
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-10
+
+# Solved cells by (kind, value, alpha, power, ratio, alternative), shared by all calls
+_solved = {}
+
+
+def ttest_power(effect_size, nobs1, alpha, ratio=1.0, alternative='two-sided'):
+    """
+    Computes the power of the two-sample t-test from the noncentral t distribution.
+
+    All arguments broadcast against each other, as in
+    statsmodels' TTestIndPower.power, which this reproduces.
+
+    Args:
+    - effect_size (array-like): Cohen's d.
+    - nobs1 (array-like): The size of the first group.
+    - alpha (array-like): The significance level.
+    - ratio (array-like): The size of the second group relative to the first (default 1).
+    - alternative (str): 'two-sided', 'larger' or 'smaller' (default 'two-sided').
+
+    Returns:
+    - np.ndarray: The power.
+    """
+    effect_size, nobs1, alpha, ratio = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64)
+                                                             for a in (effect_size, nobs1, alpha, ratio)))
+    nobs2 = nobs1 * ratio
+    df = nobs1 + nobs2 - 2
+    noncentrality = effect_size * np.sqrt(nobs1 * nobs2 / (nobs1 + nobs2))
+    if alternative == 'two-sided':
+        critical = t.isf(alpha / 2, df)
+        return _upper_tail(critical, df, noncentrality) + _upper_tail(critical, df, -noncentrality)
+    if alternative == 'larger':
+        return _upper_tail(t.isf(alpha, df), df, noncentrality)
+    if alternative == 'smaller':
+        return _upper_tail(t.isf(alpha, df), df, -noncentrality)
+    raise ValueError(f"invalid alternative: {alternative}")
+
+
+def _upper_tail(critical, df, noncentrality):
+    # P(T > critical) for noncentral t; scipy returns nan far out in the tails, where the normal limit holds
+    tail = nct.sf(critical, df, noncentrality)
+    far = np.isnan(tail)
+    if far.any():
+        tail[far] = norm.sf(critical[far] - noncentrality[far])
+    return tail
+
+
+def _solve(power_of, target, low, high):
+    # Vectorised Illinois regula falsi; power_of(x, cells) increases in x and each root lies in [low, high]
+    cells = np.arange(len(target))
+    f_low = power_of(low, cells) - target
+    f_high = power_of(high, cells) - target
+    x = high.copy()
+    # The side each cell replaced last: 1 for high, -1 for low, 0 before the first step
+    last_side = np.zeros(len(target), dtype=np.int8)
+    active = cells
+    for _ in range(MAX_ITERATIONS):
+        lo, hi, f_lo, f_hi = low[active], high[active], f_low[active], f_high[active]
+        x_new = np.where(f_hi != f_lo, hi - f_hi * (hi - lo) / (f_hi - f_lo), (lo + hi) / 2)
+        f_x = power_of(x_new, active) - target[active]
+        x[active] = x_new
+        side = np.where(f_x > 0, 1, -1).astype(np.int8)
+        repeated = side == last_side[active]
+        # The side kept twice in a row has its function value halved, which guarantees progress
+        f_low[active] = np.where(side > 0, np.where(repeated, f_lo / 2, f_lo), f_x)
+        f_high[active] = np.where(side > 0, f_x, np.where(repeated, f_hi / 2, f_hi))
+        low[active], high[active] = np.where(side > 0, lo, x_new), np.where(side > 0, x_new, hi)
+        last_side[active] = side
+        converged = (np.abs(f_x) <= TOLERANCE) | (high[active] - low[active] <= TOLERANCE * np.maximum(1.0, x_new))
+        active = active[~converged]
+        if not active.size:
+            break
+    return x
+
+
+def _bracket(power_of, target, start):
+    # Steps up from start, doubling the step, until each cell reaches the target power
+    low, high = start.copy(), start.copy()
+    step = np.maximum(start / 4, 1.0)
+    short = np.arange(len(target))
+    for _ in range(64):
+        reached = power_of(high[short], short) >= target[short]
+        short = short[~reached]
+        if not short.size:
+            break
+        low[short] = high[short]
+        high[short] += step[short]
+        step[short] *= 2
+    return low, high
+
+
+def _cells(kind, values, alphas, powers, ratios, alternative, elementwise=False):
+    # The distinct cells of a grid, and the ones not solved by an earlier call
+    if elementwise:
+        cells = np.column_stack([a.ravel() for a in np.broadcast_arrays(values, alphas, powers, ratios)]).astype(np.float64)
+    else:
+        cells = np.array(list(itertools.product(np.atleast_1d(values), np.atleast_1d(alphas),
+                                                np.atleast_1d(powers), np.atleast_1d(ratios))), dtype=np.float64)
+    unique, inverse = np.unique(cells, axis=0, return_inverse=True)
+    missing = [idx for idx, cell in enumerate(unique) if (kind, *cell, alternative) not in _solved]
+    return cells, unique, inverse.ravel(), missing
+
+
+def sample_size_grid(effect_sizes, alphas=0.05, powers=0.8, ratios=1.0, alternative='two-sided', elementwise=False):
+    """
+    Solves the required group size for every combination of effect size, alpha, power and ratio.
+
+    All cells are solved together with one vectorised root finder, so every
+    iteration costs one noncentral t evaluation per unsolved cell rather than a
+    root-finding run per cell. Repeated cells, within a grid and across calls,
+    are solved once.
+
+    Args:
+    - effect_sizes (array-like): Cohen's d values; the sign is ignored for the two-sided test.
+    - alphas (array-like): Significance levels (default 0.05).
+    - powers (array-like): Target powers (default 0.8).
+    - ratios (array-like): Sizes of the second group relative to the first (default 1).
+    - alternative (str): 'two-sided', 'larger' or 'smaller' (default 'two-sided').
+    - elementwise (bool): Whether to pair the inputs elementwise, broadcasting them against each
+      other, instead of combining every value with every other (default False).
+
+    Returns:
+    - pd.DataFrame: One row per combination with the continuous solution nobs1, the whole group
+      sizes n1 and n2 needed, and the power achieved with them; missing where no group size
+      reaches the power.
+    """
+    cells, unique, inverse, missing = _cells('nobs', effect_sizes, alphas, powers, ratios, alternative, elementwise)
+    if missing:
+        d, alpha, power, ratio = unique[missing].T
+        if alternative == 'two-sided':
+            d = np.abs(d)
+
+        def power_of(nobs1, cells):
+            return ttest_power(d[cells], nobs1, alpha[cells], ratio[cells], alternative)
+
+        # The normal approximation slightly underestimates the t-test's group size, so the search starts there
+        z_alpha = norm.isf(alpha / (2 if alternative == 'two-sided' else 1))
+        with np.errstate(divide='ignore'):
+            guess = (1 + 1 / ratio) * ((z_alpha + norm.ppf(power)) / d) ** 2
+        solved = np.full(len(missing), np.nan)
+        # Effects of zero, or of the wrong sign for a one-sided test, never reach the power
+        reachable = np.isfinite(guess) & (d > 0 if alternative != 'smaller' else d < 0)
+        solvable = np.flatnonzero(reachable)
+        if solvable.size:
+            def solvable_power(nobs1, cells):
+                return power_of(nobs1, solvable[cells])
+
+            start = np.maximum(guess[solvable], MIN_NOBS)
+            low, high = _bracket(solvable_power, power[solvable], start)
+            # Cells already powered at the normal approximation are searched from the smallest size
+            low[low == start] = MIN_NOBS
+            solved[solvable] = _solve(solvable_power, power[solvable], low, high)
+            solved[solvable[power_of(np.full(solvable.size, MIN_NOBS), solvable) >= power[solvable]]] = MIN_NOBS
+        for idx, nobs1 in zip(missing, solved):
+            _solved[('nobs', *unique[idx], alternative)] = nobs1
+
+    nobs1 = np.array([_solved[('nobs', *cell, alternative)] for cell in unique])[inverse]
+    n1 = np.ceil(nobs1 - TOLERANCE)
+    n2 = np.ceil(n1 * cells[:, 3] - TOLERANCE)
+    effect = np.abs(cells[:, 0]) if alternative == 'two-sided' else cells[:, 0]
+    return pd.DataFrame({'effect_size': cells[:, 0], 'alpha': cells[:, 1], 'power': cells[:, 2], 'ratio': cells[:, 3],
+                         'nobs1': nobs1, 'n1': pd.array(n1, dtype='Int64'), 'n2': pd.array(n2, dtype='Int64'),
+                         'achieved_power': ttest_power(effect, n1, cells[:, 1], n2 / n1, alternative)})
+
+
+def detectable_effect_grid(sample_sizes, alphas=0.05, powers=0.8, ratios=1.0, alternative='two-sided'):
+    """
+    Solves the minimum detectable effect for every combination of group size, alpha, power and ratio.
+
+    Args:
+    - sample_sizes (array-like): Sizes of the first group.
+    - alphas (array-like): Significance levels (default 0.05).
+    - powers (array-like): Target powers (default 0.8).
+    - ratios (array-like): Sizes of the second group relative to the first (default 1).
+    - alternative (str): 'two-sided', 'larger' or 'smaller' (default 'two-sided').
+
+    Returns:
+    - pd.DataFrame: One row per combination with the smallest Cohen's d reaching the power
+      (negative for 'smaller').
+    """
+    cells, unique, inverse, missing = _cells('effect', sample_sizes, alphas, powers, ratios, alternative)
+    if missing:
+        nobs1, alpha, power, ratio = unique[missing].T
+        sign = -1.0 if alternative == 'smaller' else 1.0
+
+        def power_of(effect_size, cells):
+            return ttest_power(sign * effect_size, nobs1[cells], alpha[cells], ratio[cells], alternative)
+
+        low, high = _bracket(power_of, power, np.zeros(len(missing)))
+        solved = sign * _solve(power_of, power, low, high)
+        for idx, effect_size in zip(missing, solved):
+            _solved[('effect', *unique[idx], alternative)] = effect_size
+
+    return pd.DataFrame({'nobs1': cells[:, 0], 'alpha': cells[:, 1], 'power': cells[:, 2], 'ratio': cells[:, 3],
+                         'effect_size': np.array([_solved[('effect', *cell, alternative)] for cell in unique])[inverse]})
+
+
+def power_table(effect_sizes, sample_sizes, alphas=0.05, ratios=1.0, alternative='two-sided'):
+    """
+    Computes the power for every combination of effect size, group size, alpha and ratio.
+
+    Args:
+    - effect_sizes (array-like): Cohen's d values.
+    - sample_sizes (array-like): Sizes of the first group.
+    - alphas (array-like): Significance levels (default 0.05).
+    - ratios (array-like): Sizes of the second group relative to the first (default 1).
+    - alternative (str): 'two-sided', 'larger' or 'smaller' (default 'two-sided').
+
+    Returns:
+    - pd.DataFrame: One row per combination with the power.
+    """
+    cells = np.array(list(itertools.product(np.atleast_1d(effect_sizes), np.atleast_1d(sample_sizes),
+                                            np.atleast_1d(alphas), np.atleast_1d(ratios))), dtype=np.float64)
+    return pd.DataFrame({'effect_size': cells[:, 0], 'nobs1': cells[:, 1], 'alpha': cells[:, 2], 'ratio': cells[:, 3],
+                         'power': ttest_power(*cells.T, alternative=alternative)})
@@ -1,55 +1,14 @@
-import os
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from score_loader import load_scores
 
-def get_category(filename):
-    """
-    Determines the category (Tiktok or Video) based on the filename.
+# Load the long-format scores and rename columns to the plot labels
+scores = load_scores('data')
+df = scores.rename(columns={'category': 'Category', 'exposure': 'Exposure', 'forward': 'Forward',
+                            'backward': 'Backward', 'combined': 'Combined'})
 
-    Args:
-    - filename (str): The name of the file.
-
-    Returns:
-    - str: 'Tiktok' for odd numbers, 'Video' for even numbers.
-    """
-    number_part = int(filename.split('_')[0])
-    return 'Tiktok' if number_part % 2 != 0 else 'Video'
-
-def get_exposure(filename):
-    """
-    Determines the exposure type (Pre or Post) based on the filename.
-
-    Args:
-    - filename (str): The name of the file.
-
-    Returns:
-    - str: 'Pre' or 'Post' based on the filename.
-    """
-    return filename.split('_')[1].capitalize()
-
-# Initialize a list to store data and a dictionary to track unique subjects
-data = []
-subject_files = {'Tiktok': set(), 'Video': set()}
-
-data_dir = 'data'
-# Iterate over each file in the data directory
-for filename in os.listdir(data_dir):
-    if filename.endswith('.txt'):
-        category = get_category(filename)
-        exposure = get_exposure(filename)
-        subject_id = filename.split('_')[0]
-        subject_files[category].add(subject_id)
-
-        with open(os.path.join(data_dir, filename), 'r') as file:
-            content = file.read().strip()
-            if content:
-                forward, backward, combined = [int(x) for x in content.split(',')]
-                data.append({'Category': category, 'Exposure': exposure,
-                             'Forward': forward, 'Backward': backward, 'Combined': combined})
-
-# Convert the data into a pandas DataFrame
-df = pd.DataFrame(data)
+# Track unique subjects per category
+subject_files = df.groupby('Category', observed=True)['id'].nunique()
 
 # Set the style for seaborn plots
 sns.set_style('whitegrid')
@@ -74,7 +33,7 @@ for score_type in ['Forward', 'Backward', 'Combined']:
 
     # Calculate and add counts of test subjects below the x-axis
     for i, category in enumerate(df['Category'].unique()):
-        count = len(subject_files[category])
+        count = subject_files[category]
         ax.text(i, ax.get_ylim()[-2], f'n = {count} test subjects', horizontalalignment='center', size='medium', color='black', weight='semibold')
 
     # Adjust legend to show only Exposure types
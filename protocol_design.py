@@ -0,0 +1,175 @@
+import argparse
+from itertools import product
+import numpy as np
+import pandas as pd
+from sequence_bank import MAX_SEQUENCE_LENGTH
+from span_engine import DEFAULT_PROTOCOL
+from span_distribution import level_reach, score_distribution
+
+# Population of the pre-test: spans of the forward and backward tests, driven by one latent ability
+FORWARD_SPAN = (6.7, 1.5)
+BACKWARD_SPAN = (5.8, 1.5)
+
+# Time a participant takes to type a response: a fixed part plus a part per digit
+RESPONSE_BASE_MS = 2000
+RESPONSE_PER_DIGIT_MS = 600
+
+# Gauss-Hermite nodes used to integrate over the latent ability
+QUADRATURE_NODES = 40
+
+
+def logistic_recall(spans, lengths, protocol, slope=2.0):
+    """
+    Returns the probability of recalling sequences of each length.
+
+    The default model ignores the protocol; a custom model may use it, e.g. to
+    make recall depend on protocol.digit_ms.
+
+    Args:
+    - spans (np.ndarray): The spans of m participants.
+    - lengths (np.ndarray): The sequence lengths.
+    - protocol (Protocol): The candidate protocol.
+    - slope (float): How sharply recall drops around the span.
+
+    Returns:
+    - np.ndarray: An (m, len(lengths)) array of recall probabilities.
+    """
+    return 1.0 / (1.0 + np.exp(slope * (lengths[None, :] - spans[:, None])))
+
+
+def expected_direction_ms(curves, protocol, response_base_ms=RESPONSE_BASE_MS,
+                          response_per_digit_ms=RESPONSE_PER_DIGIT_MS):
+    """
+    Computes the expected time spent on the trials of one direction.
+
+    Args:
+    - curves (np.ndarray): An (m, max_length + 1) array of recall probabilities by length.
+    - protocol (Protocol): The candidate protocol.
+    - response_base_ms (float): The fixed part of the response time.
+    - response_per_digit_ms (float): The response time per digit.
+
+    Returns:
+    - np.ndarray: The expected time in ms per curve.
+    """
+    lengths, reach, _ = level_reach(curves, protocol=protocol)
+    trial_ms = lengths * (protocol.digit_ms + response_per_digit_ms) + response_base_ms
+    return protocol.attempts * reach[:, :-1] @ trial_ms
+
+
+def evaluate_protocol(protocol, forward_span=FORWARD_SPAN, backward_span=BACKWARD_SPAN, recall=logistic_recall,
+                      response_base_ms=RESPONSE_BASE_MS, response_per_digit_ms=RESPONSE_PER_DIGIT_MS,
+                      max_length=MAX_SEQUENCE_LENGTH, nodes=QUADRATURE_NODES):
+    """
+    Computes the expected duration and the precision of the combined score under one protocol.
+
+    Participants differ in one standard normal ability z; their forward and
+    backward spans are mean + sd * z. For each quadrature node the exact score
+    distribution is computed, so the result has no Monte Carlo noise. The
+    reliability is the share of the score variance explained by ability,
+    Var(E[S | z]) / Var(S), and the SEM is the root mean within-person variance.
+
+    Args:
+    - protocol (Protocol): The candidate protocol.
+    - forward_span (tuple): The mean and standard deviation of forward spans.
+    - backward_span (tuple): The mean and standard deviation of backward spans.
+    - recall (callable): A function (spans, lengths, protocol) -> recall probabilities (default logistic_recall).
+    - response_base_ms (float): The fixed part of the response time.
+    - response_per_digit_ms (float): The response time per digit.
+    - max_length (int): The longest sequence length modelled.
+    - nodes (int): The number of quadrature nodes.
+
+    Returns:
+    - dict: The protocol fields plus minutes, trials, mean_score, reliability and sem.
+    """
+    z, weights = np.polynomial.hermite_e.hermegauss(nodes)
+    weights = weights / weights.sum()
+    lengths = np.arange(max_length + 1)
+    forward_curves = recall(forward_span[0] + forward_span[1] * z, lengths, protocol)
+    backward_curves = recall(backward_span[0] + backward_span[1] * z, lengths, protocol)
+
+    dist = score_distribution(forward_curves, backward_curves, protocol=protocol)
+    scores = np.arange(dist.combined.shape[1])
+    conditional_mean = dist.combined @ scores
+    conditional_var = dist.combined @ scores ** 2 - conditional_mean ** 2
+
+    mean_score = weights @ conditional_mean
+    true_var = weights @ (conditional_mean - mean_score) ** 2
+    error_var = weights @ conditional_var
+
+    session_ms = (expected_direction_ms(forward_curves, protocol, response_base_ms, response_per_digit_ms)
+                  + expected_direction_ms(backward_curves, protocol, response_base_ms, response_per_digit_ms)
+                  + protocol.notice_ms)
+    return dict(protocol._asdict(),
+                minutes=float(weights @ session_ms) / 60_000,
+                trials=float(weights @ dist.expected_trials),
+                mean_score=float(mean_score),
+                reliability=float(true_var / (true_var + error_var)),
+                sem=float(np.sqrt(error_var)))
+
+
+def evaluate_protocols(protocols, **population):
+    """
+    Evaluates a list of candidate protocols.
+
+    Args:
+    - protocols (iterable): The Protocol candidates.
+    - **population: keyword arguments passed on to evaluate_protocol.
+
+    Returns:
+    - pd.DataFrame: One row per protocol, sorted by expected duration.
+    """
+    rows = [evaluate_protocol(protocol, **population) for protocol in protocols]
+    return pd.DataFrame(rows).sort_values('minutes', ignore_index=True)
+
+
+def protocol_grid(start_lengths=(1, 2, 3, 4), attempts=(1, 2, 3), digit_ms=(600, 800, 1000),
+                  notice_ms=(DEFAULT_PROTOCOL.notice_ms,), base=DEFAULT_PROTOCOL):
+    """
+    Returns every combination of the given protocol parameters.
+
+    Args:
+    - start_lengths (iterable): The candidate start lengths.
+    - attempts (iterable): The candidate numbers of attempts per length.
+    - digit_ms (iterable): The candidate presentation times per digit.
+    - notice_ms (iterable): The candidate durations of the backwards notice.
+    - base (Protocol): The protocol supplying the remaining fields.
+
+    Returns:
+    - list: The Protocol candidates.
+    """
+    return [base._replace(start_length=s, attempts=a, digit_ms=d, notice_ms=n)
+            for s, a, d, n in product(start_lengths, attempts, digit_ms, notice_ms)]
+
+
+def shortest_protocol(results, target_reliability):
+    """
+    Picks the shortest protocol reaching a target reliability.
+
+    Args:
+    - results (pd.DataFrame): The output of evaluate_protocols.
+    - target_reliability (float): The minimum reliability.
+
+    Returns:
+    - pd.Series or None: The fastest qualifying row, or None if no protocol qualifies.
+    """
+    qualifying = results[results['reliability'] >= target_reliability]
+    if qualifying.empty:
+        return None
+    return qualifying.loc[qualifying['minutes'].idxmin()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare digit span protocols by expected duration and reliability")
+    parser.add_argument('--target', type=float, default=0.8, help="the reliability to reach (default %(default)s)")
+    parser.add_argument('--forward-span', type=float, nargs=2, default=FORWARD_SPAN, metavar=('MEAN', 'SD'))
+    parser.add_argument('--backward-span', type=float, nargs=2, default=BACKWARD_SPAN, metavar=('MEAN', 'SD'))
+    args = parser.parse_args()
+
+    results = evaluate_protocols(protocol_grid(), forward_span=args.forward_span, backward_span=args.backward_span)
+    print(results.round(3).to_string(index=False))
+    best = shortest_protocol(results, args.target)
+    if best is None:
+        print(f"\nNo protocol reaches a reliability of {args.target}")
+    else:
+        print(f"\nShortest protocol with reliability >= {args.target}:")
+        print(best.round(3).to_string())
@@ -0,0 +1,404 @@
+import os
+import time
+import argparse
+from span_engine import DEFAULT_PROTOCOL
+from session_journal import make_engine
+from result_writer import ResultWriter, Result, SPOOLED, FAILED, REJECTED, save_result
+from stimulus_scheduler import jitter_stats
+from collector import parse_address
+from trial_log import TrialLog
+import pygame
+
+BACKGROUND = (0xFD, 0xF5, 0xE6)
+FOREGROUND = (0x00, 0x00, 0x8B)
+
+# Refresh rate assumed when the display does not report one
+DEFAULT_REFRESH_HZ = 60
+
+# Screen size under the dummy driver, which has no display to fill
+DUMMY_SIZE = (1024, 768)
+
+
+class PygameSpanTest:
+    """
+    A frame-locked pygame presentation backend for the span procedure.
+
+    The ten digits are rendered to surfaces once; presenting a digit is a
+    single blit. Every stimulus change is drawn on the frame whose flip lands
+    closest to its target, and the flip is timestamped when it returns,
+    which with vsync is when the frame went to the screen. Between changes the
+    backend keeps flipping, so the waits are locked to the display refresh
+    instead of an event-loop timer. Without vsync (e.g. under SDL's dummy
+    driver) frames are paced by the clock instead.
+
+    Attributes:
+    - protocol: the Protocol of the procedure
+    - screen: the display surface
+    - vsync: whether flips are synchronised to the display refresh
+    - frame_ns: the duration of one frame in ns
+    - digit_surfaces: the pre-rendered surface of each digit
+    - text_surfaces: pre-rendered message surfaces keyed by text
+    - clock: a function returning monotonic time in ns
+    - trial_log: the TrialLog receiving every trial, or None
+    - result_writer: the ResultWriter persisting results off the presentation loop
+    """
+    def __init__(self, store_path=None, db_path=None, collector=None, trial_log_path=None, protocol=DEFAULT_PROTOCOL,
+                 bayesian=False, no_runs=False, balanced=False, fullscreen=True):
+        """
+        Initializes pygame, opens the display and pre-renders the digits.
+
+        Args:
+        - store_path: the path of the consolidated score store (default None, one text file per session)
+        - db_path: the path of the SQLite score database (default None, one text file per session)
+        - collector: the (host, port) of a result collector (default None, one text file per session)
+        - trial_log_path: the path of the trial log (default None, no trial logging)
+        - protocol: the Protocol of the procedure (default DEFAULT_PROTOCOL)
+        - bayesian: whether to use the BayesianSpanEngine (default False)
+        - no_runs: whether to forbid runs of three digits (default False)
+        - balanced: whether to balance digit frequencies within each sequence (default False)
+        - fullscreen: whether to fill the screen (default True)
+        """
+        self.store_path = store_path
+        self.db_path = db_path
+        self.collector = collector
+        self.protocol = protocol
+        self.bayesian = bayesian
+        self.no_runs = no_runs
+        self.balanced = balanced
+        self.trial_log = TrialLog(trial_log_path) if trial_log_path else None
+        self.result_writer = ResultWriter(lambda result: save_result(result, store_path, db_path, collector))
+        self.clock = time.perf_counter_ns
+
+        pygame.init()
+        pygame.display.set_caption("Digit Span Test for Working Memory Evaluation")
+        dummy = pygame.display.get_driver() == 'dummy'
+        if dummy:
+            self.screen = pygame.display.set_mode(DUMMY_SIZE)
+        else:
+            # pygame only honours vsync for the SCALED and OPENGL renderers, and SCALED needs an explicit size
+            size = pygame.display.get_desktop_sizes()[0]
+            flags = pygame.SCALED | (pygame.FULLSCREEN if fullscreen else 0)
+            try:
+                self.screen = pygame.display.set_mode(size, flags, vsync=1)
+            except pygame.error:
+                self.screen = pygame.display.set_mode(size, flags)
+        refresh_hz = DEFAULT_REFRESH_HZ
+        if hasattr(pygame.display, 'get_current_refresh_rate'):
+            refresh_hz = pygame.display.get_current_refresh_rate() or DEFAULT_REFRESH_HZ
+        self.frame_ns = 1_000_000_000 // refresh_hz
+        # Without a renderer that really waits for the refresh, frames are paced by the clock
+        self.vsync = not dummy and self.flips_are_paced()
+        self.next_frame_ns = self.last_flip_ns = self.clock()
+
+        self.digit_font = pygame.font.SysFont('times', 160)
+        self.text_font = pygame.font.SysFont('arial', 26)
+        self.digit_surfaces = [self.digit_font.render(str(digit), True, FOREGROUND, BACKGROUND) for digit in range(10)]
+        self.text_surfaces = {}
+
+    def text(self, message):
+        """
+        Returns the surface of a message, rendering it only the first time.
+
+        Args:
+        - message: the text
+
+        Returns:
+        - pygame.Surface: the rendered text
+        """
+        if message not in self.text_surfaces:
+            self.text_surfaces[message] = self.text_font.render(message, True, FOREGROUND, BACKGROUND)
+        return self.text_surfaces[message]
+
+    def draw(self, surface=None, below=None):
+        """
+        Clears the back buffer and centres a surface on it, without flipping.
+
+        Args:
+        - surface: the surface to draw (default None, a blank screen)
+        - below: a second surface drawn under the first (default None)
+        """
+        self.screen.fill(BACKGROUND)
+        centre = self.screen.get_rect().center
+        if surface is not None:
+            self.screen.blit(surface, surface.get_rect(center=centre))
+        if below is not None:
+            self.screen.blit(below, below.get_rect(center=(centre[0], centre[1] + 80)))
+
+    def flips_are_paced(self, frames=12):
+        """
+        Checks whether flips actually wait for the display refresh.
+
+        pygame accepts vsync=1 even where the driver ignores it, so the flip
+        intervals are measured: with vsync they are close to a frame, without it
+        they are far shorter.
+
+        Args:
+        - frames: the number of flips measured (default 12)
+
+        Returns:
+        - bool: whether the median flip interval is at least half a frame
+        """
+        self.screen.fill(BACKGROUND)
+        times = []
+        for _ in range(frames + 1):
+            pygame.display.flip()
+            times.append(self.clock())
+        intervals = sorted(b - a for a, b in zip(times, times[1:]))
+        return intervals[len(intervals) // 2] >= self.frame_ns // 2
+
+    def flip(self):
+        """
+        Shows the back buffer and returns when the frame was presented.
+
+        Returns:
+        - int: the clock time after the flip in ns
+        """
+        if not self.vsync:
+            # Pace frames by the clock so the dummy driver behaves like a real display
+            while self.clock() < self.next_frame_ns:
+                time.sleep(max(0, self.next_frame_ns - self.clock() - 1_000_000) / 1e9)
+            self.next_frame_ns = max(self.next_frame_ns + self.frame_ns, self.clock())
+        pygame.display.flip()
+        self.last_flip_ns = self.clock()
+        return self.last_flip_ns
+
+    def present(self, sequence):
+        """
+        Presents a sequence frame-locked and returns its timing.
+
+        The event after the last digit is the blank frame that ends the last
+        digit and precedes the input prompt.
+
+        Args:
+        - sequence: the digits as strings
+
+        Returns:
+        - list: the target of each event in ns relative to the first digit
+        - list: the measured onset of each event in ns relative to the first digit
+        - list: the time each event took from drawing until its flip returned, in ns
+        """
+        surfaces = [self.digit_surfaces[int(digit)] for digit in sequence] + [None]
+        targets = [idx * self.protocol.digit_ms * 1_000_000 for idx in range(len(surfaces))]
+        onsets, render_ns = [], []
+        start_ns = None
+        for target, surface in zip(targets, surfaces):
+            if start_ns is not None:
+                # Keep showing the current frame while a later flip would land closer to the target
+                while self.last_flip_ns + self.frame_ns + self.frame_ns // 2 <= start_ns + target:
+                    pygame.event.pump()
+                    self.flip()
+            drawn_ns = self.clock()
+            self.draw(surface)
+            flipped_ns = self.flip()
+            if start_ns is None:
+                start_ns = flipped_ns
+            onsets.append(flipped_ns - start_ns)
+            render_ns.append(flipped_ns - drawn_ns)
+        return targets, onsets, render_ns
+
+    def wait(self, ms):
+        """
+        Keeps the current screen for a while, flipping every frame.
+
+        Args:
+        - ms: the time to wait in ms
+        """
+        until = self.clock() + ms * 1_000_000
+        while self.clock() < until:
+            pygame.event.pump()
+            self.flip()
+
+    def read_line(self, prompt, digits_only=False):
+        """
+        Shows a prompt and collects typed text until Return.
+
+        Args:
+        - prompt: the prompt text
+        - digits_only: whether to ignore keys other than digits (default False)
+
+        Returns:
+        - str: the typed text
+        - list: (char, ns since the prompt was shown) per keystroke
+        - int: the time Return was pressed, in ns since the prompt was shown
+
+        Raises:
+        - SystemExit: if the window is closed
+        """
+        typed, keystrokes = '', []
+        self.draw(self.text(prompt))
+        prompt_ns = self.flip()
+        while True:
+            event = pygame.event.wait()
+            if event.type == pygame.QUIT:
+                raise SystemExit
+            if event.type != pygame.KEYDOWN:
+                continue
+            now_ns = self.clock() - prompt_ns
+            keystrokes.append((event.unicode, now_ns))
+            if event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+                return typed, keystrokes, now_ns
+            if event.key == pygame.K_BACKSPACE:
+                typed = typed[:-1]
+            elif event.unicode and event.unicode.isprintable() and (event.unicode.isdigit() or not digits_only):
+                typed += event.unicode
+            self.draw(self.text(prompt), self.text(typed) if typed else None)
+            self.flip()
+
+    def run_session(self, user_id, test_type):
+        """
+        Runs one practice or test session and shows its result.
+
+        Args:
+        - user_id: the participant ID
+        - test_type: 'pre', 'post' or 'practice'
+        """
+        practice = test_type == 'practice'
+        engine = make_engine(practice, None, self.protocol, self.no_runs, self.balanced, self.bayesian)
+        if self.trial_log:
+            session_id = self.trial_log.start_session(user_id, test_type, engine.sequence_bank.seed)
+        else:
+            session_id = time.time_ns()
+
+        while not engine.finished:
+            if engine.notice_pending:
+                self.draw(self.text("Now, input the numbers backwards."))
+                self.flip()
+                self.wait(self.protocol.notice_ms)
+            sequence = engine.next_stimulus()
+            presented_ns = time.time_ns()
+            targets, onsets, render_ns = self.present(sequence)
+            prompt = "Input the numbers forwards:" if engine.forward else "Input the numbers backwards:"
+            response, keystrokes, submitted_ns = self.read_line(prompt, digits_only=True)
+            engine.submit(response)
+            if self.trial_log:
+                trial = engine.trials[-1]
+                self.trial_log.log_trial(session_id, trial.forward, trial.sequence, trial.response, trial.correct,
+                                         trial.attempt, presented_ns, time.time_ns(), keystrokes, submitted_ns)
+                self.trial_log.log_onsets(session_id, presented_ns, targets, onsets, render_ns)
+        if self.trial_log:
+            self.trial_log.flush()
+
+        lines = [f"Test complete, {user_id}!", f"Max Forward Length: {engine.max_forward_length}",
+                 f"Max Backward Length: {engine.max_backward_length}", f"Combined Test Score: {engine.combined_score}"]
+        if practice:
+            lines.append("Practice Complete!")
+        else:
+            result = Result(user_id, test_type, engine.max_forward_length, engine.max_backward_length,
+                            engine.combined_score, session_id)
+            self.result_writer.submit(result)
+            lines.append(self.wait_for_save(result))
+        self.show_lines(lines)
+        self.wait(4000)
+
+    def wait_for_save(self, result):
+        """
+        Waits, still flipping, until the result writer reports the outcome of a result.
+
+        Args:
+        - result: the submitted Result
+
+        Returns:
+        - str: the note to show under the scores
+        """
+        self.draw(self.text("Saving result..."))
+        while True:
+            for done, outcome in self.result_writer.poll():
+                if done != result:
+                    continue
+                if outcome == SPOOLED:
+                    return "The result storage is unreachable; the result was kept locally and will be saved later."
+                if outcome == FAILED:
+                    return "The result could not be saved. Please note down the scores above."
+                if outcome == REJECTED:
+                    return "The result was rejected as invalid and was not saved. Please note down the scores above."
+                if not outcome:
+                    return f"A {result.test_type}-test result for ID {result.user_id} already exists; this result was not saved."
+                return ""
+            pygame.event.pump()
+            self.flip()
+
+    def show_lines(self, lines):
+        """
+        Shows lines of text stacked around the centre of the screen.
+
+        Args:
+        - lines: the texts
+        """
+        self.screen.fill(BACKGROUND)
+        centre_x, centre_y = self.screen.get_rect().center
+        top = centre_y - 40 * len(lines) // 2
+        for idx, line in enumerate(lines):
+            surface = self.text(line)
+            self.screen.blit(surface, surface.get_rect(center=(centre_x, top + 40 * idx)))
+        self.flip()
+
+    def run(self):
+        """
+        Asks for the participant ID, then runs the sessions chosen on the intro screen until the window is closed.
+        """
+        try:
+            user_id = ''
+            while not user_id or ((self.store_path or self.db_path or self.collector) and not user_id.isdigit()):
+                user_id = self.read_line("Please enter your ID:")[0].strip()
+            choices = {'p': 'practice', '1': 'pre', '2': 'post'}
+            while True:
+                choice = self.read_line("Press P and Return to practice, 1 for the pre-test or 2 for the post-test")[0]
+                if choice.strip().lower() in choices:
+                    self.run_session(user_id, choices[choice.strip().lower()])
+        except SystemExit:
+            pass
+        finally:
+            self.close()
+
+    def timing_test(self, sequences=20, length=5):
+        """
+        Presents sequences without a participant and measures onset accuracy.
+
+        Args:
+        - sequences: the number of sequences (default 20)
+        - length: the length of each sequence (default 5)
+
+        Returns:
+        - dict: jitter_stats of the onset lateness, plus the frame duration in ms and whether vsync was on.
+        """
+        lateness = []
+        for _ in range(sequences):
+            targets, onsets, _ = self.present([str(digit % 10) for digit in range(length)])
+            lateness.extend(onset - target for target, onset in zip(targets, onsets))
+        return dict(jitter_stats(lateness), frame_ms=self.frame_ns / 1e6, vsync=self.vsync)
+
+    def close(self):
+        """
+        Finishes pending writes and shuts pygame down.
+        """
+        self.result_writer.close()
+        if self.trial_log:
+            self.trial_log.flush()
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Digit Span Test for Working Memory Evaluation (pygame backend)")
+    backend = parser.add_mutually_exclusive_group()
+    backend.add_argument('--store', metavar='PATH', help="append results to a consolidated score store (e.g. data/scores.bin) instead of one text file per session")
+    backend.add_argument('--db', metavar='PATH', help="insert results into a shared SQLite database (e.g. data/scores.db) instead of one text file per session")
+    backend.add_argument('--collector', metavar='HOST:PORT', type=parse_address, help="submit results to a collector service instead of one text file per session")
+    parser.add_argument('--trial-log', metavar='PATH', default='data/trials.bin', help="append every trial to this log (default data/trials.bin)")
+    parser.add_argument('--no-trial-log', dest='trial_log', action='store_const', const=None, help="disable the trial log")
+    parser.add_argument('--bayesian', action='store_true', help="choose sequence lengths adaptively from a posterior over the span instead of the staircase")
+    parser.add_argument('--windowed', action='store_true', help="run in a window instead of full screen")
+    parser.add_argument('--dummy', action='store_true', help="use SDL's dummy video driver (no window), e.g. for --timing-test")
+    parser.add_argument('--timing-test', type=int, metavar='N', help="present N sequences without a participant and print onset accuracy")
+    args = parser.parse_args()
+
+    if args.dummy:
+        # SDL reads the driver when the display is initialised
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    app = PygameSpanTest(store_path=args.store, db_path=args.db, collector=args.collector,
+                         trial_log_path=None if args.timing_test else args.trial_log,
+                         bayesian=args.bayesian, fullscreen=not args.windowed)
+    if args.timing_test:
+        print(app.timing_test(args.timing_test))
+        app.close()
+    else:
+        app.run()
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+# Columns compared in the analysis scripts
+DIFFERENCE_COLUMNS = ['Forward Difference', 'Backward Difference', 'Combined Difference']
+
+
+def split_by(df, column, x, y, within=None):
+    """
+    Builds the group masks of one comparison from a grouping column.
+
+    Args:
+    - df (pd.DataFrame): The data.
+    - column (str): The grouping column, e.g. 'Category'.
+    - x: The value of the first group, e.g. 'TikTok'.
+    - y: The value of the second group, e.g. 'Video'.
+    - within (array-like): A boolean mask restricting both groups to a subgroup (default None, all rows).
+
+    Returns:
+    - tuple: The boolean masks of the first and the second group.
+    """
+    keep = np.ones(len(df), dtype=bool) if within is None else np.asarray(within, dtype=bool)
+    values = df[column].to_numpy()
+    return keep & (values == x), keep & (values == y)
+
+
+def _tie_groups(values):
+    # Sorts every column once and finds, per sorted position, the first and last position of its tie group
+    order = np.argsort(values, axis=0, kind='stable')
+    ordered = np.take_along_axis(values, order, axis=0)
+    n = values.shape[0]
+    positions = np.broadcast_to(np.arange(n)[:, None], values.shape)
+    starts_group = np.ones(values.shape, dtype=bool)
+    starts_group[1:] = ordered[1:] != ordered[:-1]
+    first = np.maximum.accumulate(np.where(starts_group, positions, 0), axis=0)
+    ends_group = np.ones(values.shape, dtype=bool)
+    ends_group[:-1] = starts_group[1:]
+    last = np.minimum.accumulate(np.where(ends_group, positions, n - 1)[::-1], axis=0)[::-1]
+    return order, first, last
+
+
+def mannwhitney_batch(df, columns, splits, alternative='two-sided'):
+    """
+    Runs Mann-Whitney U tests for every combination of outcome column and split in one pass.
+
+    Every column is sorted once for all splits. A split selects two groups of
+    rows; the midranks within the rows of a split follow from counting, along
+    the sorted column, how many of its rows lie below and within each tie
+    group, which is done for all splits and columns at once with cumulative
+    sums. Missing values are omitted per column, as with scipy's
+    nan_policy='omit', so the group sizes can differ between columns. The
+    p-values use the normal approximation with tie and continuity correction,
+    as scipy.stats.mannwhitneyu(method='asymptotic') does.
+
+    Args:
+    - df (pd.DataFrame): The data.
+    - columns (list): The outcome columns.
+    - splits (dict): Maps a split name to a pair of boolean masks over the rows of df, e.g.
+      {'all': split_by(df, 'Category', 'TikTok', 'Video')}.
+    - alternative (str): 'two-sided', 'greater' (the first group tends higher) or 'less'.
+
+    Returns:
+    - pd.DataFrame: One row per split and column with n_x, n_y (the non-missing values of each group),
+      the U statistic of the first group, the p-value and the rank-biserial correlation (positive if
+      the first group tends higher).
+    """
+    if alternative not in ('two-sided', 'greater', 'less'):
+        raise ValueError(f"invalid alternative: {alternative}")
+    names = list(splits)
+    x = np.array([np.asarray(splits[name][0], dtype=bool) for name in names]).reshape(len(names), len(df))
+    y = np.array([np.asarray(splits[name][1], dtype=bool) for name in names]).reshape(len(names), len(df))
+    if (x & y).any():
+        raise ValueError("a row is in both groups of a split")
+    values = df[columns].to_numpy(dtype=np.float64)
+    order, first, last = _tie_groups(values)
+
+    # (splits, rows, columns) membership in sorted order, without the missing values, and running
+    # counts of the split's rows; argsort puts NaN last and NaN never ties, so they cannot shift a midrank
+    present = ~np.isnan(np.take_along_axis(values, order, axis=0))
+    in_x = x[:, order] & present
+    in_split = (in_x | y[:, order]) & present
+    counts = np.zeros((len(names), len(df) + 1, len(columns)))
+    counts[:, 1:] = np.cumsum(in_split, axis=1)
+    column_idx = np.arange(len(columns))
+    below = counts[:, first, column_idx]
+    tied = counts[:, last + 1, column_idx] - below
+    midranks = below + (tied + 1) / 2
+
+    n_x = in_x.sum(axis=1).astype(np.float64)
+    n_y = in_split.sum(axis=1) - n_x
+    n = n_x + n_y
+    u_x = (in_x * midranks).sum(axis=1) - n_x * (n_x + 1) / 2
+    # Sum of t^3 - t over the tie groups, counted once per member as t^2 - 1
+    ties = (in_split * (tied ** 2 - 1)).sum(axis=1)
+
+    mu = n_x * n_y / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.sqrt(n_x * n_y / 12 * ((n + 1) - ties / (n * (n - 1))))
+        if alternative == 'two-sided':
+            z = (np.maximum(u_x, n_x * n_y - u_x) - mu - 0.5) / sigma
+            p = np.minimum(2 * norm.sf(z), 1.0)
+        elif alternative == 'greater':
+            p = norm.sf((u_x - mu - 0.5) / sigma)
+        else:
+            p = norm.sf((n_x * n_y - u_x - mu - 0.5) / sigma)
+        rank_biserial = 2 * u_x / (n_x * n_y) - 1
+
+    return pd.DataFrame({
+        'split': np.repeat(names, len(columns)),
+        'column': np.tile(columns, len(names)),
+        'n_x': n_x.ravel().astype(np.int64),
+        'n_y': n_y.ravel().astype(np.int64),
+        'U': u_x.ravel(),
+        'p': p.ravel(),
+        'rank_biserial': rank_biserial.ravel(),
+    })
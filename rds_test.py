@@ -1,5 +1,19 @@
+import argparse
+import os
 import tkinter as tk
-import random
+import time
+from collector import parse_address
+from trial_log import TrialLog
+from result_writer import ResultWriter, Result, SPOOLED, FAILED, REJECTED, save_result
+from stimulus_scheduler import StimulusScheduler
+from span_engine import DEFAULT_PROTOCOL
+from session_journal import SessionJournal, make_engine, replay
+
+# Canvas tags of the screens; every screen's items are created once and shown or hidden
+SCREENS = ('id', 'intro', 'digit', 'input', 'notice', 'results')
+
+# How often the results screen checks whether the result writer has saved the result
+SAVE_POLL_MS = 100
 
 class DigitSpanTest:
     """
@@ -10,30 +24,67 @@ class DigitSpanTest:
     - width: the width of the screen
     - height: the height of the screen
     - canvas: the tkinter canvas used for displaying UI elements
+    - current_screen: the tag of the screen currently shown on the canvas
     - id_entry: the tkinter entry widget for entering user ID
+    - id_error_item: the canvas text item explaining why an entered ID was refused
     - user_id: the ID entered by the user
     - practice_btn: the tkinter button widget for starting practice mode
     - pre_test_btn: the tkinter button widget for starting pre-test mode
     - post_test_btn: the tkinter button widget for starting post-test mode
-    - forward: a boolean indicating whether the current test is forward or backward
-    - sequence_length: the length of the current sequence
-    - sequence_attempts: the number of attempts made to repeat the current sequence
-    - correct_attempts: the number of correct attempts made to repeat the current sequence
-    - max_forward_length: the maximum length of a forward sequence achieved in the current test
-    - max_backward_length: the maximum length of a backward sequence achieved in the current test
-    - last_sequence: the last sequence generated in the current test
+    - engine: the DigitSpanEngine running the adaptive procedure of the current test
     - sequence: the current sequence to be repeated by the user
     - practice_mode: a boolean indicating whether the current test is in practice mode
     - test_type: a string indicating the type of the current test (pre or post)
+    - store_path: the path of the consolidated score store, or None to write one text file per session
+    - db_path: the path of the SQLite score database, or None to write one text file per session
+    - collector: the (host, port) of a result collector, or None to write one text file per session
+    - trial_log: the TrialLog receiving every presented trial, or None to disable trial logging
+    - session_id: the trial log and journal id of the current practice or test session
+    - presented_ns: the unix time in ns at which the current sequence started
+    - scheduler: the StimulusScheduler presenting the digits of a sequence
+    - prompt_ns: the perf_counter_ns time at which the input prompt was shown
+    - keystrokes: the (char, ns since prompt_ns) pairs typed in the current trial
+    - protocol: the Protocol of the procedure (start length, attempts, timings)
+    - bayesian: whether tests use the BayesianSpanEngine instead of the staircase
+    - live_validation: whether a trial ends at the first keystroke that departs from the correct response
+    - result_writer: the ResultWriter persisting results off the Tk thread
+    - pending_result: the Result of the last test whose save outcome has not been shown yet
+    - journal_dir: the directory of the session journals, or None to disable journaling
+    - journal: the SessionJournal of the current test, or None
     """
-    def __init__(self, master):
+    def __init__(self, master, store_path=None, db_path=None, trial_log_path=None, no_runs=False, balanced_digits=False,
+                 protocol=DEFAULT_PROTOCOL, bayesian=False, live_validation=False, journal_dir=None, collector=None):
         """
         Initializes the DigitSpanTest object.
 
         Args:
         - master: the tkinter master window
+        - store_path: the path of the consolidated score store (default None, one text file per session)
+        - db_path: the path of the SQLite score database (default None, one text file per session)
+        - trial_log_path: the path of the trial log (default None, no trial logging)
+        - no_runs: whether sequences may not contain ascending or descending runs of three digits (default False)
+        - balanced_digits: whether to balance digit frequencies within each sequence (default False)
+        - protocol: the Protocol of the procedure (default DEFAULT_PROTOCOL)
+        - bayesian: whether to choose lengths adaptively with the BayesianSpanEngine (default False)
+        - live_validation: whether to end a trial at the first wrong keystroke (default False)
+        - journal_dir: the directory of the session journals (default None, no journaling)
+        - collector: the (host, port) of a result collector (default None, one text file per session)
         """
         self.master = master
+        self.store_path = store_path
+        self.db_path = db_path
+        self.collector = collector
+        self.trial_log = TrialLog(trial_log_path) if trial_log_path else None
+        self.scheduler = StimulusScheduler(self.master)
+        self.no_runs = no_runs
+        self.balanced_digits = balanced_digits
+        self.protocol = protocol
+        self.bayesian = bayesian
+        self.live_validation = live_validation
+        self.result_writer = ResultWriter(self.save_results)
+        self.pending_result = None
+        self.journal_dir = journal_dir
+        self.journal = None
         self.master.title("Digit Span Test for Working Memory Evaluation")
 
         self.width = self.master.winfo_screenwidth()
@@ -43,17 +94,84 @@ class DigitSpanTest:
         self.canvas = tk.Canvas(self.master, bg='#FDF5E6')
         self.canvas.pack(fill='both', expand=True)
 
+        self.build_screens()
         self.ask_for_id()
 
-    def ask_for_id(self):
+    def build_screens(self):
         """
-        Displays a UI element for entering user ID.
+        Creates the canvas items and widgets of every screen once, all hidden.
+
+        Screens are switched with show_screen and their text is updated with
+        itemconfig, so no item or widget is created while a test is running.
         """
-        self.canvas.delete('all')
-        label = self.canvas.create_text(self.width/2, self.height/2.3, fill='darkblue', font='Arial 26', text="Please enter your ID:", justify='c')
+        self.current_screen = None
+        hidden = {'state': 'hidden'}
+
+        self.canvas.create_text(self.width/2, self.height/2.3, fill='darkblue', font='Arial 26', text="Please enter your ID:", justify='c', tags='id', **hidden)
         self.id_entry = tk.Entry(self.master, font=('Arial', 32))
-        self.canvas.create_window(self.width/2, self.height/2, window=self.id_entry)
+        self.canvas.create_window(self.width/2, self.height/2, window=self.id_entry, tags='id', **hidden)
         self.id_entry.bind('<Return>', self.start_intro)
+        self.id_error_item = self.canvas.create_text(self.width/2, self.height/1.8, fill='darkred', font='Arial 22', text='', justify='c', tags='id', **hidden)
+
+        title_text = "Digit Span Test for Working Memory Evaluation"
+        self.canvas.create_text(self.width/2, self.height/4.5, fill='darkblue', font='Arial 52', text=title_text, justify='c', tags='intro', **hidden)
+
+        if self.bayesian:
+            procedure = "The length of the sequence adapts to your answers.\n"
+        else:
+            procedure = ("If successful, the length of the sequence will increase by 1.\n"
+                         f"We will start out with {self.protocol.start_length} digits.\n")
+        docs = ("This is a Digit Span Test that evaluates working memory performance.\n"
+                "Try to remember the digits in the order they are presented and\n"
+                "repeat them once the sequence has stopped.\n"
+                + procedure +
+                "Choose if you'd like to start the test or practice first.")
+        self.canvas.create_text(self.width/2, self.height/2.2, fill='darkblue', font='Arial 26', text=docs, justify='c', tags='intro', **hidden)
+
+        self.practice_btn = tk.Button(self.master, text="Practice", font='Arial 24', fg='black', bg='#4682B4', command=self.start_practice)
+        self.canvas.create_window(self.width/2.6, self.height/1.4, window=self.practice_btn, tags='intro', **hidden)
+
+        self.pre_test_btn = tk.Button(self.master, text="Start Pre-test", font='Arial 24', fg='black', bg='#4682B4', command=lambda: self.start_test('pre'))
+        self.canvas.create_window(self.width/1.9, self.height/1.4, window=self.pre_test_btn, tags='intro', **hidden)
+
+        self.post_test_btn = tk.Button(self.master, text="Start Post-test", font='Arial 24', fg='black', bg='#4682B4', command=lambda: self.start_test('post'))
+        self.canvas.create_window(self.width/1.4, self.height/1.4, window=self.post_test_btn, tags='intro', **hidden)
+
+        self.digit_item = self.canvas.create_text(self.width/2, self.height/2, fill='darkblue', font='Times 160', text='', tags='digit', **hidden)
+
+        self.prompt_item = self.canvas.create_text(self.width/2, self.height/2.3, fill='darkblue', font='Arial 26', text='', tags='input', **hidden)
+        self.input_entry = tk.Entry(self.master, font=('Arial', 32), state='disabled')
+        self.canvas.create_window(self.width/2, self.height/2, window=self.input_entry, tags='input', **hidden)
+        self.input_entry.bind('<Return>', self.validate_input)
+        self.input_entry.bind('<Key>', self.record_keystroke)
+
+        self.canvas.create_text(self.width/2, self.height/2.3, fill='darkblue', font='Arial 26', text="Now, input the numbers backwards.", tags='notice', **hidden)
+
+        self.result_title_item = self.canvas.create_text(self.width/2, self.height/2.5, fill='darkblue', font='Arial 26', text='', tags='results', **hidden)
+        self.forward_result_item = self.canvas.create_text(self.width/2, self.height/2, fill='darkblue', font='Arial 22', text='', tags='results', **hidden)
+        self.backward_result_item = self.canvas.create_text(self.width/2, self.height/1.8, fill='darkblue', font='Arial 22', text='', tags='results', **hidden)
+        self.combined_result_item = self.canvas.create_text(self.width/2, self.height/1.6, fill='darkblue', font='Arial 22', text='', tags='results', **hidden)
+        self.result_note_item = self.canvas.create_text(self.width/2, self.height/1.3, fill='darkblue', font='Arial 26', text='', tags='results', **hidden)
+
+    def show_screen(self, screen):
+        """
+        Hides the current screen and shows another one.
+
+        Args:
+        - screen: the tag of the screen to show, one of SCREENS
+        """
+        if screen == self.current_screen:
+            return
+        if self.current_screen:
+            self.canvas.itemconfig(self.current_screen, state='hidden')
+        self.canvas.itemconfig(screen, state='normal')
+        self.current_screen = screen
+
+    def ask_for_id(self):
+        """
+        Displays a UI element for entering user ID.
+        """
+        self.show_screen('id')
         self.id_entry.focus_set()
 
     def start_intro(self, event=None):
@@ -66,38 +184,42 @@ class DigitSpanTest:
         self.user_id = self.id_entry.get().strip()
         if not self.user_id:
             return
+        if (self.store_path or self.db_path or self.collector) and not self.user_id.isdigit():
+            # The consolidated store, the database and the collector key sessions on numeric IDs
+            self.canvas.itemconfig(self.id_error_item, text="A numeric ID is required.")
+            return
+        if any(sep in self.user_id for sep in (os.sep, os.altsep) if sep):
+            # The ID names the result file of the text backend
+            self.canvas.itemconfig(self.id_error_item, text="The ID cannot contain path separators.")
+            return
 
-        self.canvas.delete('all')
-        title_text = "Digit Span Test for Working Memory Evaluation"
-        self.canvas.create_text(self.width/2, self.height/4.5, fill='darkblue', font='Arial 52', text=title_text, justify='c')
-
-        docs = ("This is a Digit Span Test that evaluates working memory performance.\n"
-                "Try to remember the digits in the order they are presented and\n"
-                "repeat them once the sequence has stopped.\n"
-                "If successful, the length of the sequence will increase by 1.\n"
-                "We will start out with 2 digits.\n"
-                "Choose if you'd like to start the test or practice first.")
-        self.canvas.create_text(self.width/2, self.height/2.2, fill='darkblue', font='Arial 26', text=docs, justify='c')
-
-        self.practice_btn = tk.Button(self.master, text="Practice", font='Arial 24', fg='black', bg='#4682B4', command=self.start_practice)
-        self.canvas.create_window(self.width/2.6, self.height/1.4, window=self.practice_btn)
-        
-        self.pre_test_btn = tk.Button(self.master, text="Start Pre-test", font='Arial 24', fg='black', bg='#4682B4', command=lambda: self.start_test('pre'))
-        self.canvas.create_window(self.width/1.9, self.height/1.4, window=self.pre_test_btn)
-
-        self.post_test_btn = tk.Button(self.master, text="Start Post-test", font='Arial 24', fg='black', bg='#4682B4', command=lambda: self.start_test('post'))
-        self.canvas.create_window(self.width/1.4, self.height/1.4, window=self.post_test_btn)
+        self.canvas.itemconfig(self.id_error_item, text='')
+        self.show_screen('intro')
 
     def initialize_test_values(self):
         """
-        Initializes the test values for a new test.
+        Initializes the test values for a new test, resuming an unfinished journaled test of
+        the same participant and test type at the trial where it stopped.
         """
-        self.forward = True
-        self.sequence_length = 2
-        self.sequence_attempts = 0
-        self.correct_attempts = 0
-        self.max_forward_length = 0
-        self.max_backward_length = 0
+        self.journal = None
+        if self.journal_dir and not self.practice_mode:
+            self.journal = SessionJournal.resume(self.journal_dir, self.user_id, self.test_type)
+        if self.journal:
+            self.engine = replay(self.journal.records)
+            self.engine.clock = time.perf_counter_ns
+            self.session_id = self.journal.start_record['session_id']
+            return
+
+        self.engine = make_engine(self.practice_mode, None, self.protocol, self.no_runs, self.balanced_digits, self.bayesian)
+        seed = self.engine.sequence_bank.seed
+        if self.trial_log:
+            self.session_id = self.trial_log.start_session(self.user_id, 'practice' if self.practice_mode else self.test_type,
+                                                           seed)
+        else:
+            self.session_id = time.time_ns()
+        if self.journal_dir and not self.practice_mode:
+            self.journal = SessionJournal.start(self.journal_dir, self.user_id, self.test_type, self.session_id, seed,
+                                                self.protocol, self.no_runs, self.balanced_digits, self.bayesian)
 
     def start_practice(self):
         """
@@ -123,115 +245,202 @@ class DigitSpanTest:
         """
         Runs the current test.
         """
-        if self.sequence_attempts < 2:
-            while True:
-                new_sequence = [str(random.randint(0, 9))]
-                for _ in range(1, self.sequence_length):
-                    while True:
-                        next_digit = str(random.randint(0, 9))
-                        if next_digit != new_sequence[-1]:
-                            new_sequence.append(next_digit)
-                            break
-                if new_sequence != getattr(self, 'last_sequence', []):
-                    break
-
-            self.sequence = new_sequence
-            self.last_sequence = new_sequence
-            self.show_sequence()
+        if self.engine.finished:
+            self.end_test()
+        elif self.engine.notice_pending:
+            self.show_backwards_notice()
         else:
-            if self.correct_attempts >= 1:
-                if self.forward:
-                    self.max_forward_length = max(self.max_forward_length, self.sequence_length)
-                else:
-                    self.max_backward_length = max(self.max_backward_length, self.sequence_length)
-                self.correct_attempts = 0
-                self.sequence_attempts = 0
-                self.sequence_length += 1
-
-                if self.practice_mode:
-                    if self.sequence_length > 3:
-                        if self.forward:
-                            self.forward = False
-                            self.sequence_length = 2
-                            self.sequence_attempts = 0
-                            self.correct_attempts = 0
-                            self.show_backwards_notice()
-                            return
-                        else:
-                            self.end_test()
-                            return
-                self.run_test()
-            else:
-                if self.forward:
-                    self.forward = False
-                    self.sequence_length = 2
-                    self.sequence_attempts = 0
-                    self.correct_attempts = 0
-                    self.show_backwards_notice()
-                else:
-                    if self.practice_mode:
-                        self.end_test()
-                    else:
-                        self.end_test()
+            self.next_sequence()
+
+    def next_sequence(self):
+        """
+        Fetches the next sequence from the engine and presents it.
+        """
+        self.sequence = self.engine.next_stimulus()
+        self.show_sequence()
 
     def show_sequence(self):
         """
         Displays the current sequence to be repeated by the user.
         """
-        self.canvas.delete('all')
-        for idx, num in enumerate(self.sequence):
-            self.master.after(idx * 1000, self.display_number, num)
-        self.master.after(len(self.sequence) * 1000, self.get_input)
+        self.canvas.itemconfig(self.digit_item, text='')
+        self.show_screen('digit')
+        self.presented_ns = time.time_ns()
+        digit_ms = self.protocol.digit_ms
+        events = [(idx * digit_ms, self.display_number, num) for idx, num in enumerate(self.sequence)]
+        events.append((len(self.sequence) * digit_ms, self.get_input))
+        self.scheduler.run(events, on_complete=self.record_onsets)
+
+    def record_onsets(self, scheduler):
+        """
+        Logs the measured onset and offset of every digit of the current sequence.
+
+        Args:
+        - scheduler: the StimulusScheduler that presented the sequence
+        """
+        if self.trial_log:
+            self.trial_log.log_onsets(self.session_id, self.presented_ns, scheduler.targets, scheduler.onsets,
+                                     scheduler.render_ns)
 
     def display_number(self, num):
-        self.canvas.delete('all')
-        self.canvas.create_text(self.width/2, self.height/2, fill='darkblue', font='Times 160', text=num)
+        self.canvas.itemconfig(self.digit_item, text=num)
 
     def get_input(self):
-        self.canvas.delete('all')  
-        prompt = "Input the numbers forwards:" if self.forward else "Input the numbers backwards:"
-        self.canvas.create_text(self.width/2, self.height/2.3, fill='darkblue', font='Arial 26', text=prompt)
-        self.input_entry = tk.Entry(self.master, font=('Arial', 32))
-        self.canvas.create_window(self.width/2, self.height/2, window=self.input_entry)
-        self.input_entry.bind('<Return>', self.validate_input)
+        prompt = "Input the numbers forwards:" if self.engine.forward else "Input the numbers backwards:"
+        self.canvas.itemconfig(self.prompt_item, text=prompt)
+        self.input_entry.config(state='normal')
+        self.input_entry.delete(0, 'end')
+        self.show_screen('input')
         self.input_entry.focus_set()
+        self.keystrokes = []
+        self.master.update_idletasks()
+        self.prompt_ns = time.perf_counter_ns()
+
+    def record_keystroke(self, event):
+        """
+        Timestamps a keystroke in the input entry and, with live validation, ends
+        the trial if the keystroke makes the response wrong.
+
+        The binding runs before the entry inserts the character, so the response
+        is rebuilt from the entry text and the insertion cursor.
+
+        Args:
+        - event: the tkinter key event
+
+        Returns:
+        - str or None: 'break' to keep the entry from inserting the character after an abort
+        """
+        self.keystrokes.append((event.char, time.perf_counter_ns() - self.prompt_ns))
+        if not (self.live_validation and event.char and event.char.isprintable()):
+            return None
+        text = self.input_entry.get()
+        cursor = self.input_entry.index('insert')
+        response = text[:cursor] + event.char + text[cursor:]
+        if self.engine.expected_response().startswith(response):
+            return None
+        self.submit_response(response, aborted=True)
+        return 'break'
 
     def validate_input(self, event):
-        user_input = self.input_entry.get()
-        correct_sequence = ''.join(self.sequence)
-        if not self.forward:
-            correct_sequence = correct_sequence[::-1]
-        if user_input == correct_sequence:
-            self.correct_attempts += 1
-        self.sequence_attempts += 1
+        self.submit_response(self.input_entry.get())
+
+    def submit_response(self, user_input, aborted=False):
+        """
+        Scores a response, logs the trial and moves on.
+
+        Args:
+        - user_input: the typed response
+        - aborted: whether the trial was ended at the first wrong keystroke (default False)
+        """
+        submitted_ns = time.perf_counter_ns() - self.prompt_ns
+        # Ignore further keys until the next prompt
+        self.input_entry.config(state='disabled')
+        self.canvas.focus_set()
+        if self.journal:
+            self.journal.log_trial(user_input, aborted)
+        self.engine.submit(user_input)
+        if self.trial_log:
+            trial = self.engine.trials[-1]
+            self.trial_log.log_trial(self.session_id, trial.forward, trial.sequence, trial.response, trial.correct,
+                                     trial.attempt, self.presented_ns, time.time_ns(),
+                                     self.keystrokes, submitted_ns, aborted)
         self.run_test()
 
     def show_backwards_notice(self):
-        self.canvas.delete('all')
-        self.canvas.create_text(self.width/2, self.height/2.3, fill='darkblue', font='Arial 26', text="Now, input the numbers backwards.")
-        self.master.after(3000, self.run_test)
+        if self.journal:
+            self.journal.sync()
+        self.show_screen('notice')
+        self.master.after(self.protocol.notice_ms, self.next_sequence)
 
     def end_test(self):
-        self.canvas.delete('all')
-        self.canvas.create_text(self.width/2, self.height/2.5, fill='darkblue', font='Arial 26', text=f"Test complete, {self.user_id}!")
-        
-        combined_score = self.max_forward_length + self.max_backward_length
-        combined_results = f"Combined Test Score: {combined_score}"
-        forward_results = f"Max Forward Length: {self.max_forward_length}"
-        backward_results = f"Max Backward Length: {self.max_backward_length}"
-        
-        self.canvas.create_text(self.width/2, self.height/2, fill='darkblue', font='Arial 22', text=forward_results)
-        self.canvas.create_text(self.width/2, self.height/1.8, fill='darkblue', font='Arial 22', text=backward_results)
-        self.canvas.create_text(self.width/2, self.height/1.6, fill='darkblue', font='Arial 22', text=combined_results)
-        
+        if self.trial_log:
+            self.master.after_idle(self.trial_log.flush)
+        self.canvas.itemconfig(self.result_title_item, text=f"Test complete, {self.user_id}!")
+
+        combined_score = self.engine.combined_score
+        self.canvas.itemconfig(self.forward_result_item, text=f"Max Forward Length: {self.engine.max_forward_length}")
+        self.canvas.itemconfig(self.backward_result_item, text=f"Max Backward Length: {self.engine.max_backward_length}")
+        self.canvas.itemconfig(self.combined_result_item, text=f"Combined Test Score: {combined_score}")
+
         if self.practice_mode:
-            self.canvas.create_text(self.width/2, self.height/1.3, fill='darkblue', font='Arial 26', text="Practice Complete!")
+            self.canvas.itemconfig(self.result_note_item, fill='darkblue', font='Arial 26', text="Practice Complete!")
             self.master.after(4000, self.start_intro)
         else:
-            with open(f"data/{self.user_id}_{self.test_type}_test.txt", "w") as f:
-                f.write(f"{self.max_forward_length},{self.max_backward_length},{combined_score}\n")
+            if self.journal:
+                self.journal.finish(self.engine.max_forward_length, self.engine.max_backward_length, combined_score)
+                self.journal = None
+            self.pending_result = Result(self.user_id, self.test_type, self.engine.max_forward_length,
+                                         self.engine.max_backward_length, combined_score, self.session_id)
+            self.result_writer.submit(self.pending_result)
+            self.canvas.itemconfig(self.result_note_item, fill='darkblue', font='Arial 22', text="Saving result...")
+            self.master.after(SAVE_POLL_MS, self.check_saved)
+        self.show_screen('results')
+
+    def check_saved(self):
+        """
+        Shows the outcome of saving the last result once the writer thread reports it.
+        """
+        for result, outcome in self.result_writer.poll():
+            if result != self.pending_result:
+                continue
+            self.pending_result = None
+            if outcome == SPOOLED:
+                self.canvas.itemconfig(self.result_note_item, fill='darkred', font='Arial 22',
+                                       text="The result storage is unreachable; the result was kept locally and will be saved later.")
+            elif outcome == FAILED:
+                self.canvas.itemconfig(self.result_note_item, fill='darkred', font='Arial 22',
+                                       text="The result could not be saved. Please note down the scores above.")
+            elif outcome == REJECTED:
+                self.canvas.itemconfig(self.result_note_item, fill='darkred', font='Arial 22',
+                                       text="The result was rejected as invalid and was not saved. Please note down the scores above.")
+            elif not outcome:
+                self.canvas.itemconfig(self.result_note_item, fill='darkred', font='Arial 22',
+                                       text=f"A {result.test_type}-test result for ID {result.user_id} already exists; this result was not saved.")
+            else:
+                self.canvas.itemconfig(self.result_note_item, text='')
+        if self.pending_result is not None:
+            self.master.after(SAVE_POLL_MS, self.check_saved)
+
+    def save_results(self, result):
+        """
+        Persists a result to the selected backend; runs on the result writer thread.
+
+        Args:
+        - result: the Result of a test
+
+        Returns:
+        - bool: False if the database already holds a result for this ID and test type
+        """
+        return save_result(result, self.store_path, self.db_path, self.collector)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Digit Span Test for Working Memory Evaluation")
+    backend = parser.add_mutually_exclusive_group()
+    backend.add_argument('--store', metavar='PATH', help="append results to a consolidated score store (e.g. data/scores.bin) instead of one text file per session")
+    backend.add_argument('--db', metavar='PATH', help="insert results into a shared SQLite database (e.g. data/scores.db) instead of one text file per session")
+    backend.add_argument('--collector', metavar='HOST:PORT', type=parse_address, help="submit results to a collector service (see collector.py) instead of one text file per session")
+    parser.add_argument('--trial-log', metavar='PATH', default='data/trials.bin', help="append every trial to this log (default data/trials.bin)")
+    parser.add_argument('--no-trial-log', dest='trial_log', action='store_const', const=None, help="disable the trial log")
+    parser.add_argument('--journal', metavar='DIR', default='data/journal', help="journal every test here so a crashed test can be resumed (default data/journal)")
+    parser.add_argument('--no-journal', dest='journal', action='store_const', const=None, help="disable session journaling")
+    parser.add_argument('--no-runs', action='store_true', help="never present ascending or descending runs of three digits")
+    parser.add_argument('--balanced-digits', action='store_true', help="balance digit frequencies within each sequence")
+    parser.add_argument('--start-length', type=int, default=DEFAULT_PROTOCOL.start_length, help="length of the first sequence (default %(default)s)")
+    parser.add_argument('--attempts', type=int, default=DEFAULT_PROTOCOL.attempts, help="sequences per length (default %(default)s)")
+    parser.add_argument('--digit-ms', type=int, default=DEFAULT_PROTOCOL.digit_ms, help="presentation time of one digit in ms (default %(default)s)")
+    parser.add_argument('--live-validation', action='store_true', help="end a trial at the first wrong keystroke instead of on Return")
+    parser.add_argument('--bayesian', action='store_true', help="choose sequence lengths adaptively from a posterior over the span instead of the staircase")
+    args = parser.parse_args()
+    protocol = DEFAULT_PROTOCOL._replace(start_length=args.start_length, attempts=args.attempts, digit_ms=args.digit_ms)
+
     root = tk.Tk()
-    app = DigitSpanTest(master=root)
-    root.mainloop()
\ No newline at end of file
+    app = DigitSpanTest(master=root, store_path=args.store, db_path=args.db, trial_log_path=args.trial_log,
+                        no_runs=args.no_runs, balanced_digits=args.balanced_digits, protocol=protocol,
+                        bayesian=args.bayesian, live_validation=args.live_validation, journal_dir=args.journal,
+                        collector=args.collector)
+    root.mainloop()
+    app.result_writer.close()
+    if app.journal:
+        app.journal.close()
+    if app.trial_log:
+        app.trial_log.flush()
\ No newline at end of file
@@ -0,0 +1,255 @@
+import os
+import json
+import time
+import queue
+import atexit
+import socket
+import threading
+from collections import namedtuple
+from score_store import append_score
+from score_db import insert_score
+from collector import submit_session, RejectedError
+
+# Results that could not reach their target are kept here until it is reachable again; the spool
+# is local to the station, never on the share holding the targets, so stations never replay each other's
+SPOOL_DIR = os.path.join(os.path.expanduser('~'), '.digit_span', 'spool', socket.gethostname())
+
+# Results waiting for the writer thread; a full queue spools on the caller's thread
+MAX_QUEUED = 64
+
+# Attempts per result, and the backoff before the second attempt (doubled after each failure)
+MAX_ATTEMPTS = 5
+INITIAL_BACKOFF = 0.25
+MAX_BACKOFF = 4.0
+
+# One session result as passed to the write function; session_id identifies resubmissions
+Result = namedtuple('Result', ['user_id', 'test_type', 'forward', 'backward', 'combined', 'session_id'],
+                    defaults=(None,))
+
+# Outcome of a result that ended up in the spool
+SPOOLED = 'spooled'
+
+# Outcome of a result that could neither be written nor spooled
+FAILED = 'failed'
+
+# Outcome of a result its target refused as invalid; retrying or spooling it cannot help
+REJECTED = 'rejected'
+
+_STOP = object()
+
+
+def spool_result(spool_dir, result):
+    """
+    Writes a result to the spool directory atomically.
+
+    Args:
+    - spool_dir (str): The spool directory.
+    - result (Result): The result.
+
+    Returns:
+    - str: The path of the spooled file.
+    """
+    os.makedirs(spool_dir, exist_ok=True)
+    path = os.path.join(spool_dir, f"{result.user_id}_{result.test_type}_{time.time_ns()}.json")
+    with open(path + '.tmp', 'w') as f:
+        json.dump(result._asdict(), f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def read_spool(spool_dir):
+    """
+    Lists the spooled results, oldest first.
+
+    Args:
+    - spool_dir (str): The spool directory.
+
+    Returns:
+    - list: (path, Result) pairs.
+    """
+    if not os.path.isdir(spool_dir):
+        return []
+    spooled = []
+    for name in sorted(os.listdir(spool_dir), key=lambda name: name.rsplit('_', 1)[-1]):
+        if not name.endswith('.json'):
+            continue
+        path = os.path.join(spool_dir, name)
+        with open(path) as f:
+            spooled.append((path, Result(**json.load(f))))
+    return spooled
+
+
+def save_result(result, store_path=None, db_path=None, collector=None, data_dir='data'):
+    """
+    Persists a result to one backend; without a backend it writes the per-session text file.
+
+    Args:
+    - result (Result): The result.
+    - store_path (str): The path of the consolidated score store (default None).
+    - db_path (str): The path of the SQLite score database (default None).
+    - collector (tuple): The (host, port) of a result collector (default None).
+    - data_dir (str): The directory of the per-session text files (default data).
+
+    Returns:
+    - bool: False if the database already holds a result for this ID and test type.
+
+    Raises:
+    - RejectedError: If the target refuses the result, e.g. a non-numeric ID for a backend keyed on numeric IDs.
+    """
+    if (collector or db_path or store_path) and not str(result.user_id).isdigit():
+        raise RejectedError(f"the ID must be numeric: {result.user_id!r}")
+    if collector:
+        # A resubmitted session is acknowledged as a duplicate; either way it is stored
+        submit_session(collector, result._asdict())
+        return True
+    if db_path:
+        return insert_score(db_path, result.user_id, result.test_type,
+                            result.forward, result.backward, result.combined)
+    if store_path:
+        append_score(store_path, result.user_id, result.test_type,
+                     result.forward, result.backward, result.combined)
+    else:
+        # The ID names the file, so it must not lead out of data_dir
+        if any(sep in str(result.user_id) for sep in (os.sep, os.altsep) if sep):
+            raise RejectedError(f"the ID cannot name a file: {result.user_id!r}")
+        with open(os.path.join(data_dir, f"{result.user_id}_{result.test_type}_test.txt"), "w") as f:
+            f.write(f"{result.forward},{result.backward},{result.combined}\n")
+    return True
+
+
+class ResultWriter:
+    """
+    Persists session results on a background thread so the GUI never waits on storage.
+
+    Every result is attempted up to MAX_ATTEMPTS times with exponential
+    backoff, unless the target refuses it with a RejectedError, which is final.
+    A result that still fails is spooled to a local directory, and
+    the spool is replayed whenever a write succeeds again and when the writer
+    starts. Outcomes are collected for the GUI thread to pick up with poll(),
+    since tkinter may only be called from the thread running mainloop.
+
+    Attributes:
+    - write: the function persisting one Result; its return value is the outcome
+    - spool_dir: the directory of results waiting for the target
+    - queue: the results waiting for the writer thread
+    - outcomes: (Result, outcome) pairs waiting to be polled; the outcome is SPOOLED if the
+      target was unreachable, FAILED if the result could not be spooled either, and REJECTED
+      if the target refused it
+    - thread: the writer thread
+    """
+    def __init__(self, write, spool_dir=SPOOL_DIR, max_queued=MAX_QUEUED, max_attempts=MAX_ATTEMPTS,
+                 initial_backoff=INITIAL_BACKOFF, max_backoff=MAX_BACKOFF):
+        """
+        Initializes the ResultWriter object and starts its thread.
+
+        Args:
+        - write: the function persisting one Result
+        - spool_dir: the spool directory (default SPOOL_DIR, local to the station)
+        - max_queued: the capacity of the queue (default 64)
+        - max_attempts: the attempts per result before it is spooled (default 5)
+        - initial_backoff: the wait before the second attempt in seconds (default 0.25)
+        - max_backoff: the longest wait between attempts in seconds (default 4)
+        """
+        self.write = write
+        self.spool_dir = spool_dir
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.queue = queue.Queue(max_queued)
+        self.outcomes = queue.Queue()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name='result-writer', daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def submit(self, result):
+        """
+        Queues a result without blocking; if the queue is full the result is spooled.
+
+        Args:
+        - result (Result): The result.
+        """
+        try:
+            self.queue.put_nowait(result)
+        except queue.Full:
+            self.outcomes.put((result, self._spool(result)))
+
+    def poll(self):
+        """
+        Returns the outcomes completed since the last poll.
+
+        Returns:
+        - list: (Result, outcome) pairs.
+        """
+        done = []
+        while True:
+            try:
+                done.append(self.outcomes.get_nowait())
+            except queue.Empty:
+                return done
+
+    def close(self, timeout=None):
+        """
+        Writes or spools everything still queued and stops the thread.
+
+        Args:
+        - timeout: the longest wait for the thread in seconds (default None, no limit)
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(_STOP)
+        self.thread.join(timeout)
+
+    def _attempt(self, result, max_attempts):
+        backoff = self.initial_backoff
+        for attempt in range(max_attempts):
+            try:
+                return True, self.write(result)
+            except RejectedError:
+                return True, REJECTED
+            except Exception:
+                if attempt + 1 < max_attempts:
+                    time.sleep(backoff)
+                    backoff = min(2 * backoff, self.max_backoff)
+        return False, None
+
+    def _spool(self, result):
+        # A spool that cannot be written must not take the writer down with it
+        try:
+            spool_result(self.spool_dir, result)
+            return SPOOLED
+        except OSError:
+            return FAILED
+
+    def _replay_spool(self):
+        try:
+            spooled = read_spool(self.spool_dir)
+        except (OSError, ValueError, TypeError):
+            return
+        for path, result in spooled:
+            # One attempt each; a target that is still down is retried after the next write
+            written, outcome = self._attempt(result, 1)
+            if not written:
+                return
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.outcomes.put((result, outcome))
+
+    def _run(self):
+        self._replay_spool()
+        while True:
+            result = self.queue.get()
+            if result is _STOP:
+                return
+            # While closing, fail fast to the spool instead of backing off
+            written, outcome = self._attempt(result, 1 if self.closed else self.max_attempts)
+            if written:
+                self.outcomes.put((result, outcome))
+                self._replay_spool()
+            else:
+                self.outcomes.put((result, self._spool(result)))
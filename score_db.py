@@ -0,0 +1,101 @@
+import sqlite3
+import time
+import urllib.parse
+import pandas as pd
+from score_loader import CATEGORIES, EXPOSURES, SCORE_COLUMNS
+
+# SQLite database written next to the per-session text files
+DB_FILENAME = 'scores.db'
+
+# How long a station waits for another station's write lock, in seconds
+BUSY_TIMEOUT = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER NOT NULL,
+    test_type TEXT NOT NULL CHECK (test_type IN ('pre', 'post')),
+    forward INTEGER NOT NULL,
+    backward INTEGER NOT NULL,
+    combined INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (id, test_type)
+)
+"""
+
+
+def connect(path):
+    """
+    Opens the score database in WAL mode, creating the schema if needed.
+
+    WAL lets the analysis scripts read while test stations write, and a
+    station only ever holds the write lock for a single-row insert.
+
+    Args:
+    - path (str): The database path.
+
+    Returns:
+    - sqlite3.Connection: The open connection.
+    """
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(SCHEMA)
+    return conn
+
+
+def insert_score(path, user_id, test_type, forward, backward, combined):
+    """
+    Inserts one session result.
+
+    An existing result for the same ID and test type is never overwritten, so
+    two stations reusing an ID cannot clobber each other.
+
+    Args:
+    - path (str): The database path.
+    - user_id (str or int): The participant ID; must be an integer.
+    - test_type (str): 'pre' or 'post'.
+    - forward (int): The max forward length.
+    - backward (int): The max backward length.
+    - combined (int): The combined score.
+
+    Returns:
+    - bool: True if the row was inserted, False if the ID already has a result of this type.
+    """
+    conn = connect(path)
+    try:
+        with conn:
+            conn.execute("INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?)",
+                         (int(user_id), test_type, forward, backward, combined, time.time()))
+        return True
+    except sqlite3.IntegrityError:
+        return False
+    finally:
+        conn.close()
+
+
+def read_db(path):
+    """
+    Loads the database into the long-format frame used by the analysis scripts.
+
+    The database is opened read-only and used as the stations left it, so
+    reading never takes a write lock or changes the journal mode.
+
+    Args:
+    - path (str): The database path.
+
+    Returns:
+    - pd.DataFrame: Columns id, category, exposure, forward, backward, combined.
+    """
+    conn = sqlite3.connect(f"file:{urllib.parse.quote(path)}?mode=ro", uri=True, timeout=BUSY_TIMEOUT)
+    try:
+        df = pd.read_sql_query("SELECT id, test_type, forward, backward, combined FROM sessions "
+                               "ORDER BY id, test_type = 'post'", conn)
+    finally:
+        conn.close()
+
+    df['id'] = df['id'].astype('int64')
+    df.insert(1, 'category', pd.Categorical.from_codes((df['id'] % 2 == 0).astype('int8'), categories=CATEGORIES))
+    df.insert(2, 'exposure', pd.Categorical(df.pop('test_type').str.capitalize(), categories=EXPOSURES))
+    for column in SCORE_COLUMNS:
+        df[column] = df[column].astype('int64')
+    return df
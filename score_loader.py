@@ -0,0 +1,187 @@
+import os
+import re
+import json
+import pandas as pd
+
+# Result files written by DigitSpanTest.end_test: "<id>_<pre|post>_test.txt"
+SCORE_FILE_PATTERN = re.compile(r'^(\d+)_(pre|post)_test\.txt$')
+
+# Name of the on-disk parse cache kept inside the data directory
+CACHE_FILENAME = '.score_cache.json'
+
+CATEGORIES = ['TikTok', 'Video']
+EXPOSURES = ['Pre', 'Post']
+SCORE_COLUMNS = ['forward', 'backward', 'combined']
+
+
+def get_category(participant_id):
+    """
+    Determines the category (TikTok or Video) from a participant ID.
+
+    Args:
+    - participant_id (int): The numeric participant ID.
+
+    Returns:
+    - str: 'TikTok' for odd IDs, 'Video' for even IDs.
+    """
+    return 'TikTok' if participant_id % 2 != 0 else 'Video'
+
+
+def parse_score_line(content):
+    """
+    Parses the "forward,backward,combined" line of a result file.
+
+    Args:
+    - content (str): The raw file content.
+
+    Returns:
+    - list or None: The three scores as ints, or None if the file is empty.
+    """
+    content = content.strip()
+    if not content:
+        return None
+    return [int(x) for x in content.split(',')]
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache(cache_path, cache):
+    tmp_path = cache_path + '.tmp'
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # The cache is an optimisation only; a read-only data folder is fine
+        pass
+
+
+def scores_frame(records):
+    """
+    Builds the typed long-format score DataFrame from (id, test_type, scores) records.
+
+    Args:
+    - records (iterable): Tuples of (participant_id, 'pre' or 'post', [forward, backward, combined]).
+
+    Returns:
+    - pd.DataFrame: Columns id, category, exposure, forward, backward, combined.
+    """
+    records = list(records)
+    ids = [r[0] for r in records]
+    df = pd.DataFrame({
+        'id': pd.Series(ids, dtype='int64'),
+        'category': pd.Categorical([get_category(i) for i in ids], categories=CATEGORIES),
+        'exposure': pd.Categorical([r[1].capitalize() for r in records], categories=EXPOSURES),
+    })
+    for idx, column in enumerate(SCORE_COLUMNS):
+        df[column] = pd.Series([r[2][idx] for r in records], dtype='int64')
+    return df.sort_values(['id', 'exposure'], ignore_index=True)
+
+
+def load_scores(data_dir='data', use_cache=True):
+    """
+    Loads every result file in the data directory into one long-format DataFrame.
+
+    The directory is scanned once with os.scandir. Parsed scores are cached in
+    data_dir/.score_cache.json keyed by file name, mtime and size, so a re-run
+    only opens files that are new or have changed since the last call. If the
+    directory also holds a consolidated store (score_store.py) or a SQLite
+    database (score_db.py) they are read in one bulk call each, and their
+    sessions take precedence over the text files.
+
+    Args:
+    - data_dir (str): The directory holding the <id>_<pre|post>_test.txt files.
+    - use_cache (bool): Whether to read and update the on-disk cache.
+
+    Returns:
+    - pd.DataFrame: Columns id, category, exposure, forward, backward, combined.
+    """
+    cache_path = os.path.join(data_dir, CACHE_FILENAME)
+    cache = _read_cache(cache_path) if use_cache else {}
+    fresh_cache = {}
+    records = []
+
+    with os.scandir(data_dir) as entries:
+        for entry in entries:
+            match = SCORE_FILE_PATTERN.match(entry.name)
+            if not match or not entry.is_file():
+                continue
+            stat = entry.stat()
+            key = [stat.st_mtime_ns, stat.st_size]
+            cached = cache.get(entry.name)
+            if cached is not None and cached[:2] == key:
+                scores = cached[2]
+            else:
+                with open(entry.path, 'r') as f:
+                    scores = parse_score_line(f.read())
+            fresh_cache[entry.name] = key + [scores]
+            if scores is not None:
+                records.append((int(match.group(1)), match.group(2), scores))
+
+    if use_cache and fresh_cache != cache:
+        _write_cache(cache_path, fresh_cache)
+
+    df = scores_frame(records)
+
+    # Imported here because score_store and score_db build on this module
+    from score_store import STORE_FILENAME, read_store
+    from score_db import DB_FILENAME, read_db
+    for filename, reader in [(STORE_FILENAME, read_store), (DB_FILENAME, read_db)]:
+        path = os.path.join(data_dir, filename)
+        if os.path.exists(path):
+            df = pd.concat([df, reader(path)], ignore_index=True)
+            df = df.drop_duplicates(['id', 'exposure'], keep='last')
+            df = df.sort_values(['id', 'exposure'], ignore_index=True)
+
+    return df
+
+
+def pair_scores(scores):
+    """
+    Pairs each participant's pre and post scores by ID with a single hash join.
+
+    Pairing is by participant ID rather than by file order, so participants are
+    never mis-paired. Records without a counterpart are returned separately
+    instead of being dropped silently.
+
+    Args:
+    - scores (pd.DataFrame): The long-format frame returned by load_scores.
+
+    Returns:
+    - pd.DataFrame: One row per paired participant with the columns of data/df_diff.csv.
+    - pd.DataFrame: The orphaned records (id, category, exposure) that have no counterpart.
+    """
+    value_columns = ['id', 'category'] + SCORE_COLUMNS
+    pre = scores.loc[scores['exposure'] == 'Pre', value_columns]
+    post = scores.loc[scores['exposure'] == 'Post', value_columns]
+
+    merged = pre.merge(post, on=['id', 'category'], how='outer', suffixes=('_pre', '_post'),
+                       indicator=True, validate='one_to_one')
+
+    orphan_mask = merged['_merge'] != 'both'
+    orphans = pd.DataFrame({
+        'id': merged.loc[orphan_mask, 'id'],
+        'category': merged.loc[orphan_mask, 'category'],
+        'exposure': pd.Categorical(merged.loc[orphan_mask, '_merge'].map({'left_only': 'Pre', 'right_only': 'Post'}),
+                                   categories=EXPOSURES),
+    }).reset_index(drop=True)
+
+    paired = merged.loc[~orphan_mask]
+    df_diff = pd.DataFrame({'id': paired['id']})
+    for column in SCORE_COLUMNS:
+        df_diff[f'{column.capitalize()}_pre'] = paired[f'{column}_pre'].astype('int64')
+    for column in SCORE_COLUMNS:
+        df_diff[f'{column.capitalize()}_post'] = paired[f'{column}_post'].astype('int64')
+    for column in SCORE_COLUMNS:
+        label = column.capitalize()
+        df_diff[f'{label} Difference'] = df_diff[f'{label}_post'] - df_diff[f'{label}_pre']
+    df_diff['Category'] = paired['category']
+
+    df_diff = df_diff.sort_values(['Category', 'id'], ignore_index=True)
+    return df_diff, orphans
@@ -0,0 +1,206 @@
+import os
+import sys
+import time
+import struct
+import tempfile
+import numpy as np
+import pandas as pd
+from score_loader import CATEGORIES, EXPOSURES, SCORE_COLUMNS, load_scores
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no flock; appenders there rely on the single O_APPEND write alone
+    fcntl = None
+
+# Consolidated store written next to the per-session text files
+STORE_FILENAME = 'scores.bin'
+
+# File header identifying the store format and its version
+STORE_MAGIC = b'RDSSCOR1'
+
+# One fixed-width little-endian record per session:
+# participant id, test type (0 = pre, 1 = post), forward, backward, combined, unix timestamp
+RECORD_STRUCT = struct.Struct('<qBBBBd')
+RECORD_DTYPE = np.dtype([('id', '<i8'), ('test_type', 'u1'), ('forward', 'u1'),
+                         ('backward', 'u1'), ('combined', 'u1'), ('timestamp', '<f8')])
+
+TEST_TYPE_CODES = {'pre': 0, 'post': 1}
+
+
+def store_path(data_dir='data'):
+    """
+    Returns the path of the consolidated store inside a data directory.
+
+    Args:
+    - data_dir (str): The data directory.
+
+    Returns:
+    - str: The store path.
+    """
+    return os.path.join(data_dir, STORE_FILENAME)
+
+
+def pack_record(user_id, test_type, forward, backward, combined, timestamp=None):
+    """
+    Packs one session result into a fixed-width store record.
+
+    Args:
+    - user_id (str or int): The participant ID; must be an integer.
+    - test_type (str): 'pre' or 'post'.
+    - forward (int): The max forward length.
+    - backward (int): The max backward length.
+    - combined (int): The combined score.
+    - timestamp (float): The unix time of the session (default now).
+
+    Returns:
+    - bytes: The packed record.
+    """
+    if timestamp is None:
+        timestamp = time.time()
+    return RECORD_STRUCT.pack(int(user_id), TEST_TYPE_CODES[test_type], forward, backward, combined, timestamp)
+
+
+def _create_store(path):
+    # Writes the header to a private file and links it into place; the link fails if another appender won
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path), suffix='.tmp')
+    try:
+        try:
+            os.write(fd, STORE_MAGIC)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            pass
+    finally:
+        os.remove(tmp)
+
+
+def append_records(path, records):
+    """
+    Appends packed records to the store, creating it if needed.
+
+    A new store is published with its header already written, so no reader
+    or appender ever sees it empty. Appenders hold an exclusive lock while
+    they write; a trailing partial record left by an interrupted append is
+    cut first, so the new records stay aligned. All records are written with
+    a single write on a file opened in append mode.
+
+    Args:
+    - path (str): The store path.
+    - records (list): Packed records as returned by pack_record.
+    """
+    if not os.path.exists(path):
+        _create_store(path)
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        payload = b''.join(records)
+        size = os.fstat(fd).st_size
+        if size < len(STORE_MAGIC):
+            # A store whose header was never completely written holds no records yet
+            end, payload = 0, STORE_MAGIC + payload
+        else:
+            end = len(STORE_MAGIC) + (size - len(STORE_MAGIC)) // RECORD_STRUCT.size * RECORD_STRUCT.size
+        if size > end:
+            os.ftruncate(fd, end)
+        os.write(fd, payload)
+    finally:
+        os.close(fd)
+
+
+def append_score(path, user_id, test_type, forward, backward, combined):
+    """
+    Appends one session result to the store.
+
+    Args:
+    - path (str): The store path.
+    - user_id (str or int): The participant ID; must be an integer.
+    - test_type (str): 'pre' or 'post'.
+    - forward (int): The max forward length.
+    - backward (int): The max backward length.
+    - combined (int): The combined score.
+    """
+    append_records(path, [pack_record(user_id, test_type, forward, backward, combined)])
+
+
+def read_records(path):
+    """
+    Reads all complete records of the store in one bulk call.
+
+    A trailing partial record left by an interrupted write is ignored.
+
+    Args:
+    - path (str): The store path.
+
+    Returns:
+    - np.ndarray: A structured array with RECORD_DTYPE.
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(STORE_MAGIC)) != STORE_MAGIC:
+            raise ValueError(f"{path} is not a score store")
+        count = (os.fstat(f.fileno()).st_size - len(STORE_MAGIC)) // RECORD_DTYPE.itemsize
+        return np.fromfile(f, dtype=RECORD_DTYPE, count=count)
+
+
+def read_store(path):
+    """
+    Loads the store into the long-format frame used by the analysis scripts.
+
+    When a participant has several sessions of the same test type, the most
+    recently written one is kept, matching the overwrite behaviour of the
+    text files.
+
+    Args:
+    - path (str): The store path.
+
+    Returns:
+    - pd.DataFrame: Columns id, category, exposure, forward, backward, combined.
+    """
+    records = read_records(path)
+    df = pd.DataFrame({
+        'id': records['id'].astype('int64'),
+        'category': pd.Categorical.from_codes((records['id'] % 2 == 0).astype('int8'), categories=CATEGORIES),
+        'exposure': pd.Categorical.from_codes(records['test_type'].astype('int8'), categories=EXPOSURES),
+    })
+    for column in SCORE_COLUMNS:
+        df[column] = records[column].astype('int64')
+    df = df.drop_duplicates(['id', 'exposure'], keep='last')
+    return df.sort_values(['id', 'exposure'], ignore_index=True)
+
+
+def migrate_text_files(data_dir='data', path=None):
+    """
+    Copies the existing <id>_<pre|post>_test.txt results into the store.
+
+    Sessions already present in the store are skipped, so the migration can
+    be re-run safely. The text files are left in place.
+
+    Args:
+    - data_dir (str): The directory holding the text files.
+    - path (str): The store path (default data_dir/scores.bin).
+
+    Returns:
+    - int: The number of sessions added to the store.
+    """
+    path = path or store_path(data_dir)
+    scores = load_scores(data_dir)
+    if os.path.exists(path):
+        existing = read_store(path)
+        known = set(zip(existing['id'], existing['exposure'].astype(str)))
+        scores = scores[[key not in known for key in zip(scores['id'], scores['exposure'].astype(str))]]
+
+    records = [pack_record(row.id, row.exposure.lower(), row.forward, row.backward, row.combined)
+               for row in scores.itertuples(index=False)]
+    if records:
+        append_records(path, records)
+    return len(records)
+
+
+if __name__ == "__main__":
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else 'data'
+    added = migrate_text_files(data_dir)
+    print(f"Migrated {added} sessions into {store_path(data_dir)}")
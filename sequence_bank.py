@@ -0,0 +1,191 @@
+import numpy as np
+
+# Longest sequence generated up front; longer ones are generated on demand
+MAX_SEQUENCE_LENGTH = 16
+
+# Protocol of DigitSpanTest.run_test
+START_LENGTH = 2
+ATTEMPTS_PER_LENGTH = 2
+
+
+def allowed_digits(sequences, pos, no_runs=False):
+    """
+    Returns which digits may be placed at a position of each sequence.
+
+    A digit may never repeat the previous digit. With no_runs, a digit may also
+    not extend an ascending or descending run (e.g. 3-4-5 or 7-6-5).
+
+    Args:
+    - sequences (np.ndarray): An (n, length) array whose columns before pos are filled.
+    - pos (int): The position to fill.
+    - no_runs (bool): Whether to forbid runs of three consecutive digits.
+
+    Returns:
+    - np.ndarray: An (n, 10) boolean mask of allowed digits.
+    """
+    n = sequences.shape[0]
+    allowed = np.ones((n, 10), dtype=bool)
+    rows = np.arange(n)
+    if pos >= 1:
+        allowed[rows, sequences[:, pos - 1]] = False
+    if no_runs and pos >= 2:
+        step = sequences[:, pos - 1].astype(np.int16) - sequences[:, pos - 2]
+        continuation = sequences[:, pos - 1] + step
+        in_run = (np.abs(step) == 1) & (continuation >= 0) & (continuation <= 9)
+        allowed[rows[in_run], continuation[in_run]] = False
+    return allowed
+
+
+def choose_digits(rng, weights):
+    """
+    Draws one digit per row from unnormalised weights, without rejection.
+
+    Args:
+    - rng (np.random.Generator): The random generator.
+    - weights (np.ndarray): An (n, 10) array of non-negative weights.
+
+    Returns:
+    - np.ndarray: The drawn digits as uint8.
+    """
+    cumulative = np.cumsum(weights, axis=1)
+    u = rng.random(weights.shape[0]) * cumulative[:, -1]
+    return (cumulative <= u[:, None]).sum(axis=1).astype(np.uint8)
+
+
+def balance_weights(counts):
+    """
+    Returns digit weights that favour digits used less often in each sequence so far.
+
+    Args:
+    - counts (np.ndarray): An (n, 10) array of how often each digit occurs in each sequence.
+
+    Returns:
+    - np.ndarray: An (n, 10) array of weights.
+    """
+    return 1.0 / (1.0 + counts - counts.min(axis=1, keepdims=True))
+
+
+def generate_sequences(rng, n, length, no_runs=False, balanced=False):
+    """
+    Generates n digit sequences of one length at once.
+
+    Each position is filled for all sequences in one vectorised step by drawing
+    directly from the allowed digits, so no sequence is ever rejected.
+
+    Args:
+    - rng (np.random.Generator): The random generator.
+    - n (int): The number of sequences.
+    - length (int): The length of each sequence.
+    - no_runs (bool): Whether to forbid ascending and descending runs of three digits.
+    - balanced (bool): Whether to balance digit frequencies within each sequence.
+
+    Returns:
+    - np.ndarray: An (n, length) uint8 array of digits.
+    """
+    sequences = np.empty((n, length), dtype=np.uint8)
+    counts = np.zeros((n, 10))
+    rows = np.arange(n)
+    for pos in range(length):
+        weights = allowed_digits(sequences, pos, no_runs).astype(np.float64)
+        if balanced:
+            weights *= balance_weights(counts)
+        sequences[:, pos] = choose_digits(rng, weights)
+        counts[rows, sequences[:, pos]] += 1
+    return sequences
+
+
+def avoid_repeats(rng, sequences, previous, no_runs=False):
+    """
+    Redraws the last digit of every sequence that equals its predecessor.
+
+    Args:
+    - rng (np.random.Generator): The random generator.
+    - sequences (np.ndarray): An (n, length) array, modified in place.
+    - previous (np.ndarray): An (n, length) array of the sequences presented just before.
+    - no_runs (bool): Whether to forbid ascending and descending runs of three digits.
+    """
+    repeats = np.nonzero((sequences == previous).all(axis=1))[0]
+    if repeats.size == 0:
+        return
+    last = sequences.shape[1] - 1
+    rows = sequences[repeats]
+    allowed = allowed_digits(rows, last, no_runs)
+    allowed[np.arange(repeats.size), rows[:, last]] = False
+    sequences[repeats, last] = choose_digits(rng, allowed.astype(np.float64))
+
+
+class SequenceBank:
+    """
+    The sequences of one session, generated up front from a recorded seed.
+
+    For every direction and length the bank holds one sequence per attempt, with
+    the same constraints as the original run_test: no digit repeats the digit
+    before it, and no sequence repeats the sequence presented just before it.
+
+    Attributes:
+    - seed: the seed the bank was generated from
+    - rng: the numpy Generator seeded with seed
+    - no_runs: whether ascending and descending runs of three digits are forbidden
+    - balanced: whether digit frequencies are balanced within each sequence
+    - start_length: the shortest sequence length of the session
+    - attempts: the number of sequences per direction and length
+    - sequences: the generated sequences keyed by (forward, length), each an (attempts, length) array
+    """
+    def __init__(self, seed=None, max_length=MAX_SEQUENCE_LENGTH, no_runs=False, balanced=False,
+                 start_length=START_LENGTH, attempts=ATTEMPTS_PER_LENGTH):
+        """
+        Initializes the SequenceBank object and generates all sequences up to max_length.
+
+        Args:
+        - seed: the session seed (default None, a fresh seed is drawn and recorded)
+        - max_length: the longest sequence to generate up front (default 16)
+        - no_runs: whether to forbid ascending and descending runs of three digits (default False)
+        - balanced: whether to balance digit frequencies within each sequence (default False)
+        - start_length: the shortest sequence length of the session (default 2)
+        - attempts: the number of sequences per direction and length (default 2)
+        """
+        self.seed = int(np.random.SeedSequence().entropy) if seed is None else int(seed)
+        self.rng = np.random.default_rng(self.seed)
+        self.no_runs = no_runs
+        self.balanced = balanced
+        self.start_length = start_length
+        self.attempts = attempts
+        self.sequences = {}
+        for length in range(start_length, max_length + 1):
+            self.generate_length(length)
+
+    def generate_length(self, length):
+        """
+        Generates the forward and backward sequences of one length.
+
+        Args:
+        - length: the sequence length
+        """
+        block = generate_sequences(self.rng, 2 * self.attempts, length, self.no_runs, self.balanced)
+        forward, backward = block[:self.attempts], block[self.attempts:]
+
+        if length == self.start_length:
+            # The backward test starts right after a forward failure at the start length
+            avoid_repeats(self.rng, backward[:1], forward[-1:], self.no_runs)
+        for attempts in (forward, backward):
+            for attempt in range(1, self.attempts):
+                avoid_repeats(self.rng, attempts[attempt:attempt + 1], attempts[attempt - 1:attempt], self.no_runs)
+
+        self.sequences[(True, length)] = forward
+        self.sequences[(False, length)] = backward
+
+    def get(self, forward, length, attempt):
+        """
+        Returns the sequence for a trial.
+
+        Args:
+        - forward: whether the trial is a forward trial
+        - length: the sequence length
+        - attempt: the attempt index at this length
+
+        Returns:
+        - list: the digits as strings
+        """
+        if (forward, length) not in self.sequences:
+            self.generate_length(length)
+        return [str(digit) for digit in self.sequences[(forward, length)][attempt]]
@@ -0,0 +1,292 @@
+import os
+import sys
+import json
+import time
+import pandas as pd
+from sequence_bank import SequenceBank
+from span_engine import DigitSpanEngine, FakeClock, Protocol
+from bayesian_span import BayesianSpanEngine, MAX_TRIALS
+
+# Journals of the sessions of a station; a journal is renamed with DONE_SUFFIX once its session ends
+JOURNAL_DIR = 'data/journal'
+JOURNAL_SUFFIX = '.journal'
+DONE_SUFFIX = '.done'
+
+# Records appended before the journal is fsynced as one group
+DEFAULT_SYNC_EVERY = 8
+
+
+def make_engine(practice_mode, seed, protocol, no_runs=False, balanced=False, bayesian=False, clock=None):
+    """
+    Builds the engine of a session from everything that determines its sequences.
+
+    Args:
+    - practice_mode (bool): Whether the session is a practice session.
+    - seed (int): The seed of the sequence bank, or None for a fresh one.
+    - protocol (Protocol): The procedure constants.
+    - no_runs (bool): Whether runs of three digits are forbidden.
+    - balanced (bool): Whether digit frequencies are balanced within each sequence.
+    - bayesian (bool): Whether to use the BayesianSpanEngine instead of the staircase.
+    - clock (callable): The engine's clock (default None, the engine's default).
+
+    Returns:
+    - DigitSpanEngine or BayesianSpanEngine: The fresh engine.
+    """
+    engine_class = BayesianSpanEngine if bayesian else DigitSpanEngine
+    # The Bayesian engine may present one length up to MAX_TRIALS times
+    attempts = MAX_TRIALS if bayesian else protocol.attempts
+    sequence_bank = SequenceBank(seed, no_runs=no_runs, balanced=balanced,
+                                 start_length=protocol.start_length, attempts=attempts)
+    kwargs = {} if clock is None else {'clock': clock}
+    return engine_class(practice_mode, sequence_bank, protocol=protocol, **kwargs)
+
+
+def journal_path(journal_dir, user_id, test_type):
+    """
+    Returns the path of the open journal of a participant's test.
+
+    Args:
+    - journal_dir (str): The journal directory.
+    - user_id (str): The participant ID.
+    - test_type (str): 'pre' or 'post'.
+
+    Returns:
+    - str: The journal path.
+    """
+    return os.path.join(journal_dir, f"{user_id}_{test_type}{JOURNAL_SUFFIX}")
+
+
+def _read_complete(path):
+    # The records of a journal and the length of the file up to the end of the last complete one
+    records, end = [], 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+            end += len(line)
+    return records, end
+
+
+def read_journal(path):
+    """
+    Reads the records of a journal.
+
+    A last line torn by a crash is ignored; everything before it was written
+    whole because each record is a single append.
+
+    Args:
+    - path (str): The journal path.
+
+    Returns:
+    - list: The records as dicts, the 'start' record first.
+    """
+    return _read_complete(path)[0]
+
+
+def replay(records):
+    """
+    Rebuilds a session's engine by feeding the journaled responses to a fresh engine.
+
+    The engine and its sequence bank are deterministic given the start record,
+    so the rebuilt engine is in exactly the state it was in after the last
+    journaled trial and presents the same next sequence.
+
+    Args:
+    - records (list): The records of one journal.
+
+    Returns:
+    - DigitSpanEngine or BayesianSpanEngine: The engine after the last journaled trial.
+    """
+    start = records[0]
+    engine = make_engine(start['practice'], start['seed'], Protocol(**start['protocol']), start['no_runs'],
+                         start['balanced'], start['bayesian'], clock=FakeClock())
+    for record in records[1:]:
+        if record['type'] != 'trial':
+            continue
+        engine.next_stimulus()
+        engine.submit(record['response'])
+    return engine
+
+
+class SessionJournal:
+    """
+    A write-ahead journal of one session.
+
+    Every record is written with a single O_APPEND write as soon as it is
+    logged, so it survives a crash of the app. Records are fsynced in groups,
+    every sync_every records and at the start and end of the session, so a
+    power loss costs at most the last group.
+
+    Attributes:
+    - path: the journal path
+    - sync_every: the number of records per fsync
+    - pending: the number of records written since the last fsync
+    - records: the records of the session, including those of a resumed run
+    """
+    def __init__(self, path, sync_every=DEFAULT_SYNC_EVERY):
+        """
+        Opens a journal for appending, cutting a record torn by a crash.
+
+        Args:
+        - path: the journal path
+        - sync_every: the number of records per fsync (default 8)
+        """
+        self.path = path
+        self.sync_every = sync_every
+        self.pending = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self.records, end = _read_complete(path)
+        # Cut a torn last record, or the records appended after it would be joined onto it and lost
+        if os.fstat(self.fd).st_size > end:
+            os.ftruncate(self.fd, end)
+            os.fsync(self.fd)
+
+    @classmethod
+    def start(cls, journal_dir, user_id, test_type, session_id, seed, protocol, no_runs=False, balanced=False,
+              bayesian=False, sync_every=DEFAULT_SYNC_EVERY):
+        """
+        Starts the journal of a new session, replacing an unfinished one of the same test.
+
+        Args:
+        - journal_dir: the journal directory
+        - user_id: the participant ID
+        - test_type: 'pre' or 'post'
+        - session_id: the id of the session, as in the trial log
+        - seed: the seed of the session's sequence bank
+        - protocol: the Protocol of the session
+        - no_runs: whether runs of three digits are forbidden (default False)
+        - balanced: whether digit frequencies are balanced (default False)
+        - bayesian: whether the session uses the BayesianSpanEngine (default False)
+        - sync_every: the number of records per fsync (default 8)
+
+        Returns:
+        - SessionJournal: the journal
+        """
+        path = journal_path(journal_dir, user_id, test_type)
+        if os.path.exists(path):
+            os.remove(path)
+        journal = cls(path, sync_every)
+        journal.log({'type': 'start', 'user_id': user_id, 'test_type': test_type, 'practice': False,
+                     'session_id': session_id, 'seed': seed, 'protocol': protocol._asdict(),
+                     'no_runs': no_runs, 'balanced': balanced, 'bayesian': bayesian, 'time_ns': time.time_ns()})
+        journal.sync()
+        return journal
+
+    @classmethod
+    def resume(cls, journal_dir, user_id, test_type, sync_every=DEFAULT_SYNC_EVERY):
+        """
+        Opens the unfinished journal of a participant's test, if there is one.
+
+        Args:
+        - journal_dir: the journal directory
+        - user_id: the participant ID
+        - test_type: 'pre' or 'post'
+        - sync_every: the number of records per fsync (default 8)
+
+        Returns:
+        - SessionJournal or None: the journal, or None if there is nothing to resume
+        """
+        path = journal_path(journal_dir, user_id, test_type)
+        if not os.path.exists(path):
+            return None
+        journal = cls(path, sync_every)
+        if not journal.records or journal.records[0]['type'] != 'start':
+            journal.close()
+            return None
+        return journal
+
+    @property
+    def start_record(self):
+        return self.records[0]
+
+    def log(self, record):
+        """
+        Appends a record, fsyncing once a group is complete.
+
+        Args:
+        - record: a JSON-serialisable dict with a 'type' key
+        """
+        os.write(self.fd, (json.dumps(record, separators=(',', ':')) + '\n').encode())
+        self.records.append(record)
+        self.pending += 1
+        if self.pending >= self.sync_every:
+            self.sync()
+
+    def log_trial(self, response, aborted=False):
+        """
+        Appends the response to the current trial.
+
+        Args:
+        - response: the typed response
+        - aborted: whether the trial was ended at the first wrong keystroke (default False)
+        """
+        self.log({'type': 'trial', 'response': response, 'aborted': aborted})
+
+    def sync(self):
+        """
+        Forces the records written so far to disk.
+        """
+        if self.pending:
+            os.fsync(self.fd)
+            self.pending = 0
+
+    def finish(self, forward, backward, combined):
+        """
+        Appends the final scores and retires the journal so it is not resumed.
+
+        Args:
+        - forward: the max forward length
+        - backward: the max backward length
+        - combined: the combined score
+        """
+        self.log({'type': 'end', 'forward': forward, 'backward': backward, 'combined': combined})
+        self.close()
+        os.replace(self.path, f"{self.path[:-len(JOURNAL_SUFFIX)]}_{self.start_record['session_id']}{JOURNAL_SUFFIX}{DONE_SUFFIX}")
+
+    def close(self):
+        """
+        Syncs and closes the journal file.
+        """
+        if self.fd is None:
+            return
+        self.sync()
+        os.close(self.fd)
+        self.fd = None
+
+
+def replay_journals(journal_dir=JOURNAL_DIR):
+    """
+    Reconstructs the scores of every journaled session by replaying its trials.
+
+    Args:
+    - journal_dir (str): The journal directory.
+
+    Returns:
+    - pd.DataFrame: Per session the user ID, test type, session id, number of trials, whether it
+      finished, the replayed forward, backward and combined scores, and whether they match the
+      scores journaled at the end (None for unfinished sessions).
+    """
+    rows = []
+    for name in sorted(os.listdir(journal_dir)):
+        if not (name.endswith(JOURNAL_SUFFIX) or name.endswith(JOURNAL_SUFFIX + DONE_SUFFIX)):
+            continue
+        records = read_journal(os.path.join(journal_dir, name))
+        if not records or records[0]['type'] != 'start':
+            continue
+        engine = replay(records)
+        end = records[-1] if records[-1]['type'] == 'end' else None
+        rows.append({'user_id': records[0]['user_id'], 'test_type': records[0]['test_type'],
+                     'session_id': records[0]['session_id'], 'trials': len(engine.trials),
+                     'finished': engine.finished, 'forward': engine.max_forward_length,
+                     'backward': engine.max_backward_length, 'combined': engine.combined_score,
+                     'matches': None if end is None else end['combined'] == engine.combined_score})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    print(replay_journals(sys.argv[1] if len(sys.argv) > 1 else JOURNAL_DIR).to_string(index=False))
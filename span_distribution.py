@@ -0,0 +1,114 @@
+from collections import namedtuple
+import numpy as np
+from span_engine import DEFAULT_PROTOCOL
+
+# Exact score distribution; pmfs are indexed by score value, one row per recall curve
+ScoreDistribution = namedtuple('ScoreDistribution', ['forward', 'backward', 'combined', 'expected_trials'])
+
+
+def level_reach(curves, practice_mode=False, protocol=DEFAULT_PROTOCOL):
+    """
+    Computes the probability of reaching and of passing every length of one direction.
+
+    Each direction is an absorbing Markov chain over lengths: from length k the
+    chain moves to k + 1 with the probability of passing k, i.e. of at least one
+    of protocol.attempts attempts being correct, and is absorbed otherwise. The
+    chain is also absorbed after the longest modelled length, or in practice
+    mode after protocol.practice_max_length. The absorption probabilities
+    follow in closed form from cumulative products of the pass probabilities.
+
+    Args:
+    - curves (array-like): An (m, max_length + 1) or (max_length + 1,) array of recall
+      probabilities by length.
+    - practice_mode (bool): Whether to stop after protocol.practice_max_length.
+    - protocol (Protocol): The procedure constants.
+
+    Returns:
+    - np.ndarray: The attempted lengths, from protocol.start_length up.
+    - np.ndarray: An (m, levels + 1) array; column k is the probability of attempting the
+      k-th length, the last column the probability of passing them all.
+    - np.ndarray: An (m, levels) array of the probability of passing each length once reached.
+    """
+    curves = np.atleast_2d(np.asarray(curves, dtype=np.float64))
+    max_length = curves.shape[1] - 1
+    if practice_mode:
+        max_length = min(max_length, protocol.practice_max_length)
+
+    lengths = np.arange(protocol.start_length, max_length + 1)
+    passes = 1.0 - (1.0 - curves[:, lengths]) ** protocol.attempts
+    reach = np.ones((curves.shape[0], lengths.size + 1))
+    reach[:, 1:] = np.cumprod(passes, axis=1)
+    return lengths, reach, passes
+
+
+def direction_distribution(curves, practice_mode=False, protocol=DEFAULT_PROTOCOL):
+    """
+    Computes the exact distribution of one direction of the staircase.
+
+    Args:
+    - curves (array-like): An (m, max_length + 1) or (max_length + 1,) array of recall
+      probabilities by length.
+    - practice_mode (bool): Whether to stop after protocol.practice_max_length.
+    - protocol (Protocol): The procedure constants.
+
+    Returns:
+    - np.ndarray: An (m, max_length + 1) pmf of the longest length passed.
+    - np.ndarray: The expected number of trials per curve.
+    """
+    curves = np.atleast_2d(np.asarray(curves, dtype=np.float64))
+    lengths, reach, passes = level_reach(curves, practice_mode, protocol)
+    fail_at = reach[:, :-1] * (1.0 - passes)
+
+    # Failing the first length scores 0, failing any later one scores the length before it
+    pmf = np.zeros(curves.shape)
+    pmf[:, 0] = fail_at[:, 0]
+    pmf[:, lengths[:-1]] += fail_at[:, 1:]
+    pmf[:, lengths[-1]] += reach[:, -1]
+
+    # Every attempted length costs protocol.attempts trials
+    expected_trials = protocol.attempts * reach[:, :-1].sum(axis=1)
+    return pmf, expected_trials
+
+
+def score_distribution(forward_curves, backward_curves=None, practice_mode=False, protocol=DEFAULT_PROTOCOL):
+    """
+    Computes the exact pmfs of the forward, backward and combined scores.
+
+    The two directions are independent, so the combined pmf is the convolution
+    of the forward and backward pmfs. All curves are processed at once.
+
+    Args:
+    - forward_curves (array-like): An (m, max_length + 1) or (max_length + 1,) array of
+      forward recall probabilities by length.
+    - backward_curves (array-like): The same for backward trials (default the forward curves).
+    - practice_mode (bool): Whether to model the shorter practice procedure.
+    - protocol (Protocol): The procedure constants (default DEFAULT_PROTOCOL).
+
+    Returns:
+    - ScoreDistribution: forward and backward pmfs of shape (m, max_length + 1), the combined
+      pmf of shape (m, 2 * max_length + 1) and the expected number of trials per curve.
+    """
+    if backward_curves is None:
+        backward_curves = forward_curves
+    forward, forward_trials = direction_distribution(forward_curves, practice_mode, protocol)
+    backward, backward_trials = direction_distribution(backward_curves, practice_mode, protocol)
+    forward, backward = np.broadcast_arrays(forward, backward)
+
+    m, width = forward.shape
+    combined = np.zeros((m, 2 * width - 1))
+    for score in range(width):
+        combined[:, score:score + width] += forward[:, score, None] * backward
+    return ScoreDistribution(forward, backward, combined, forward_trials + backward_trials)
+
+
+def expected_score(pmf):
+    """
+    Returns the mean of a score pmf.
+
+    Args:
+    - pmf (np.ndarray): An (m, k) array of pmfs indexed by score value.
+
+    Returns:
+    - np.ndarray: The mean score per row.
+    """
+    return pmf @ np.arange(pmf.shape[-1])
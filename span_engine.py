@@ -0,0 +1,187 @@
+import time
+from collections import namedtuple
+from sequence_bank import SequenceBank, START_LENGTH, ATTEMPTS_PER_LENGTH
+
+# Practice stops once a direction has passed this length
+PRACTICE_MAX_LENGTH = 3
+
+# Presentation time of one digit and of the backwards notice
+DIGIT_DURATION_MS = 1000
+NOTICE_DURATION_MS = 3000
+
+# The constants of the procedure; DEFAULT_PROTOCOL is the one used in the study
+Protocol = namedtuple('Protocol', ['start_length', 'attempts', 'practice_max_length', 'digit_ms', 'notice_ms'])
+DEFAULT_PROTOCOL = Protocol(START_LENGTH, ATTEMPTS_PER_LENGTH, PRACTICE_MAX_LENGTH, DIGIT_DURATION_MS, NOTICE_DURATION_MS)
+
+# One completed trial; times are in ns on the engine's clock
+Trial = namedtuple('Trial', ['forward', 'length', 'attempt', 'sequence', 'response', 'correct',
+                             'presented_ns', 'responded_ns'])
+
+
+class FakeClock:
+    """
+    A manually advanced clock for driving DigitSpanEngine in tests.
+
+    Attributes:
+    - now_ns: the current time in ns
+    """
+    def __init__(self, start_ns=0):
+        """
+        Initializes the FakeClock object.
+
+        Args:
+        - start_ns: the initial time in ns (default 0)
+        """
+        self.now_ns = start_ns
+
+    def __call__(self):
+        return self.now_ns
+
+    def advance(self, ms):
+        """
+        Moves the clock forward.
+
+        Args:
+        - ms: the number of milliseconds to advance
+        """
+        self.now_ns += int(ms * 1_000_000)
+
+
+class DigitSpanEngine:
+    """
+    The adaptive forward/backward digit span procedure, without any display.
+
+    Each length is presented protocol.attempts times (twice by default). If at
+    least one attempt is correct the length increases by one, otherwise the
+    forward test switches to backward at the start length, and the backward
+    test ends. In practice mode each direction also stops after passing
+    protocol.practice_max_length.
+
+    Attributes:
+    - protocol: the Protocol of the procedure
+    - practice_mode: whether the procedure stops after protocol.practice_max_length
+    - sequence_bank: the source of sequences, anything with get(forward, length, attempt)
+    - clock: a function returning monotonic time in ns
+    - forward: whether the current trial is a forward trial
+    - sequence_length: the length of the current sequence
+    - sequence_attempts: the number of attempts made at the current length
+    - correct_attempts: the number of correct attempts at the current length
+    - max_forward_length: the longest forward length passed
+    - max_backward_length: the longest backward length passed
+    - sequence: the sequence of the current trial
+    - notice_pending: whether the procedure has just switched to backward
+    - finished: whether the procedure has ended
+    - trials: the completed Trial records
+    """
+    def __init__(self, practice_mode=False, sequence_bank=None, clock=time.perf_counter_ns, protocol=DEFAULT_PROTOCOL):
+        """
+        Initializes the DigitSpanEngine object.
+
+        Args:
+        - practice_mode: whether to stop after protocol.practice_max_length (default False)
+        - sequence_bank: the source of sequences (default None, a freshly seeded SequenceBank)
+        - clock: a function returning monotonic time in ns (default time.perf_counter_ns)
+        - protocol: the Protocol of the procedure (default DEFAULT_PROTOCOL)
+        """
+        self.protocol = protocol
+        self.practice_mode = practice_mode
+        if sequence_bank is None:
+            sequence_bank = SequenceBank(start_length=protocol.start_length, attempts=protocol.attempts)
+        self.sequence_bank = sequence_bank
+        self.clock = clock
+        self.forward = True
+        self.sequence_length = protocol.start_length
+        self.sequence_attempts = 0
+        self.correct_attempts = 0
+        self.max_forward_length = 0
+        self.max_backward_length = 0
+        self.sequence = None
+        self.notice_pending = False
+        self.finished = False
+        self.trials = []
+
+    @property
+    def combined_score(self):
+        return self.max_forward_length + self.max_backward_length
+
+    def expected_response(self):
+        """
+        Returns the correct response to the current sequence.
+
+        Returns:
+        - str: the digits in order for forward trials, reversed for backward trials
+        """
+        expected = ''.join(self.sequence)
+        return expected if self.forward else expected[::-1]
+
+    def next_stimulus(self):
+        """
+        Returns the sequence of the next trial, clearing a pending backwards notice.
+
+        Returns:
+        - list or None: the digits as strings, or None once the procedure has ended
+        """
+        if self.finished:
+            return None
+        self.notice_pending = False
+        self.sequence = self.sequence_bank.get(self.forward, self.sequence_length, self.sequence_attempts)
+        self.presented_ns = self.clock()
+        return self.sequence
+
+    def submit(self, response):
+        """
+        Scores the response to the current trial and advances the procedure.
+
+        Args:
+        - response: the typed response
+
+        Returns:
+        - bool: whether the response was correct
+        """
+        correct = response == self.expected_response()
+        self.trials.append(Trial(self.forward, self.sequence_length, self.sequence_attempts, self.sequence,
+                                 response, correct, self.presented_ns, self.clock()))
+        if correct:
+            self.correct_attempts += 1
+        self.sequence_attempts += 1
+        if self.sequence_attempts >= self.protocol.attempts:
+            self._finish_length()
+        return correct
+
+    def _finish_length(self):
+        passed = self.correct_attempts >= 1
+        if passed:
+            if self.forward:
+                self.max_forward_length = max(self.max_forward_length, self.sequence_length)
+            else:
+                self.max_backward_length = max(self.max_backward_length, self.sequence_length)
+        self.correct_attempts = 0
+        self.sequence_attempts = 0
+        self.sequence_length += 1
+
+        if passed and not (self.practice_mode and self.sequence_length > self.protocol.practice_max_length):
+            return
+        if self.forward:
+            self.forward = False
+            self.sequence_length = self.protocol.start_length
+            self.notice_pending = True
+        else:
+            self.finished = True
+
+
+def run_session(engine, respond):
+    """
+    Runs a whole session headlessly.
+
+    Args:
+    - engine: a fresh DigitSpanEngine
+    - respond: a function (sequence, forward) -> response string
+
+    Returns:
+    - DigitSpanEngine: the finished engine
+    """
+    sequence = engine.next_stimulus()
+    while sequence is not None:
+        engine.submit(respond(sequence, engine.forward))
+        sequence = engine.next_stimulus()
+    return engine
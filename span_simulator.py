@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+from multiprocessing import Pool
+from sequence_bank import MAX_SEQUENCE_LENGTH
+from span_engine import DEFAULT_PROTOCOL
+
+# Simulated participants processed per vectorised batch
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+class LogisticRecallModel:
+    """
+    A per-length recall probability model for virtual participants.
+
+    Each participant gets a span drawn from a normal distribution, and recalls a
+    sequence of a given length with probability 1 / (1 + exp(slope * (length - span))),
+    i.e. with probability 0.5 at their span.
+
+    Attributes:
+    - span_mean: the mean span of the population
+    - span_sd: the standard deviation of spans in the population
+    - slope: how sharply recall drops around the span
+    - max_length: the longest sequence length modelled
+    """
+    def __init__(self, span_mean, span_sd=0.0, slope=2.0, max_length=MAX_SEQUENCE_LENGTH):
+        """
+        Initializes the LogisticRecallModel object.
+
+        Args:
+        - span_mean: the mean span of the population
+        - span_sd: the standard deviation of spans in the population (default 0, everyone identical)
+        - slope: how sharply recall drops around the span (default 2)
+        - max_length: the longest sequence length modelled (default 16)
+        """
+        self.span_mean = span_mean
+        self.span_sd = span_sd
+        self.slope = slope
+        self.max_length = max_length
+
+    def __call__(self, rng, size):
+        """
+        Draws the recall probability curves of a batch of participants.
+
+        Args:
+        - rng: the numpy Generator
+        - size: the number of participants
+
+        Returns:
+        - np.ndarray: A (size, max_length + 1) array; column k is the probability of recalling length k.
+        """
+        spans = rng.normal(self.span_mean, self.span_sd, size) if self.span_sd > 0 else np.full(size, float(self.span_mean))
+        lengths = np.arange(self.max_length + 1)
+        return 1.0 / (1.0 + np.exp(self.slope * (lengths[None, :] - spans[:, None])))
+
+
+def _recall_curves(model, rng, size):
+    if callable(model):
+        return model(rng, size)
+    curves = np.asarray(model, dtype=np.float64)
+    return np.broadcast_to(curves, (size, curves.shape[-1]))
+
+
+def simulate_direction(rng, curves, practice_mode=False, protocol=DEFAULT_PROTOCOL):
+    """
+    Simulates one direction of the staircase for many participants at once.
+
+    Every length from protocol.start_length up is attempted protocol.attempts
+    times and passed if at least one attempt is correct. A participant's run
+    ends at the first failed length, after the longest modelled length, or in
+    practice mode after passing protocol.practice_max_length.
+
+    Args:
+    - rng (np.random.Generator): The random generator.
+    - curves (np.ndarray): An (n, max_length + 1) array of recall probabilities by length.
+    - practice_mode (bool): Whether to stop after protocol.practice_max_length.
+    - protocol (Protocol): The procedure constants.
+
+    Returns:
+    - np.ndarray: The longest length passed per participant (0 if none).
+    - np.ndarray: The number of trials presented per participant.
+    """
+    max_length = curves.shape[1] - 1
+    if practice_mode:
+        max_length = min(max_length, protocol.practice_max_length)
+    probs = curves[:, protocol.start_length:max_length + 1]
+    n, levels = probs.shape
+
+    correct = rng.random((n, levels, protocol.attempts)) < probs[:, :, None]
+    passed = correct.any(axis=2)
+
+    # Index of the first failed level, or levels if every level was passed
+    failed = ~passed
+    first_fail = np.where(failed.any(axis=1), failed.argmax(axis=1), levels)
+
+    max_passed = np.where(first_fail > 0, protocol.start_length + first_fail - 1, 0)
+    trials = protocol.attempts * np.minimum(first_fail + 1, levels)
+    return max_passed, trials
+
+
+def _simulate_chunk(args):
+    seed, size, forward_model, backward_model, practice_mode, protocol = args
+    rng = np.random.default_rng(seed)
+    forward, forward_trials = simulate_direction(rng, _recall_curves(forward_model, rng, size), practice_mode, protocol)
+    backward, backward_trials = simulate_direction(rng, _recall_curves(backward_model, rng, size), practice_mode, protocol)
+    return forward, backward, forward_trials + backward_trials
+
+
+def simulate_sessions(n, forward_model, backward_model=None, practice_mode=False, seed=None,
+                      chunk_size=DEFAULT_CHUNK_SIZE, processes=1, protocol=DEFAULT_PROTOCOL):
+    """
+    Simulates n virtual participants under the DigitSpanTest procedure.
+
+    A model is either a fixed probability curve indexed by length (shape
+    (max_length + 1,)), a per-participant array of curves (shape
+    (n, max_length + 1)), or a callable like LogisticRecallModel that draws
+    curves for a batch of participants.
+
+    Args:
+    - n (int): The number of sessions.
+    - forward_model: The recall model for forward trials.
+    - backward_model: The recall model for backward trials (default the forward model).
+    - practice_mode (bool): Whether to simulate the shorter practice procedure.
+    - seed (int): The seed of the simulation (default None, fresh entropy).
+    - chunk_size (int): The number of participants simulated per vectorised batch.
+    - processes (int): The number of worker processes (default 1, in-process).
+    - protocol (Protocol): The procedure constants (default DEFAULT_PROTOCOL).
+
+    Returns:
+    - pd.DataFrame: Per session the forward, backward and combined scores and the number of trials.
+    """
+    if backward_model is None:
+        backward_model = forward_model
+
+    starts = list(range(0, n, chunk_size))
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    jobs = []
+    for start, chunk_seed in zip(starts, seeds):
+        stop = min(start + chunk_size, n)
+        forward_chunk, backward_chunk = forward_model, backward_model
+        # Per-participant curves are split along with the participants
+        if not callable(forward_model) and np.ndim(forward_model) == 2:
+            forward_chunk = forward_model[start:stop]
+        if not callable(backward_model) and np.ndim(backward_model) == 2:
+            backward_chunk = backward_model[start:stop]
+        jobs.append((chunk_seed, stop - start, forward_chunk, backward_chunk, practice_mode, protocol))
+
+    if processes > 1:
+        with Pool(processes) as pool:
+            results = pool.map(_simulate_chunk, jobs)
+    else:
+        results = [_simulate_chunk(job) for job in jobs]
+
+    forward = np.concatenate([r[0] for r in results])
+    backward = np.concatenate([r[1] for r in results])
+    trials = np.concatenate([r[2] for r in results])
+    return pd.DataFrame({'forward': forward, 'backward': backward,
+                         'combined': forward + backward, 'trials': trials})
@@ -0,0 +1,123 @@
+import time
+import numpy as np
+
+# An event firing earlier than this before its target is re-armed instead of run
+EARLY_TOLERANCE_NS = 500_000
+
+
+class StimulusScheduler:
+    """
+    Presents a timed series of stimulus events on the Tk event loop.
+
+    Every event is scheduled against its absolute target on a monotonic clock
+    rather than chained as fixed delays, so event-loop lag on one event does not
+    push back the ones after it. The scheduler records when each event was
+    actually shown.
+
+    Attributes:
+    - master: the tkinter master window
+    - clock: a function returning monotonic time in ns
+    - events: the (offset_ms, callback, *args) tuples of the current run
+    - start_ns: the clock time at which the current run started
+    - targets: the target time of each fired event, in ns relative to start_ns
+    - onsets: the actual time of each fired event, in ns relative to start_ns
+    - render_ns: the time each event took from firing until its redraw was flushed, in ns
+    """
+    def __init__(self, master, clock=time.perf_counter_ns):
+        """
+        Initializes the StimulusScheduler object.
+
+        Args:
+        - master: the tkinter master window
+        - clock: a function returning monotonic time in ns (default time.perf_counter_ns)
+        """
+        self.master = master
+        self.clock = clock
+        self.events = []
+        self.targets = []
+        self.onsets = []
+        self.render_ns = []
+        self.pending = None
+
+    def run(self, events, on_complete=None):
+        """
+        Starts presenting a series of events.
+
+        Args:
+        - events: a list of (offset_ms, callback, *args) tuples sorted by offset
+        - on_complete: called with the scheduler after the last event has fired (default None)
+        """
+        self.cancel()
+        self.events = events
+        self.on_complete = on_complete
+        self.targets = []
+        self.onsets = []
+        self.render_ns = []
+        self.index = 0
+        self.start_ns = self.clock()
+        self._schedule_next()
+
+    def cancel(self):
+        """
+        Cancels the event that is waiting to fire, if any.
+        """
+        if self.pending is not None:
+            self.master.after_cancel(self.pending)
+            self.pending = None
+
+    def _target_ns(self):
+        return self.events[self.index][0] * 1_000_000
+
+    def _schedule_next(self):
+        remaining_ns = self.start_ns + self._target_ns() - self.clock()
+        self.pending = self.master.after(max(0, round(remaining_ns / 1_000_000)), self._fire)
+
+    def _fire(self):
+        self.pending = None
+        fired_ns = self.clock()
+        if self.start_ns + self._target_ns() - fired_ns > EARLY_TOLERANCE_NS:
+            self._schedule_next()
+            return
+
+        _, callback, *args = self.events[self.index]
+        callback(*args)
+        # Flush the redraw so the recorded onset is when the stimulus was drawn
+        self.master.update_idletasks()
+        drawn_ns = self.clock()
+        self.targets.append(self._target_ns())
+        self.onsets.append(drawn_ns - self.start_ns)
+        self.render_ns.append(drawn_ns - fired_ns)
+
+        self.index += 1
+        if self.index < len(self.events):
+            self._schedule_next()
+        elif self.on_complete:
+            self.on_complete(self)
+
+    def lateness_ns(self):
+        """
+        Returns how late each fired event was relative to its target.
+
+        Returns:
+        - np.ndarray: The lateness of each event in ns.
+        """
+        return np.asarray(self.onsets, dtype=np.int64) - np.asarray(self.targets, dtype=np.int64)
+
+
+def jitter_stats(lateness_ns):
+    """
+    Summarises onset lateness samples.
+
+    Args:
+    - lateness_ns (array-like): Onset minus target times in ns.
+
+    Returns:
+    - dict: n, mean_ms, sd_ms and max_ms of the lateness.
+    """
+    lateness_ms = np.asarray(lateness_ns, dtype=np.float64) / 1e6
+    if lateness_ms.size == 0:
+        return {'n': 0, 'mean_ms': np.nan, 'sd_ms': np.nan, 'max_ms': np.nan}
+    return {'n': int(lateness_ms.size),
+            'mean_ms': float(lateness_ms.mean()),
+            'sd_ms': float(lateness_ms.std(ddof=1)) if lateness_ms.size > 1 else 0.0,
+            'max_ms': float(lateness_ms.max())}
@@ -0,0 +1,37 @@
+import functools
+import os
+import sys
+import pytest
+
+# The modules live at the top of the repository rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_tk
+from result_writer import ResultWriter
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """
+    Builds DigitSpanTest apps on fake Tk widgets in a fresh data directory, past the ID screen.
+    """
+    fake_tk.install(monkeypatch)
+    import rds_test
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data').mkdir()
+    # Keep the writers away from the station's real spool
+    monkeypatch.setattr(rds_test, 'ResultWriter', functools.partial(ResultWriter, spool_dir=str(tmp_path / 'spool')))
+    apps = []
+
+    def make(user_id='7', **kwargs):
+        master = fake_tk.FakeMaster()
+        app = rds_test.DigitSpanTest(master, trial_log_path=str(tmp_path / 'trials.bin'), **kwargs)
+        app.scheduler.clock = master.clock
+        app.id_entry.text = user_id
+        app.start_intro()
+        apps.append(app)
+        return master, app
+
+    yield make
+    for app in apps:
+        app.result_writer.close()
@@ -0,0 +1,161 @@
+import heapq
+import itertools
+import types
+
+
+class FakeWidget:
+    """
+    Stands in for tk.Entry and tk.Button; keeps the text and the bound handlers.
+    """
+    def __init__(self, master=None, **options):
+        self.options = options
+        self.text = ''
+        self.bindings = {}
+
+    def pack(self, **options):
+        pass
+
+    def get(self):
+        return self.text
+
+    def delete(self, first, last=None):
+        self.text = ''
+
+    def index(self, index):
+        return len(self.text)
+
+    def bind(self, sequence, handler, add=None):
+        self.bindings[sequence] = handler
+
+    def focus_set(self):
+        pass
+
+    def config(self, **options):
+        self.options.update(options)
+
+    configure = config
+
+
+class FakeCanvas(FakeWidget):
+    """
+    Stands in for tk.Canvas; keeps the options of every item.
+    """
+    def __init__(self, master=None, **options):
+        super().__init__(master, **options)
+        self.items = {}
+        self.ids = itertools.count(1)
+
+    def _create(self, kind, options):
+        item = next(self.ids)
+        self.items[item] = (kind, dict(options))
+        return item
+
+    def create_text(self, *coords, **options):
+        return self._create('text', options)
+
+    def create_window(self, *coords, **options):
+        return self._create('window', options)
+
+    def itemconfig(self, tag_or_id, **options):
+        for item, (_, item_options) in self.items.items():
+            if tag_or_id in (item, item_options.get('tags')):
+                item_options.update(options)
+
+    def visible_texts(self):
+        return [options['text'] for kind, options in self.items.values()
+                if kind == 'text' and options.get('state') != 'hidden']
+
+
+class FakeMaster:
+    """
+    Stands in for tk.Tk with an event loop on virtual time, so a whole test runs instantly.
+
+    Attributes:
+    - now_ms: the virtual time in ms
+    """
+    def __init__(self):
+        self.now_ms = 0
+        self.queue = []
+        self.ids = itertools.count()
+
+    def clock(self):
+        return self.now_ms * 1_000_000
+
+    def title(self, text):
+        pass
+
+    def winfo_screenwidth(self):
+        return 1280
+
+    def winfo_screenheight(self):
+        return 800
+
+    def geometry(self, geometry):
+        pass
+
+    def update_idletasks(self):
+        pass
+
+    def after(self, ms, callback, *args):
+        ident = next(self.ids)
+        heapq.heappush(self.queue, (self.now_ms + ms, ident, callback, args))
+        return f"after#{ident}"
+
+    def after_idle(self, callback, *args):
+        return self.after(0, callback, *args)
+
+    def after_cancel(self, ident):
+        self.queue = [event for event in self.queue if f"after#{event[1]}" != ident]
+        heapq.heapify(self.queue)
+
+    def run(self, until=None, max_events=100_000):
+        """
+        Runs the queued callbacks in time order.
+
+        Args:
+        - until: a function returning True once the loop should stop (default None, run until idle)
+        - max_events: the largest number of callbacks run (default 100,000)
+        """
+        for _ in range(max_events):
+            if not self.queue or (until and until()):
+                return
+            at_ms, _, callback, args = heapq.heappop(self.queue)
+            self.now_ms = max(self.now_ms, at_ms)
+            callback(*args)
+
+
+def install(monkeypatch):
+    """
+    Replaces the Tk widgets used by rds_test with the fakes.
+    """
+    import tkinter as tk
+    monkeypatch.setattr(tk, 'Canvas', FakeCanvas)
+    monkeypatch.setattr(tk, 'Entry', FakeWidget)
+    monkeypatch.setattr(tk, 'Button', FakeWidget)
+
+
+def awaiting_input(app):
+    return app.current_screen == 'input' and app.input_entry.options.get('state') == 'normal'
+
+
+def drive(master, app, respond, trials=None):
+    """
+    Types the responses of respond into a DigitSpanTest until the test ends, or until it has run the given number of trials.
+    """
+    while trials is None or len(app.engine.trials) < trials:
+        master.run(until=lambda: awaiting_input(app))
+        if not awaiting_input(app):
+            break
+        master.now_ms += 10
+        for char in respond(app.sequence, app.engine.forward):
+            app.input_entry.bindings['<Key>'](types.SimpleNamespace(char=char))
+            app.input_entry.text += char
+        app.input_entry.bindings['<Return>'](types.SimpleNamespace(char='\r'))
+
+
+def finish(master, app):
+    """
+    Waits for the result writer and shows the save outcome.
+    """
+    app.result_writer.close()
+    master.run()
@@ -0,0 +1,15 @@
+def respond_up_to(forward_span, backward_span):
+    """
+    Returns a participant who recalls every sequence up to their span and none beyond it.
+    """
+    def respond(sequence, forward):
+        expected = ''.join(sequence) if forward else ''.join(sequence)[::-1]
+        return expected if len(sequence) <= (forward_span if forward else backward_span) else 'x'
+    return respond
+
+
+def summary(trials):
+    """
+    Returns what the participant saw and did in each trial, without the timing.
+    """
+    return [(t.forward, t.length, t.attempt, t.sequence, t.response, t.correct) for t in trials]
@@ -0,0 +1,56 @@
+import numpy as np
+from bayesian_span import BayesianSpanEngine, MAX_TRIALS, PRACTICE_TRIALS, recall_probability
+from fake_tk import drive, finish
+from helpers import respond_up_to, summary
+from sequence_bank import SequenceBank
+from session_journal import make_engine
+from span_engine import DEFAULT_PROTOCOL, FakeClock, run_session
+
+
+def bayesian_session(seed, forward_span, backward_span, practice_mode=False):
+    bank = SequenceBank(seed, attempts=MAX_TRIALS)
+    return run_session(BayesianSpanEngine(practice_mode, bank, clock=FakeClock()), respond_up_to(forward_span, backward_span))
+
+
+def test_recall_probability_falls_with_length():
+    p = recall_probability(np.arange(1, 12), [6.0])[:, 0]
+    assert (np.diff(p) < 0).all()
+    assert p[0] > 0.9 and p[-1] < 0.1
+
+
+def test_scores_order_participants_by_span():
+    for seed in range(5):
+        low, high = bayesian_session(seed, 3, 2), bayesian_session(seed, 7, 6)
+        assert low.finished and high.finished
+        assert low.max_forward_length < high.max_forward_length
+        assert low.max_backward_length < high.max_backward_length
+
+
+def test_directions_stop_within_the_trial_limits():
+    for seed in range(5):
+        engine = bayesian_session(seed, 5, 4)
+        forward = sum(trial.forward for trial in engine.trials)
+        assert 0 < forward <= MAX_TRIALS and 0 < len(engine.trials) - forward <= MAX_TRIALS
+
+
+def test_fewer_trials_than_the_staircase_for_long_spans():
+    staircase = run_session(make_engine(False, 0, DEFAULT_PROTOCOL, clock=FakeClock()), respond_up_to(9, 8))
+    assert len(bayesian_session(0, 9, 8).trials) < len(staircase.trials)
+
+
+def test_practice_presents_a_fixed_number_of_trials():
+    engine = bayesian_session(0, 5, 4, practice_mode=True)
+    assert len(engine.trials) == 2 * PRACTICE_TRIALS
+    assert max(trial.length for trial in engine.trials) <= DEFAULT_PROTOCOL.practice_max_length
+
+
+def test_gui_runs_the_bayesian_procedure(make_app):
+    respond = respond_up_to(5, 4)
+    master, app = make_app(bayesian=True)
+    app.start_test('pre')
+    drive(master, app, respond)
+    finish(master, app)
+    headless = run_session(make_engine(False, app.engine.sequence_bank.seed, DEFAULT_PROTOCOL, bayesian=True,
+                                       clock=FakeClock()), respond)
+    assert summary(app.engine.trials) == summary(headless.trials)
+    assert app.engine.combined_score == headless.combined_score
@@ -0,0 +1,40 @@
+import numpy as np
+from scipy import stats
+from bootstrap_ci import EFFECTS, bootstrap_effects
+
+X = [3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0, 5.0, 3.0, 5.0, 8.0]
+Y = [2.0, 7.0, 1.0, 8.0, 2.0, 8.0, 1.0, 8.0, 2.0, 8.0, 4.0]
+
+
+def cohens_d(x, y, axis=-1):
+    x, y = np.asarray(x), np.asarray(y)
+    return (x.mean(axis) - y.mean(axis)) / np.sqrt((x.var(axis, ddof=1) + y.var(axis, ddof=1)) / 2)
+
+
+def test_estimates_match_the_direct_formulas():
+    results = bootstrap_effects(X, Y, resamples=1000, seed=0).set_index('effect')
+    assert list(results.index) == EFFECTS
+    correction = 1 - 3 / (4 * (len(X) + len(Y)) - 9)
+    expected = [np.mean(X) - np.mean(Y), np.median(X) - np.median(Y), cohens_d(X, Y), cohens_d(X, Y) * correction]
+    assert np.allclose(results['estimate'], expected)
+
+
+def test_intervals_match_scipy():
+    results = bootstrap_effects(X, Y, resamples=100_000, seed=1).set_index('effect')
+    for name, statistic in [('mean_difference', lambda x, y, axis: x.mean(axis) - y.mean(axis)),
+                            ('cohens_d', cohens_d)]:
+        row = results.loc[name]
+        for method, low, high in [('percentile', 'percentile_low', 'percentile_high'), ('BCa', 'bca_low', 'bca_high')]:
+            expected = stats.bootstrap((X, Y), statistic, n_resamples=100_000, method=method,
+                                       rng=np.random.default_rng(2)).confidence_interval
+            tolerance = 0.05 * row['se']
+            assert abs(row[low] - expected.low) < tolerance and abs(row[high] - expected.high) < tolerance
+
+
+def test_intervals_contain_the_estimate_and_narrow_with_confidence():
+    wide = bootstrap_effects(X, Y, resamples=20_000, seed=3)
+    narrow = bootstrap_effects(X, Y, resamples=20_000, confidence=0.5, seed=3)
+    assert (wide['se'] > 0).all()
+    assert ((wide['percentile_low'] <= wide['estimate']) & (wide['estimate'] <= wide['percentile_high'])).all()
+    assert ((wide['bca_low'] < narrow['bca_low']) & (narrow['bca_high'] < wide['bca_high'])).all()
+    assert bootstrap_effects(X, Y, resamples=500, seed=4).equals(bootstrap_effects(X, Y, resamples=500, seed=4))
@@ -0,0 +1,100 @@
+import asyncio
+import errno
+import os
+import threading
+import pytest
+import collector
+from collector import Collector, RejectedError, read_collected, submit_session
+from result_writer import ResultWriter, Result, REJECTED
+
+
+def session(session_id, user_id=7):
+    return {'session_id': session_id, 'user_id': user_id, 'test_type': 'pre', 'forward': 5, 'backward': 4,
+            'combined': 9}
+
+
+def test_failed_commit_fails_its_batch_and_keeps_collecting(tmp_path, monkeypatch):
+    path = str(tmp_path / 'collected.jsonl')
+    fsync = os.fsync
+    failures = [OSError(errno.ENOSPC, 'No space left on device')]
+
+    def failing_fsync(fd):
+        if failures:
+            raise failures.pop()
+        fsync(fd)
+
+    monkeypatch.setattr(collector.os, 'fsync', failing_fsync)
+
+    async def run():
+        c = Collector(path, batch_ms=1)
+        await c.start(port=0)
+        first = await asyncio.gather(c.submit(session(1)), c.submit(session(1)), c.submit(session(2)))
+        second = await asyncio.gather(c.submit(session(1)), c.submit(session(3)))
+        await c.stop()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert all(status.startswith('error') for status in first)
+    assert second == ['stored', 'stored']
+    # The failed batch was cut from the log, so it holds exactly the resubmitted sessions
+    assert [s['session_id'] for s in read_collected(path)] == [1, 3]
+
+
+def test_connection_waits_only_for_its_own_sessions(tmp_path):
+    path = str(tmp_path / 'collected.jsonl')
+
+    async def run():
+        c = Collector(path, batch_ms=60_000)
+        port = await c.start(port=0)
+        # A session of another station that will not be committed while this connection is open
+        other = c.submit(session(1))
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'not json\n')
+        writer.write_eof()
+        ack = await asyncio.wait_for(reader.readline(), 5)
+        closed = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        assert not other.done()
+        await c.stop()
+        return ack, closed, other.result()
+
+    ack, closed, other = asyncio.run(run())
+    assert b'invalid' in ack and closed == b''
+    assert other == 'stored'
+
+
+@pytest.fixture
+def running_collector(tmp_path):
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    c = Collector(str(tmp_path / 'collected.jsonl'), batch_ms=1)
+    port = asyncio.run_coroutine_threadsafe(c.start(port=0), loop).result()
+    yield c, ('127.0.0.1', port)
+    asyncio.run_coroutine_threadsafe(c.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+
+def test_submit_session_statuses(running_collector):
+    c, address = running_collector
+    assert submit_session(address, session(1)) == 'stored'
+    assert submit_session(address, session(1)) == 'duplicate'
+    with pytest.raises(RejectedError):
+        submit_session(address, session(2, user_id='seven'))
+
+
+def test_rejected_result_is_final(running_collector, tmp_path):
+    _, address = running_collector
+    calls = []
+
+    def write(result):
+        calls.append(result)
+        return submit_session(address, result._asdict())
+
+    spool_dir = tmp_path / 'spool'
+    writer = ResultWriter(write, spool_dir=str(spool_dir), initial_backoff=0)
+    writer.submit(Result('seven', 'pre', 5, 4, 9, 1))
+    writer.close()
+    assert writer.poll() == [(Result('seven', 'pre', 5, 4, 9, 1), REJECTED)]
+    assert len(calls) == 1 and not spool_dir.exists()
@@ -0,0 +1,53 @@
+from itertools import product
+import numpy as np
+from scipy import stats
+from paired_tests import exact_tail_counts, monte_carlo_tail_counts, sign_flip_test
+
+PRE = [5, 6, 4, 7, 5, 6, 3, 8, 5, 6, 4, 7]
+POST = [7, 6, 6, 8, 4, 9, 5, 9, 5, 8, 6, 7]
+
+
+def brute_force_counts(weights, observed):
+    sums = np.array([np.dot(signs, weights) for signs in product([0, 1], repeat=len(weights))])
+    return int((sums >= observed - 1e-9).sum()), int((sums <= observed + 1e-9).sum())
+
+
+def test_exact_tail_counts_match_enumeration():
+    rng = np.random.default_rng(0)
+    for size in (1, 2, 7, 10):
+        weights = rng.integers(1, 6, size).astype(float)
+        for observed in (0.0, weights.sum() / 2, weights[:size // 2 + 1].sum(), weights.sum()):
+            assert exact_tail_counts(weights, observed) == brute_force_counts(weights, observed)
+
+
+def test_exact_mean_test_matches_scipy():
+    differences = np.subtract(POST, PRE)
+    differences = differences[differences != 0]
+    result = sign_flip_test(PRE, POST)
+    assert result['exact'] and result['n'] == len(differences) and result['patterns'] == 2 ** len(differences)
+    assert np.isclose(result['observed'], np.mean(np.subtract(POST, PRE)))
+    for alternative, key in [('greater', 'p_greater'), ('less', 'p_less'), ('two-sided', 'p')]:
+        expected = stats.permutation_test((differences,), np.mean, permutation_type='samples',
+                                          alternative=alternative, n_resamples=np.inf).pvalue
+        assert np.isclose(result[key], expected)
+
+
+def test_exact_wilcoxon_matches_scipy():
+    # Without tied or zero differences the sign-flip distribution of W+ is the exact Wilcoxon one
+    pre = [5.0, 6.1, 4.2, 7.3, 5.4, 6.5, 3.6, 8.7, 5.8]
+    post = [7.0, 5.0, 6.5, 8.0, 4.0, 9.6, 5.4, 9.1, 6.3]
+    result = sign_flip_test(pre, post, 'wilcoxon')
+    expected = stats.wilcoxon(post, pre, method='exact')
+    assert np.isclose(result['p'], expected.pvalue)
+    greater = stats.wilcoxon(post, pre, method='exact', alternative='greater')
+    assert result['observed'] == greater.statistic and np.isclose(result['p_greater'], greater.pvalue)
+
+
+def test_monte_carlo_approaches_the_exact_p():
+    exact = sign_flip_test(PRE, POST)
+    sampled = sign_flip_test(PRE, POST, max_exact=5, resamples=200_000, seed=1, chunk_size=30_000)
+    assert not sampled['exact'] and sampled['patterns'] == 200_000
+    assert abs(sampled['p'] - exact['p']) < 0.005
+    weights = np.array([1.0, 2.0, 3.0])
+    greater, less = monte_carlo_tail_counts(weights, 6.0, resamples=8000, seed=2)
+    assert less == 8000 and 800 < greater < 1200
@@ -0,0 +1,57 @@
+from itertools import combinations
+from math import comb
+import numpy as np
+from scipy import stats
+from permutation_tests import combination_masks, permutation_test
+
+X = [5, 3, 4, 2, 6, 3, 1]
+Y = [1, 0, 2, 2, -1, 3]
+
+
+def test_combination_masks_follow_lexicographic_order():
+    for n, k in [(7, 3), (6, 0), (12, 6)]:
+        masks = combination_masks(n, k, np.arange(comb(n, k)))
+        expected = [[position in members for position in range(n)] for members in combinations(range(n), k)]
+        assert masks.tolist() == expected
+
+
+def test_larger_groups_are_built_from_the_complement():
+    masks = combination_masks(7, 5, np.arange(comb(7, 5)))
+    assert (masks.sum(axis=1) == 5).all()
+    assert sorted(map(tuple, masks.tolist())) == sorted(tuple(position in members for position in range(7))
+                                                        for members in combinations(range(7), 5))
+
+
+def test_exact_p_matches_scipy():
+    results = permutation_test(X, Y, statistics=('mean_difference', 'median_difference'))
+    assert results['exact'].all() and (results['permutations'] == comb(len(X) + len(Y), len(X))).all()
+    for statistic, row in zip((lambda x, y: np.mean(x) - np.mean(y), lambda x, y: np.median(x) - np.median(y)),
+                              results.itertuples()):
+        for alternative, p in [('greater', row.p_greater), ('less', row.p_less), ('two-sided', row.p)]:
+            expected = stats.permutation_test((X, Y), statistic, permutation_type='independent',
+                                              alternative=alternative, n_resamples=np.inf).pvalue
+            assert np.isclose(p, expected)
+
+
+def test_exact_u_matches_the_exact_mann_whitney_test():
+    # Without ties, the permutation distribution of U is the one tabulated by the exact test
+    x, y = [5.5, 3.1, 4.2, 2.3, 6.4, 3.6, 1.7], [1.1, 0.2, 2.1, 2.6, -1.0, 3.3]
+    row = permutation_test(x, y, statistics=('U',)).iloc[0]
+    expected = stats.mannwhitneyu(x, y, method='exact')
+    assert row['observed'] == expected.statistic
+    assert np.isclose(row['p'], expected.pvalue)
+
+
+def test_random_permutations_approach_the_exact_p():
+    exact = permutation_test(X, Y)
+    sampled = permutation_test(X, Y, permutations=200, seed=3)
+    assert not sampled['exact'][0] and sampled['permutations'][0] == 200
+    assert abs(sampled['p'][0] - exact['p'][0]) < 0.05
+
+
+def test_multi_column_outcomes_are_tested_independently():
+    values_x = np.column_stack([X, np.negative(X)])
+    values_y = np.column_stack([Y, np.negative(Y)])
+    results = permutation_test(values_x, values_y)
+    assert np.isclose(results['p_greater'][0], results['p_less'][1])
+    assert np.isclose(results['p'][0], results['p'][1])
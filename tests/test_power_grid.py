@@ -0,0 +1,24 @@
+import numpy as np
+from power_grid import sample_size_grid, ttest_power
+
+
+def test_grid_combines_every_value():
+    grid = sample_size_grid([0.3, 0.5, 0.8], [0.05, 0.01], 0.8)
+    assert len(grid) == 6
+    assert list(grid['effect_size']) == [0.3, 0.3, 0.5, 0.5, 0.8, 0.8]
+    assert list(grid['alpha']) == [0.05, 0.01] * 3
+
+
+def test_elementwise_pairs_the_inputs():
+    effect_sizes, alphas, powers = [0.3, 0.5, 0.8], [0.05, 0.01, 0.05], [0.8, 0.9, 0.95]
+    paired = sample_size_grid(effect_sizes, alphas, powers, elementwise=True)
+    assert len(paired) == 3
+    for row, d, alpha, power in zip(paired.itertuples(), effect_sizes, alphas, powers):
+        assert (row.effect_size, row.alpha, row.power) == (d, alpha, power)
+        assert row.nobs1 == sample_size_grid(d, alpha, power)['nobs1'].iloc[0]
+        assert np.isclose(ttest_power(d, row.nobs1, alpha), power)
+
+
+def test_elementwise_broadcasts_scalars():
+    paired = sample_size_grid([0.3, 0.5, 0.8], 0.05, 0.8, elementwise=True)
+    assert list(paired['n1']) == list(sample_size_grid([0.3, 0.5, 0.8], 0.05, 0.8)['n1'])
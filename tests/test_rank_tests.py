@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import mannwhitneyu
+from rank_tests import mannwhitney_batch, split_by
+
+
+@pytest.fixture
+def scores():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'Category': np.where(np.arange(40) % 2, 'TikTok', 'Video'),
+                       'forward': rng.integers(3, 9, 40).astype(float),
+                       'backward': rng.integers(2, 8, 40).astype(float),
+                       'subgroup': rng.random(40) < 0.6})
+    df.loc[[1, 4, 7, 22], 'forward'] = np.nan
+    df.loc[[3, 4, 30], 'backward'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('alternative', ['two-sided', 'greater', 'less'])
+def test_matches_scipy_with_missing_values_omitted(scores, alternative):
+    splits = {'all': split_by(scores, 'Category', 'TikTok', 'Video'),
+              'subgroup': split_by(scores, 'Category', 'TikTok', 'Video', within=scores['subgroup'])}
+    results = mannwhitney_batch(scores, ['forward', 'backward'], splits, alternative)
+    assert len(results) == 4
+    for row in results.itertuples():
+        x, y = splits[row.split]
+        expected = mannwhitneyu(scores.loc[x, row.column], scores.loc[y, row.column], alternative=alternative,
+                                method='asymptotic', nan_policy='omit')
+        assert row.n_x == scores.loc[x, row.column].notna().sum()
+        assert row.n_y == scores.loc[y, row.column].notna().sum()
+        assert row.U == pytest.approx(expected.statistic)
+        assert row.p == pytest.approx(expected.pvalue)
+
+
+def test_rank_biserial_sign(scores):
+    shifted = scores.assign(forward=scores['forward'] + 10 * (scores['Category'] == 'TikTok'))
+    results = mannwhitney_batch(shifted, ['forward'], {'all': split_by(shifted, 'Category', 'TikTok', 'Video')})
+    assert results['rank_biserial'].iloc[0] == pytest.approx(1.0)
+
+
+def test_overlapping_groups_are_rejected(scores):
+    everyone = np.ones(len(scores), dtype=bool)
+    with pytest.raises(ValueError):
+        mannwhitney_batch(scores, ['forward'], {'all': (everyone, everyone)})
@@ -0,0 +1,59 @@
+import types
+from fake_tk import awaiting_input, drive, finish
+from helpers import respond_up_to, summary
+from session_journal import make_engine
+from span_engine import DEFAULT_PROTOCOL, FakeClock, run_session
+
+
+def test_gui_runs_the_engine_procedure(make_app):
+    respond = respond_up_to(5, 4)
+    master, app = make_app()
+    app.start_test('pre')
+    drive(master, app, respond)
+    finish(master, app)
+
+    headless = run_session(make_engine(False, app.engine.sequence_bank.seed, DEFAULT_PROTOCOL, clock=FakeClock()),
+                           respond)
+    assert app.engine.finished
+    assert summary(app.engine.trials) == summary(headless.trials)
+    with open('data/7_pre_test.txt') as f:
+        assert f.read() == f"{headless.max_forward_length},{headless.max_backward_length},{headless.combined_score}\n"
+    assert app.current_screen == 'results'
+    assert f"Combined Test Score: {headless.combined_score}" in app.canvas.visible_texts()
+
+
+def test_live_validation_ends_the_trial_at_the_first_wrong_key(make_app):
+    master, app = make_app(live_validation=True)
+    app.start_test('pre')
+    master.run(until=lambda: awaiting_input(app))
+    expected = app.engine.expected_response()
+    wrong = '0' if expected[1] != '0' else '1'
+    app.input_entry.text = expected[0]
+    assert app.input_entry.bindings['<Key>'](types.SimpleNamespace(char=wrong)) == 'break'
+    trial = app.engine.trials[-1]
+    assert (trial.response, trial.correct) == (expected[0] + wrong, False)
+    assert not awaiting_input(app)
+
+
+def test_live_validation_lets_correct_keys_through(make_app):
+    master, app = make_app(live_validation=True)
+    app.start_test('pre')
+    master.run(until=lambda: awaiting_input(app))
+    assert app.input_entry.bindings['<Key>'](types.SimpleNamespace(char=app.engine.expected_response()[0])) is None
+    assert app.engine.trials == []
+
+
+def test_non_numeric_id_is_refused_with_a_message(make_app, tmp_path):
+    master, app = make_app(user_id='abc', store_path=str(tmp_path / 'scores.bin'))
+    assert app.current_screen == 'id'
+    assert "A numeric ID is required." in app.canvas.visible_texts()
+    app.id_entry.text = '12'
+    app.start_intro()
+    assert app.current_screen == 'intro'
+    assert "A numeric ID is required." not in app.canvas.visible_texts()
+
+
+def test_path_separators_are_refused_on_the_text_backend(make_app):
+    master, app = make_app(user_id='../12')
+    assert app.current_screen == 'id'
+    assert "The ID cannot contain path separators." in app.canvas.visible_texts()
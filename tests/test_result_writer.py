@@ -0,0 +1,102 @@
+import json
+import socket
+import threading
+import time
+import pytest
+from collector import RejectedError, submit_session
+from result_writer import ResultWriter, Result, REJECTED, SPOOLED, FAILED, read_spool, save_result
+
+
+def writer(tmp_path, write, **kwargs):
+    return ResultWriter(write, spool_dir=str(tmp_path / 'spool'), initial_backoff=0, **kwargs)
+
+
+def outcomes(w, count, timeout=10):
+    # Waits for the writer thread rather than closing it, since closing skips the retries
+    done, deadline = [], time.monotonic() + timeout
+    while len(done) < count and time.monotonic() < deadline:
+        done += w.poll()
+        time.sleep(0.01)
+    w.close()
+    return done
+
+
+def test_written_result_reports_the_outcome(tmp_path):
+    w = writer(tmp_path, lambda result: True)
+    w.submit(Result('7', 'pre', 5, 4, 9, 1))
+    w.close()
+    assert w.poll() == [(Result('7', 'pre', 5, 4, 9, 1), True)]
+
+
+def test_unreachable_target_spools_and_replays(tmp_path):
+    result = Result('7', 'pre', 5, 4, 9, 1)
+    attempts = []
+
+    def unreachable(result):
+        attempts.append(result)
+        raise ConnectionError("down")
+
+    w = writer(tmp_path, unreachable, max_attempts=3)
+    w.submit(result)
+    assert outcomes(w, 1) == [(result, SPOOLED)] and len(attempts) == 3
+    assert [spooled for _, spooled in read_spool(str(tmp_path / 'spool'))] == [result]
+
+    written = []
+    w = writer(tmp_path, lambda result: written.append(result) or True)
+    w.close()
+    assert written == [result] and w.poll() == [(result, True)]
+    assert read_spool(str(tmp_path / 'spool')) == []
+
+
+def test_spool_failure_keeps_the_writer_alive(tmp_path):
+    (tmp_path / 'spool').write_text('not a directory')
+
+    def unreachable(result):
+        raise ConnectionError("down")
+
+    w = writer(tmp_path, unreachable, max_attempts=1)
+    w.submit(Result('7', 'pre', 5, 4, 9, 1))
+    w.submit(Result('8', 'pre', 5, 4, 9, 2))
+    w.close()
+    assert [outcome for _, outcome in w.poll()] == [FAILED, FAILED]
+
+
+def test_only_an_explicit_rejection_is_final(tmp_path):
+    calls = []
+
+    def write(result):
+        calls.append(result)
+        if result.user_id == 'bad':
+            raise RejectedError("invalid session")
+        # Anything else, such as a garbled reply, is retried and spooled
+        json.loads('{"status": "sto')
+
+    w = writer(tmp_path, write, max_attempts=2)
+    w.submit(Result('bad', 'pre', 5, 4, 9, 1))
+    w.submit(Result('7', 'pre', 5, 4, 9, 2))
+    assert [outcome for _, outcome in outcomes(w, 2)] == [REJECTED, SPOOLED]
+    assert len(calls) == 3
+    assert [result.user_id for _, result in read_spool(str(tmp_path / 'spool'))] == ['7']
+
+
+def test_backends_keyed_on_numeric_ids_reject_other_ids(tmp_path):
+    with pytest.raises(RejectedError):
+        save_result(Result('x7', 'pre', 5, 4, 9), store_path=str(tmp_path / 'scores.bin'))
+    assert not (tmp_path / 'scores.bin').exists()
+
+
+def test_malformed_collector_reply_is_a_connection_error():
+    listener = socket.create_server(('127.0.0.1', 0))
+
+    def reply():
+        conn, _ = listener.accept()
+        with conn:
+            conn.recv(4096)
+            conn.sendall(b'<html>proxy error</html>\n')
+
+    thread = threading.Thread(target=reply)
+    thread.start()
+    with pytest.raises(ConnectionError):
+        submit_session(listener.getsockname(), {'session_id': 1})
+    thread.join()
+    listener.close()
@@ -0,0 +1,36 @@
+import os
+import sqlite3
+import pytest
+from score_db import insert_score, read_db
+
+
+def test_read_db_reads_what_stations_inserted(tmp_path):
+    path = str(tmp_path / 'scores #1.db')
+    assert insert_score(path, 8, 'post', 6, 5, 11)
+    assert insert_score(path, 8, 'pre', 5, 4, 9)
+    assert not insert_score(path, 8, 'pre', 7, 7, 14)
+    df = read_db(path)
+    assert list(df['exposure'].astype(str)) == ['Pre', 'Post']
+    assert list(df['combined']) == [9, 11]
+
+
+def test_read_db_does_not_write(tmp_path):
+    path = str(tmp_path / 'scores.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE sessions (id INTEGER, test_type TEXT, forward INTEGER, backward INTEGER, "
+                 "combined INTEGER, created_at REAL)")
+    conn.execute("INSERT INTO sessions VALUES (3, 'pre', 5, 4, 9, 0)")
+    conn.commit()
+    conn.close()
+    assert len(read_db(path)) == 1
+    # Still in the rollback journal mode it was created with, and with no WAL files beside it
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'delete'
+    conn.close()
+    assert os.listdir(tmp_path) == ['scores.db']
+
+
+def test_read_db_does_not_create_a_database(tmp_path):
+    with pytest.raises(sqlite3.OperationalError):
+        read_db(str(tmp_path / 'missing.db'))
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,66 @@
+import json
+import os
+import pandas as pd
+from score_loader import CACHE_FILENAME, load_scores, pair_scores
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+def write_scores(data_dir, files):
+    for name, content in files.items():
+        (data_dir / name).write_text(content)
+
+
+def test_loads_every_result_file(tmp_path):
+    write_scores(tmp_path, {'1_pre_test.txt': '5,4,9\n', '1_post_test.txt': '6,4,10\n', '2_pre_test.txt': '4,3,7',
+                            '3_pre_test.txt': '', 'notes.txt': '1,2,3', '4_mid_test.txt': '1,2,3'})
+    scores = load_scores(str(tmp_path))
+    assert list(zip(scores['id'], scores['exposure'].astype(str))) == [(1, 'Pre'), (1, 'Post'), (2, 'Pre')]
+    assert list(scores['category'].astype(str)) == ['TikTok', 'TikTok', 'Video']
+    assert list(scores['combined']) == [9, 10, 7]
+
+
+def test_unchanged_files_are_read_from_the_cache(tmp_path):
+    write_scores(tmp_path, {'1_pre_test.txt': '5,4,9\n'})
+    load_scores(str(tmp_path))
+    with open(tmp_path / CACHE_FILENAME) as f:
+        cache = json.load(f)
+    # A cache entry whose mtime and size still match is trusted without opening the file
+    cache['1_pre_test.txt'][2] = [7, 7, 14]
+    with open(tmp_path / CACHE_FILENAME, 'w') as f:
+        json.dump(cache, f)
+    assert list(load_scores(str(tmp_path))['combined']) == [14]
+    assert list(load_scores(str(tmp_path), use_cache=False)['combined']) == [9]
+
+    stat = os.stat(tmp_path / '1_pre_test.txt')
+    (tmp_path / '1_pre_test.txt').write_text('6,4,10\n')
+    os.utime(tmp_path / '1_pre_test.txt', ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert list(load_scores(str(tmp_path))['combined']) == [10]
+
+
+def test_store_and_database_take_precedence(tmp_path):
+    from score_db import insert_score
+    from score_store import append_score
+    write_scores(tmp_path, {'1_pre_test.txt': '5,4,9\n', '2_pre_test.txt': '4,3,7\n'})
+    append_score(str(tmp_path / 'scores.bin'), 1, 'pre', 6, 4, 10)
+    insert_score(str(tmp_path / 'scores.db'), 2, 'pre', 5, 5, 10)
+    insert_score(str(tmp_path / 'scores.db'), 3, 'post', 5, 5, 10)
+    scores = load_scores(str(tmp_path), use_cache=False)
+    assert list(zip(scores['id'], scores['combined'])) == [(1, 10), (2, 10), (3, 10)]
+
+
+def test_pairing_is_by_id_and_reports_orphans():
+    scores = pd.DataFrame({'id': [3, 1, 1, 2, 4], 'category': ['TikTok', 'TikTok', 'TikTok', 'Video', 'Video'],
+                           'exposure': ['Post', 'Post', 'Pre', 'Pre', 'Post'],
+                           'forward': [6, 7, 5, 4, 5], 'backward': [4, 5, 4, 3, 4], 'combined': [10, 12, 9, 7, 9]})
+    df_diff, orphans = pair_scores(scores)
+    assert list(df_diff['id']) == [1]
+    assert df_diff.loc[0, ['Forward Difference', 'Backward Difference', 'Combined Difference']].tolist() == [2, 1, 3]
+    assert list(zip(orphans['id'], orphans['exposure'].astype(str))) == [(2, 'Pre'), (3, 'Post'), (4, 'Post')]
+
+
+def test_pairing_reproduces_the_study_data():
+    df_diff, orphans = pair_scores(load_scores(DATA_DIR, use_cache=False))
+    expected = pd.read_csv(os.path.join(DATA_DIR, 'df_diff.csv')).sort_values(['Category', 'id'], ignore_index=True)
+    assert orphans.empty
+    pd.testing.assert_frame_equal(df_diff.astype({'Category': str}), expected, check_dtype=False)
@@ -0,0 +1,71 @@
+import os
+import threading
+import pytest
+import score_store
+from score_store import STORE_MAGIC, RECORD_STRUCT, append_records, append_score, pack_record, read_records, read_store
+
+
+def test_new_store_starts_with_the_header(tmp_path):
+    path = str(tmp_path / 'scores.bin')
+    append_score(path, 7, 'pre', 5, 4, 9)
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert data[:len(STORE_MAGIC)] == STORE_MAGIC and len(data) == len(STORE_MAGIC) + RECORD_STRUCT.size
+    assert list(tmp_path.iterdir()) == [tmp_path / 'scores.bin']
+
+
+def test_concurrent_appenders_create_one_header(tmp_path):
+    path = str(tmp_path / 'scores.bin')
+    start = threading.Barrier(8)
+
+    def append(user_id):
+        start.wait()
+        for _ in range(25):
+            append_score(path, user_id, 'pre', 5, 4, 9)
+
+    threads = [threading.Thread(target=append, args=(user_id,)) for user_id in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    records = read_records(path)
+    assert len(records) == 200
+    assert sorted(records['id']) == sorted(list(range(8)) * 25)
+
+
+def test_torn_record_is_cut_before_appending(tmp_path):
+    path = str(tmp_path / 'scores.bin')
+    append_score(path, 1, 'pre', 5, 4, 9)
+    with open(path, 'ab') as f:
+        f.write(pack_record(2, 'pre', 6, 5, 11)[:7])
+    append_score(path, 3, 'post', 7, 6, 13)
+    store = read_store(path)
+    assert list(store['id']) == [1, 3]
+    assert list(store['combined']) == [9, 13]
+
+
+@pytest.mark.parametrize('header', [b'', STORE_MAGIC[:3]])
+def test_store_without_a_complete_header_is_rewritten(tmp_path, header):
+    path = tmp_path / 'scores.bin'
+    path.write_bytes(header)
+    append_records(str(path), [pack_record(4, 'pre', 5, 4, 9)])
+    assert list(read_records(str(path))['id']) == [4]
+
+
+def test_failed_header_write_leaves_no_temporary_file(tmp_path, monkeypatch):
+    closed = []
+    real_close = os.close
+
+    def failing_fsync(fd):
+        raise OSError('disk full')
+
+    def tracking_close(fd):
+        closed.append(fd)
+        real_close(fd)
+
+    monkeypatch.setattr(score_store.os, 'fsync', failing_fsync)
+    monkeypatch.setattr(score_store.os, 'close', tracking_close)
+    with pytest.raises(OSError, match='disk full'):
+        append_score(str(tmp_path / 'scores.bin'), 7, 'pre', 5, 4, 9)
+    assert len(closed) == 1
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from helpers import respond_up_to
+from sequence_bank import SequenceBank, generate_sequences
+from span_engine import DigitSpanEngine, FakeClock, run_session
+
+
+def test_same_seed_gives_the_same_bank():
+    first, second = SequenceBank(11), SequenceBank(11)
+    assert first.sequences.keys() == second.sequences.keys()
+    assert all((first.sequences[key] == second.sequences[key]).all() for key in first.sequences)
+    assert SequenceBank().seed != SequenceBank().seed
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_sessions_with_the_same_seed_present_the_same_sequences(seed):
+    respond = respond_up_to(5, 4)
+    first = run_session(DigitSpanEngine(sequence_bank=SequenceBank(seed), clock=FakeClock()), respond)
+    second = run_session(DigitSpanEngine(sequence_bank=SequenceBank(seed), clock=FakeClock()), respond)
+    assert [trial.sequence for trial in first.trials] == [trial.sequence for trial in second.trials]
+
+
+@pytest.mark.parametrize('no_runs', [False, True])
+def test_generated_sequences_keep_the_constraints(no_runs):
+    sequences = generate_sequences(np.random.default_rng(0), 5000, 8, no_runs=no_runs).astype(int)
+    assert (np.diff(sequences, axis=1) != 0).all()
+    steps = np.diff(sequences, axis=1)
+    runs = (np.abs(steps[:, 1:]) == 1) & (steps[:, 1:] == steps[:, :-1])
+    assert runs.any() != no_runs
+
+
+def test_balanced_sequences_spread_the_digits():
+    rng = np.random.default_rng(0)
+    balanced = generate_sequences(rng, 2000, 10, balanced=True)
+    plain = generate_sequences(rng, 2000, 10)
+
+    def distinct(sequences):
+        return np.mean([len(set(row)) for row in sequences])
+
+    assert distinct(balanced) > distinct(plain)
+
+
+def test_no_sequence_repeats_the_one_before():
+    for seed in range(200):
+        bank = SequenceBank(seed, max_length=4)
+        for forward in (True, False):
+            for length in range(bank.start_length, 5):
+                attempts = bank.sequences[(forward, length)]
+                assert not (attempts[1:] == attempts[:-1]).all(axis=1).any()
+        # The first backward sequence follows the last forward one after a failure at the start length
+        assert bank.get(False, bank.start_length, 0) != bank.get(True, bank.start_length, bank.attempts - 1)
+
+
+def test_lengths_beyond_the_bank_are_generated_on_demand():
+    bank = SequenceBank(3, max_length=4)
+    assert len(bank.get(True, 9, 1)) == 9
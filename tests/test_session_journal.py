@@ -0,0 +1,96 @@
+import os
+import pytest
+from fake_tk import awaiting_input, drive, finish
+from helpers import respond_up_to, summary
+from session_journal import (SessionJournal, JOURNAL_SUFFIX, DONE_SUFFIX, journal_path, make_engine, read_journal,
+                             replay, replay_journals)
+from span_engine import DEFAULT_PROTOCOL, FakeClock, run_session
+
+
+def start(tmp_path, seed=5):
+    return SessionJournal.start(str(tmp_path), '7', 'pre', 123, seed, DEFAULT_PROTOCOL, sync_every=2)
+
+
+def test_replay_rebuilds_the_engine(tmp_path):
+    journal = start(tmp_path)
+    engine = make_engine(False, 5, DEFAULT_PROTOCOL, clock=FakeClock())
+    respond = respond_up_to(5, 4)
+    for _ in range(7):
+        response = respond(engine.next_stimulus(), engine.forward)
+        journal.log_trial(response)
+        engine.submit(response)
+    journal.close()
+    replayed = replay(read_journal(journal.path))
+    assert summary(replayed.trials) == summary(engine.trials)
+    assert replayed.next_stimulus() == engine.next_stimulus()
+
+
+def test_torn_record_is_cut_before_appending(tmp_path):
+    journal = start(tmp_path)
+    journal.log_trial('12')
+    journal.close()
+    with open(journal.path, 'ab') as f:
+        f.write(b'{"type":"trial","resp')
+    resumed = SessionJournal.resume(str(tmp_path), '7', 'pre')
+    assert [record['type'] for record in resumed.records] == ['start', 'trial']
+    resumed.log_trial('34')
+    resumed.close()
+    assert [record.get('response') for record in read_journal(journal.path)] == [None, '12', '34']
+
+
+def test_finished_journal_is_not_resumed(tmp_path):
+    journal = start(tmp_path)
+    journal.finish(5, 4, 9)
+    assert SessionJournal.resume(str(tmp_path), '7', 'pre') is None
+    assert os.listdir(tmp_path) == [f"7_pre_123{JOURNAL_SUFFIX}{DONE_SUFFIX}"]
+
+
+def test_start_replaces_an_unfinished_journal(tmp_path):
+    start(tmp_path).close()
+    SessionJournal.start(str(tmp_path), '7', 'pre', 456, 6, DEFAULT_PROTOCOL).close()
+    assert read_journal(journal_path(str(tmp_path), '7', 'pre'))[0]['session_id'] == 456
+
+
+@pytest.mark.parametrize('bayesian', [False, True])
+def test_crashed_test_resumes_at_the_same_trial(make_app, bayesian):
+    respond = respond_up_to(5, 4)
+    master, crashed = make_app(journal_dir='data/journal', bayesian=bayesian)
+    crashed.start_test('pre')
+    drive(master, crashed, respond, trials=5)
+    master.run(until=lambda: awaiting_input(crashed))
+    shown = crashed.sequence
+
+    master, resumed = make_app(journal_dir='data/journal', bayesian=bayesian)
+    resumed.start_test('pre')
+    assert resumed.session_id == crashed.session_id
+    assert summary(resumed.engine.trials) == summary(crashed.engine.trials)
+    drive(master, resumed, respond)
+    finish(master, resumed)
+    assert resumed.engine.trials[5].sequence == shown
+
+    headless = run_session(make_engine(False, resumed.engine.sequence_bank.seed, DEFAULT_PROTOCOL, bayesian=bayesian,
+                                       clock=FakeClock()), respond)
+    assert summary(resumed.engine.trials) == summary(headless.trials)
+
+    replayed = replay_journals('data/journal')
+    assert len(replayed) == 1
+    assert replayed.iloc[0]['finished'] and replayed.iloc[0]['matches']
+    assert replayed.iloc[0]['combined'] == headless.combined_score
+
+
+def test_resume_after_a_torn_journal_record(make_app):
+    respond = respond_up_to(5, 4)
+    master, crashed = make_app(journal_dir='data/journal')
+    crashed.start_test('pre')
+    drive(master, crashed, respond, trials=3)
+    crashed.journal.close()
+    path = journal_path('data/journal', '7', 'pre')
+    with open(path, 'ab') as f:
+        f.write(b'{"type":"trial","resp')
+
+    master, resumed = make_app(journal_dir='data/journal')
+    resumed.start_test('pre')
+    assert len(resumed.engine.trials) == 3
+    drive(master, resumed, respond, trials=5)
+    resumed.journal.close()
+    assert [record['type'] for record in read_journal(path)] == ['start'] + ['trial'] * 5
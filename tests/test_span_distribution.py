@@ -0,0 +1,36 @@
+import numpy as np
+from helpers import respond_up_to
+from sequence_bank import SequenceBank, MAX_SEQUENCE_LENGTH
+from span_distribution import expected_score, score_distribution
+from span_engine import DigitSpanEngine, FakeClock, run_session
+from span_simulator import LogisticRecallModel, simulate_sessions
+
+
+def test_deterministic_participants_have_a_point_mass_at_the_engine_score():
+    lengths = np.arange(MAX_SEQUENCE_LENGTH + 1)
+    engine = run_session(DigitSpanEngine(sequence_bank=SequenceBank(1), clock=FakeClock()), respond_up_to(6, 4))
+    dist = score_distribution((lengths <= 6).astype(float), (lengths <= 4).astype(float))
+    assert dist.forward[0, 6] == 1.0 and dist.backward[0, 4] == 1.0 and dist.combined[0, 10] == 1.0
+    assert dist.expected_trials[0] == len(engine.trials)
+
+
+def test_exact_distribution_matches_the_simulator():
+    rng = np.random.default_rng(0)
+    curves = LogisticRecallModel(6.0, slope=1.2)(rng, 1)[0]
+    backward = LogisticRecallModel(4.5, slope=1.2)(rng, 1)[0]
+    for practice_mode in (False, True):
+        dist = score_distribution(curves, backward, practice_mode=practice_mode)
+        sessions = simulate_sessions(200_000, curves, backward, practice_mode=practice_mode, seed=1)
+        for column, pmf in [('forward', dist.forward), ('backward', dist.backward), ('combined', dist.combined)]:
+            observed = np.bincount(sessions[column], minlength=pmf.shape[1]) / len(sessions)
+            assert np.allclose(observed, pmf[0], atol=0.005)
+        assert np.isclose(sessions['trials'].mean(), dist.expected_trials[0], rtol=0.01)
+        assert np.isclose(sessions['combined'].mean(), expected_score(dist.combined)[0], rtol=0.01)
+
+
+def test_every_pmf_sums_to_one():
+    curves = LogisticRecallModel(6.0, span_sd=2.0)(np.random.default_rng(2), 50)
+    dist = score_distribution(curves)
+    for pmf in (dist.forward, dist.backward, dist.combined):
+        assert pmf.shape[0] == 50
+        assert np.allclose(pmf.sum(axis=1), 1.0)
@@ -0,0 +1,50 @@
+from helpers import respond_up_to
+from sequence_bank import SequenceBank
+from span_engine import DigitSpanEngine, FakeClock, DEFAULT_PROTOCOL, run_session
+
+
+def test_staircase_scores_the_longest_passed_lengths():
+    engine = run_session(DigitSpanEngine(sequence_bank=SequenceBank(1), clock=FakeClock()), respond_up_to(6, 4))
+    assert engine.finished
+    assert (engine.max_forward_length, engine.max_backward_length, engine.combined_score) == (6, 4, 10)
+    lengths = [(trial.forward, trial.length) for trial in engine.trials]
+    # Every length is presented twice, up to the first failed length of each direction
+    expected = [(True, n) for n in range(DEFAULT_PROTOCOL.start_length, 8) for _ in range(2)]
+    expected += [(False, n) for n in range(DEFAULT_PROTOCOL.start_length, 6) for _ in range(2)]
+    assert lengths == expected
+
+
+def test_one_correct_attempt_passes_a_length():
+    engine = DigitSpanEngine(sequence_bank=SequenceBank(2), clock=FakeClock())
+    engine.next_stimulus()
+    engine.submit('wrong')
+    engine.next_stimulus()
+    engine.submit(engine.expected_response())
+    assert engine.max_forward_length == DEFAULT_PROTOCOL.start_length
+    assert engine.sequence_length == DEFAULT_PROTOCOL.start_length + 1
+
+
+def test_practice_stops_after_the_practice_length():
+    engine = run_session(DigitSpanEngine(practice_mode=True, sequence_bank=SequenceBank(3), clock=FakeClock()),
+                         respond_up_to(9, 9))
+    assert (engine.max_forward_length, engine.max_backward_length) == (DEFAULT_PROTOCOL.practice_max_length,) * 2
+
+
+def test_switching_to_backward_raises_the_notice_once():
+    engine = DigitSpanEngine(sequence_bank=SequenceBank(4), clock=FakeClock())
+    for _ in range(DEFAULT_PROTOCOL.attempts):
+        engine.next_stimulus()
+        engine.submit('x')
+    assert engine.notice_pending and not engine.forward
+    engine.next_stimulus()
+    assert not engine.notice_pending
+
+
+def test_fake_clock_times_the_trials():
+    clock = FakeClock(start_ns=5)
+    engine = DigitSpanEngine(sequence_bank=SequenceBank(5), clock=clock)
+    engine.next_stimulus()
+    clock.advance(1234.5)
+    engine.submit(engine.expected_response())
+    trial = engine.trials[-1]
+    assert (trial.presented_ns, trial.responded_ns) == (5, 5 + 1_234_500_000)
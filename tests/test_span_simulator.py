@@ -0,0 +1,38 @@
+import numpy as np
+from helpers import respond_up_to
+from sequence_bank import SequenceBank, MAX_SEQUENCE_LENGTH
+from span_engine import DigitSpanEngine, FakeClock, run_session
+from span_simulator import LogisticRecallModel, simulate_sessions
+
+
+def step_curve(span):
+    """
+    Returns the recall curve of a participant who recalls every length up to their span and none beyond it.
+    """
+    return (np.arange(MAX_SEQUENCE_LENGTH + 1) <= span).astype(float)
+
+
+def test_deterministic_participants_match_the_engine():
+    for forward_span, backward_span, practice_mode in [(6, 4, False), (2, 9, False), (15, 0, False), (9, 2, True)]:
+        engine = run_session(DigitSpanEngine(practice_mode=practice_mode, sequence_bank=SequenceBank(1),
+                                             clock=FakeClock()), respond_up_to(forward_span, backward_span))
+        sessions = simulate_sessions(3, step_curve(forward_span), step_curve(backward_span),
+                                     practice_mode=practice_mode, seed=0)
+        assert sessions['forward'].tolist() == [engine.max_forward_length] * 3
+        assert sessions['backward'].tolist() == [engine.max_backward_length] * 3
+        assert sessions['trials'].tolist() == [len(engine.trials)] * 3
+
+
+def test_chunks_and_seeds_are_reproducible():
+    model = LogisticRecallModel(6.0, span_sd=1.5)
+    whole = simulate_sessions(1000, model, seed=5)
+    chunked = simulate_sessions(1000, model, seed=5, chunk_size=300)
+    assert whole.equals(simulate_sessions(1000, model, seed=5))
+    assert len(chunked) == 1000
+    assert not whole.equals(simulate_sessions(1000, model, seed=6))
+
+
+def test_per_participant_curves_follow_their_participants():
+    curves = np.stack([step_curve(span) for span in [3, 5, 7, 9]])
+    sessions = simulate_sessions(4, curves, seed=0, chunk_size=3)
+    assert sessions['forward'].tolist() == [3, 5, 7, 9]
@@ -0,0 +1,64 @@
+import numpy as np
+from fake_tk import FakeMaster
+from span_engine import FakeClock
+from stimulus_scheduler import StimulusScheduler, jitter_stats
+
+
+def run_scheduler(master, scheduler, events):
+    scheduler.run(events)
+    master.run()
+    return scheduler
+
+
+def test_scheduler_fires_on_target():
+    master = FakeMaster()
+    scheduler = run_scheduler(master, StimulusScheduler(master, clock=master.clock),
+                              [(idx * 1000, lambda: None) for idx in range(4)])
+    assert scheduler.targets == [idx * 1_000_000_000 for idx in range(4)]
+    assert list(scheduler.lateness_ns()) == [0] * 4
+
+
+def test_scheduler_does_not_carry_lag_forward():
+    master = FakeMaster()
+
+    def slow_redraw():
+        # The event loop is busy for 30 ms after this event fires
+        master.now_ms += 30
+
+    scheduler = run_scheduler(master, StimulusScheduler(master, clock=master.clock),
+                              [(0, slow_redraw), (1000, lambda: None), (2000, lambda: None)])
+    assert list(scheduler.lateness_ns()) == [30_000_000, 0, 0]
+    assert list(scheduler.render_ns) == [30_000_000, 0, 0]
+
+
+def test_scheduler_rearms_an_early_event():
+    master = FakeMaster()
+    clock = FakeClock()
+    scheduler = StimulusScheduler(master, clock=clock)
+    fired = []
+    scheduler.run([(1000, fired.append, 'digit')])
+    # Tk fires the timer 2 ms early, beyond the tolerance; the event must wait for its target
+    clock.advance(998)
+    master.run(max_events=1)
+    assert fired == [] and scheduler.pending is not None
+    clock.advance(2)
+    master.run()
+    assert fired == ['digit']
+    assert list(scheduler.lateness_ns()) == [0]
+
+
+def test_cancel_stops_a_running_series():
+    master = FakeMaster()
+    scheduler = StimulusScheduler(master, clock=master.clock)
+    fired = []
+    scheduler.run([(0, fired.append, 1), (1000, fired.append, 2)], on_complete=fired.append)
+    master.run(max_events=1)
+    scheduler.cancel()
+    master.run()
+    assert fired == [1]
+
+
+def test_jitter_stats():
+    stats = jitter_stats([1_000_000, 3_000_000, 2_000_000])
+    assert stats == {'n': 3, 'mean_ms': 2.0, 'sd_ms': 1.0, 'max_ms': 3.0}
+    assert jitter_stats([])['n'] == 0 and np.isnan(jitter_stats([])['mean_ms'])
@@ -0,0 +1,87 @@
+import os
+import pytest
+from fake_tk import drive, finish
+from helpers import respond_up_to
+from trial_log import (TrialLog, MAX_PACKED_DIGITS, TRIAL_STRUCT, diverged_at, pack_digits, read_keystrokes,
+                       read_trials, unpack_digits)
+
+
+@pytest.mark.parametrize('expected, response, position', [('3947', '3947', None), ('3947', '3917', 2),
+                                                           ('3947', '39', 2), ('3947', '39471', 4), ('3947', '', 0)])
+def test_diverged_at(expected, response, position):
+    assert diverged_at(expected, response) == position
+
+
+def test_read_trials_reports_where_responses_diverged(tmp_path):
+    path = str(tmp_path / 'trials.bin')
+    log = TrialLog(path)
+    session_id = log.start_session('7', 'pre', 42)
+    log.log_trial(session_id, True, '3947', '3947', True, 0, 1, 2)
+    log.log_trial(session_id, True, '3947', '391', False, 1, 3, 4, aborted=True)
+    log.log_trial(session_id, False, '582', '28', False, 0, 5, 6)
+    log.flush()
+    trials = read_trials(path)
+    assert list(trials['diverged_at']) == [-1, 2, 2]
+    assert list(trials['correct_prefix']) == [4, 2, 2]
+    assert list(trials['aborted']) == [False, True, False]
+
+
+def test_digits_pack_and_unpack():
+    assert unpack_digits(pack_digits('0123456789'), 10) == '0123456789'
+    assert unpack_digits(pack_digits('12a4'), 4) == '12?4'
+    assert unpack_digits(pack_digits('9' * 20), 20) == '9' * MAX_PACKED_DIGITS
+
+
+def test_trials_round_trip(tmp_path):
+    path = str(tmp_path / 'trials.bin')
+    log = TrialLog(path, flush_every=2)
+    first = log.start_session('7', 'pre', 42, session_id=1)
+    second = log.start_session('8', 'practice', 43, session_id=2)
+    log.log_trial(first, True, ['3', '9', '4'], '394', True, 0, 100, 200)
+    assert not os.path.exists(path)
+    log.log_trial(second, False, ['5', '8'], '58', False, 1, 300, 400)
+    # The second record filled the buffer and was written with the first
+    assert os.path.getsize(path) == 2 * TRIAL_STRUCT.size
+    log.log_trial(first, True, ['1', '2', '3', '4'], '1243', False, 1, 500, 600)
+    log.flush()
+
+    trials = read_trials(path)
+    assert list(trials['session_id']) == [1, 2, 1]
+    assert list(trials['user_id']) == ['7', '8', '7']
+    assert list(trials['test_type']) == ['pre', 'practice', 'pre']
+    assert list(trials['seed']) == ['42', '43', '42']
+    assert list(trials['direction'].astype(str)) == ['forward', 'backward', 'forward']
+    assert list(trials['sequence']) == ['394', '58', '1234']
+    assert list(trials['response']) == ['394', '58', '1243']
+    assert list(trials['correct']) == [True, False, False]
+    assert list(trials['attempt']) == [0, 1, 1]
+    assert list(trials['presented_ns']) == [100, 300, 500]
+    assert list(trials['responded_ns']) == [200, 400, 600]
+
+
+def test_gui_logs_every_trial(make_app, tmp_path):
+    master, app = make_app()
+    app.start_test('pre')
+    drive(master, app, respond_up_to(5, 4))
+    finish(master, app)
+    app.trial_log.flush()
+    logged = read_trials(str(tmp_path / 'trials.bin'))
+    assert len(logged) == len(app.engine.trials)
+    assert list(logged['sequence']) == [''.join(trial.sequence) for trial in app.engine.trials]
+    assert list(logged['correct']) == [trial.correct for trial in app.engine.trials]
+    assert set(logged['session_id']) == {app.session_id}
+
+
+def test_keystrokes_round_trip(tmp_path):
+    path = str(tmp_path / 'trials.bin')
+    log = TrialLog(path)
+    log.log_trial(1, True, '12', '12', True, 0, 100, 200,
+                  keystrokes=[('1', 100), ('2', 350), ('\U0001F600', 500)], submitted_ns=800)
+    log.flush()
+    trials = read_trials(path)
+    assert (trials['first_key_ns'].iat[0], trials['entry_ns'].iat[0]) == (100, 700)
+    keys = read_keystrokes(path)
+    # A character beyond the 16-bit field is stored as none
+    assert list(keys['char']) == ['1', '2', '']
+    assert list(keys['time_ns']) == [100, 350, 500]
+    assert list(keys['interval_ns'].fillna(-1)) == [-1, 250, 150]
@@ -0,0 +1,124 @@
+import asyncio
+import functools
+import json
+import pytest
+import web_test
+from collector import RejectedError
+from result_writer import ResultWriter, Result, save_result
+from trial_log import read_trials
+from web_test import WebTestServer
+
+
+async def request(port, method, path, body=None, headers=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    data = b'' if body is None else json.dumps(body).encode()
+    if headers is None:
+        headers = {'Content-Length': str(len(data))}
+    head = ''.join(f"{name}: {value}\r\n" for name, value in headers.items())
+    writer.write(f"{method} {path} HTTP/1.1\r\n{head}Connection: close\r\n\r\n".encode() + data)
+    raw = await reader.read()
+    writer.close()
+    status_line, _, payload = raw.partition(b'\r\n\r\n')
+    return int(status_line.split()[1]), payload
+
+
+async def post(port, path, body):
+    status, payload = await request(port, 'POST', path, body)
+    return status, json.loads(payload)
+
+
+@pytest.fixture
+def serve(tmp_path, monkeypatch):
+    monkeypatch.setattr(web_test, 'ResultWriter', functools.partial(ResultWriter, spool_dir=str(tmp_path / 'spool')))
+
+    def run(check):
+        async def main():
+            server = WebTestServer(data_dir=str(tmp_path), trial_log_path=str(tmp_path / 'trials.bin'))
+            port = await server.start('127.0.0.1', 0)
+            try:
+                await check(server, port)
+            finally:
+                await server.stop()
+        asyncio.run(main())
+    return run
+
+
+def answer(stimulus, forward_span=5, backward_span=4):
+    sequence = stimulus['sequence'] if stimulus['forward'] else stimulus['sequence'][::-1]
+    return sequence if len(sequence) <= (forward_span if stimulus['forward'] else backward_span) else '0'
+
+
+def test_session_runs_to_the_saved_result(serve, tmp_path):
+    async def check(server, port):
+        status, stimulus = await post(port, '/api/sessions', {'user_id': '7', 'test_type': 'pre'})
+        assert status == 200
+        token = stimulus['token']
+        trials = 0
+        while not stimulus.get('finished'):
+            assert stimulus['trial'] == trials
+            status, stimulus = await post(port, f'/api/sessions/{token}/responses',
+                                          {'trial': stimulus['trial'], 'response': answer(stimulus),
+                                           'keys_ms': [['1', 120.5]], 'submitted_ms': 300})
+            assert status == 200
+            trials += 1
+        assert (stimulus['forward'], stimulus['backward'], stimulus['combined'], stimulus['note']) == (5, 4, 9, '')
+        assert token not in server.sessions
+        server.trial_log.flush()
+        assert len(read_trials(str(tmp_path / 'trials.bin'))) == trials
+
+    serve(check)
+    assert (tmp_path / '7_pre_test.txt').read_text() == '5,4,9\n'
+
+
+@pytest.mark.parametrize('user_id', ['../../x', 'seven', ''])
+def test_non_numeric_ids_are_refused(serve, tmp_path, user_id):
+    async def check(server, port):
+        status, reply = await post(port, '/api/sessions', {'user_id': user_id, 'test_type': 'pre'})
+        assert status == 400 and not server.sessions
+
+    serve(check)
+
+
+def test_text_backend_refuses_ids_naming_other_paths(tmp_path):
+    with pytest.raises(RejectedError):
+        save_result(Result('../x', 'pre', 5, 4, 9), data_dir=str(tmp_path))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_repeated_response_is_not_scored_again(serve):
+    async def check(server, port):
+        _, stimulus = await post(port, '/api/sessions', {'user_id': '7', 'test_type': 'pre'})
+        path = f"/api/sessions/{stimulus['token']}/responses"
+        response = {'trial': stimulus['trial'], 'response': answer(stimulus)}
+        assert (await post(port, path, response))[0] == 200
+        status, reply = await post(port, path, response)
+        assert status == 409
+        assert (await post(port, path, {'response': answer(stimulus)}))[0] == 409
+        assert len(server.sessions[stimulus['token']].engine.trials) == 1
+
+    serve(check)
+
+
+def test_malformed_timing_does_not_consume_the_trial(serve):
+    async def check(server, port):
+        _, stimulus = await post(port, '/api/sessions', {'user_id': '7', 'test_type': 'pre'})
+        status, _ = await post(port, f"/api/sessions/{stimulus['token']}/responses",
+                               {'trial': 0, 'response': '1', 'keys_ms': [['1', 'soon']]})
+        assert status == 400
+        assert server.sessions[stimulus['token']].engine.trials == []
+
+    serve(check)
+
+
+@pytest.mark.parametrize('length', ['abc', '-5'])
+def test_invalid_content_length_is_a_bad_request(serve, length):
+    async def check(server, port):
+        status, payload = await request(port, 'POST', '/api/sessions', headers={'Content-Length': length})
+        assert status == 400 and b'Content-Length' in payload
+
+    serve(check)
+
+
+def test_page_does_not_record_the_submitting_enter():
+    handler = web_test.PAGE[web_test.PAGE.index("$('response').addEventListener"):web_test.PAGE.index("function finish")]
+    assert handler.index("if (e.key !== 'Enter')") < handler.index("keys.push")
@@ -0,0 +1,325 @@
+import os
+import time
+import struct
+import numpy as np
+import pandas as pd
+
+# Trial log written by DigitSpanTest, one fixed-width record per trial
+TRIAL_LOG_FILENAME = 'trials.bin'
+
+# Sessions index next to the trial log: session_id,user_id,test_type,seed
+SESSIONS_SUFFIX = '.sessions.csv'
+
+# Per-digit presentation timing next to the trial log
+ONSETS_SUFFIX = '.onsets'
+
+# Per-keystroke response timing next to the trial log
+KEYS_SUFFIX = '.keys'
+
+# Digits are packed 4 bits each into a uint64, first digit in the lowest nibble
+MAX_PACKED_DIGITS = 16
+NON_DIGIT_NIBBLE = 0xF
+
+# session id, direction (0 = forward, 1 = backward), length, attempt index, correct flag,
+# response length, divergence (1 + index of the first wrong character, 0 if none), aborted flag,
+# packed sequence, packed response, presentation time, response time (unix ns),
+# first-key latency from the input prompt and entry time from first key to Return (monotonic ns, -1 if no key)
+TRIAL_STRUCT = struct.Struct('<qBBBBBBBxQQqqqq')
+TRIAL_DTYPE = np.dtype([('session_id', '<i8'), ('direction', 'u1'), ('length', 'u1'), ('attempt', 'u1'),
+                        ('correct', 'u1'), ('response_length', 'u1'), ('divergence', 'u1'), ('aborted', 'u1'),
+                        ('pad', 'V1'), ('sequence', '<u8'),
+                        ('response', '<u8'), ('presented_ns', '<i8'), ('responded_ns', '<i8'),
+                        ('first_key_ns', '<i8'), ('entry_ns', '<i8')])
+
+# session id, presentation time of the trial (unix ns, joins with the trial record), digit index,
+# target onset, actual onset and actual offset (monotonic ns relative to the start of the trial),
+# frame-update latency from the scheduled callback firing until the digit was drawn (ns)
+ONSET_STRUCT = struct.Struct('<qqBxxxxxxxqqqq')
+ONSET_DTYPE = np.dtype([('session_id', '<i8'), ('presented_ns', '<i8'), ('digit', 'u1'), ('pad', 'V7'),
+                        ('target_ns', '<i8'), ('onset_ns', '<i8'), ('offset_ns', '<i8'), ('render_ns', '<i8')])
+
+# session id, presentation time of the trial, keystroke index, character code (0 if none or beyond
+# 0xFFFF, which the 16-bit field cannot hold), time of the keystroke (monotonic ns relative to the input prompt)
+KEY_STRUCT = struct.Struct('<qqHHxxxxq')
+KEY_DTYPE = np.dtype([('session_id', '<i8'), ('presented_ns', '<i8'), ('index', '<u2'), ('char', '<u2'),
+                      ('pad', 'V4'), ('time_ns', '<i8')])
+
+# Records buffered in memory before they are written out
+DEFAULT_FLUSH_EVERY = 16
+
+
+def pack_digits(digits):
+    """
+    Packs a digit string into a uint64, 4 bits per digit.
+
+    Characters other than 0-9 are stored as 0xF and anything beyond
+    MAX_PACKED_DIGITS characters is dropped.
+
+    Args:
+    - digits (str or list): The digits to pack.
+
+    Returns:
+    - int: The packed value.
+    """
+    packed = 0
+    for idx, char in enumerate(list(digits)[:MAX_PACKED_DIGITS]):
+        nibble = int(char) if len(char) == 1 and char.isdigit() else NON_DIGIT_NIBBLE
+        packed |= nibble << (4 * idx)
+    return packed
+
+
+def unpack_digits(packed, length):
+    """
+    Unpacks a value produced by pack_digits.
+
+    Args:
+    - packed (int): The packed value.
+    - length (int): The number of digits to unpack.
+
+    Returns:
+    - str: The digits, with '?' for characters that were not 0-9.
+    """
+    chars = []
+    for idx in range(min(length, MAX_PACKED_DIGITS)):
+        nibble = (int(packed) >> (4 * idx)) & 0xF
+        chars.append('?' if nibble == NON_DIGIT_NIBBLE else str(nibble))
+    return ''.join(chars)
+
+
+def diverged_at(expected, response):
+    """
+    Returns where a response first departs from the expected response.
+
+    Args:
+    - expected (str): The correct response.
+    - response (str): The typed response.
+
+    Returns:
+    - int or None: The index of the first wrong character (the length of the
+      shorter string if one is a prefix of the other), or None if they are equal.
+    """
+    if response == expected:
+        return None
+    for idx, (want, got) in enumerate(zip(expected, response)):
+        if want != got:
+            return idx
+    return min(len(expected), len(response))
+
+
+class TrialLog:
+    """
+    An append-only log of every trial presented by DigitSpanTest.
+
+    Records are buffered in memory and written with one append per flush, so
+    logging a trial costs a struct.pack on the Tk thread.
+
+    Attributes:
+    - path: the path of the trial log
+    - flush_every: the number of buffered records that triggers a flush
+    - buffer: the packed trial records not yet written
+    - onset_buffer: the packed onset records not yet written
+    - key_buffer: the packed keystroke records not yet written
+    """
+    def __init__(self, path, flush_every=DEFAULT_FLUSH_EVERY):
+        """
+        Initializes the TrialLog object.
+
+        Args:
+        - path: the path of the trial log
+        - flush_every: the number of buffered records that triggers a flush (default 16)
+        """
+        self.path = path
+        self.flush_every = flush_every
+        self.buffer = []
+        self.onset_buffer = []
+        self.key_buffer = []
+
+    def start_session(self, user_id, test_type, seed='', session_id=None):
+        """
+        Registers a new session in the sessions index.
+
+        Args:
+        - user_id: the participant ID
+        - test_type: 'pre', 'post' or 'practice'
+        - seed: the seed of the session's sequence bank (default none)
+        - session_id: the id of the session (default None, the current time in ns)
+
+        Returns:
+        - int: the session id to pass to log_trial
+        """
+        if session_id is None:
+            session_id = time.time_ns()
+        with open(self.path + SESSIONS_SUFFIX, 'a') as f:
+            f.write(f"{session_id},{user_id},{test_type},{seed}\n")
+        return session_id
+
+    def log_trial(self, session_id, forward, sequence, response, correct, attempt, presented_ns, responded_ns,
+                  keystrokes=(), submitted_ns=None, aborted=False):
+        """
+        Buffers one trial and flushes when the buffer is full.
+
+        Args:
+        - session_id: the id returned by start_session
+        - forward: whether the trial was a forward trial
+        - sequence: the presented digits
+        - response: the typed response
+        - correct: whether the response was correct
+        - attempt: the attempt index at this sequence length
+        - presented_ns: the unix time in ns at which the sequence started
+        - responded_ns: the unix time in ns at which the response was submitted
+        - keystrokes: (char, time_ns) pairs with times relative to the input prompt (default none)
+        - submitted_ns: the time Return was pressed, relative to the input prompt (default None)
+        - aborted: whether the trial was ended at the first wrong keystroke (default False)
+        """
+        first_key_ns = entry_ns = -1
+        if keystrokes:
+            first_key_ns = keystrokes[0][1]
+            if submitted_ns is not None:
+                entry_ns = submitted_ns - first_key_ns
+        expected = ''.join(sequence) if forward else ''.join(sequence)[::-1]
+        divergence = diverged_at(expected, response)
+        self.buffer.append(TRIAL_STRUCT.pack(
+            session_id, 0 if forward else 1, len(sequence), attempt, int(correct),
+            min(len(response), 255), 0 if divergence is None else min(divergence + 1, 255), int(aborted),
+            pack_digits(sequence), pack_digits(response),
+            presented_ns, responded_ns, first_key_ns, entry_ns))
+        for idx, (char, time_ns) in enumerate(keystrokes):
+            self.key_buffer.append(KEY_STRUCT.pack(
+                session_id, presented_ns, idx, ord(char) if len(char) == 1 and ord(char) <= 0xFFFF else 0, time_ns))
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+
+    def log_onsets(self, session_id, presented_ns, targets, onsets, render_ns):
+        """
+        Buffers the measured presentation timing of one trial.
+
+        The last event of a trial is the input prompt, which is the offset of the
+        last digit.
+
+        Args:
+        - session_id: the id returned by start_session
+        - presented_ns: the presentation time passed to log_trial for the same trial
+        - targets: the target onset of each event, in ns relative to the start of the trial
+        - onsets: the actual onset of each event, in ns relative to the start of the trial
+        - render_ns: the frame-update latency of each event, in ns
+        """
+        for digit in range(len(onsets) - 1):
+            self.onset_buffer.append(ONSET_STRUCT.pack(
+                session_id, presented_ns, digit, targets[digit], onsets[digit], onsets[digit + 1], render_ns[digit]))
+
+    def flush(self):
+        """
+        Writes all buffered records with a single append per file.
+        """
+        for path, records in [(self.path, self.buffer), (self.path + ONSETS_SUFFIX, self.onset_buffer),
+                              (self.path + KEYS_SUFFIX, self.key_buffer)]:
+            if not records:
+                continue
+            payload = b''.join(records)
+            records.clear()
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, payload)
+            finally:
+                os.close(fd)
+
+
+def read_trials(path):
+    """
+    Loads a trial log into a DataFrame, joined with its sessions index.
+
+    Args:
+    - path (str): The trial log path.
+
+    Returns:
+    - pd.DataFrame: One row per trial with unpacked sequence and response strings, the
+      index of the first wrong character (diverged_at, -1 if correct) and the number of
+      leading characters typed correctly (correct_prefix).
+    """
+    count = os.path.getsize(path) // TRIAL_DTYPE.itemsize
+    records = np.fromfile(path, dtype=TRIAL_DTYPE, count=count)
+
+    df = pd.DataFrame({name: records[name] for name in TRIAL_DTYPE.names if name not in ('pad', 'divergence')})
+    df['direction'] = pd.Categorical.from_codes(df['direction'].astype('int8'), categories=['forward', 'backward'])
+    df['correct'] = df['correct'].astype(bool)
+    df['sequence'] = [unpack_digits(p, n) for p, n in zip(records['sequence'], records['length'])]
+    df['response'] = [unpack_digits(p, n) for p, n in zip(records['response'], records['response_length'])]
+    df['aborted'] = df['aborted'].astype(bool)
+    df['diverged_at'] = records['divergence'].astype(np.int16) - 1
+    df['correct_prefix'] = np.where(df['diverged_at'] >= 0, df['diverged_at'], df['length'])
+
+    sessions_path = path + SESSIONS_SUFFIX
+    if os.path.exists(sessions_path):
+        sessions = pd.read_csv(sessions_path, names=['session_id', 'user_id', 'test_type', 'seed'],
+                               dtype={'user_id': str, 'seed': str})
+        df = df.merge(sessions, on='session_id', how='left')
+    return df
+
+
+def read_onsets(path):
+    """
+    Loads the per-digit presentation timing written next to a trial log.
+
+    Args:
+    - path (str): The trial log path.
+
+    Returns:
+    - pd.DataFrame: One row per presented digit, with lateness_ns and duration_ns columns.
+    """
+    onsets_path = path + ONSETS_SUFFIX
+    count = os.path.getsize(onsets_path) // ONSET_DTYPE.itemsize
+    records = np.fromfile(onsets_path, dtype=ONSET_DTYPE, count=count)
+
+    df = pd.DataFrame({name: records[name] for name in ONSET_DTYPE.names if name != 'pad'})
+    df['lateness_ns'] = df['onset_ns'] - df['target_ns']
+    df['duration_ns'] = df['offset_ns'] - df['onset_ns']
+    return df
+
+
+def onset_jitter(path, digit_duration_ms=1000):
+    """
+    Summarises stimulus-timing accuracy per session.
+
+    Args:
+    - path (str): The trial log path.
+    - digit_duration_ms (int): The intended presentation time of one digit (default 1000).
+
+    Returns:
+    - pd.DataFrame: Per session the number of digits, mean/sd/max onset lateness,
+      mean absolute duration error and mean/max frame-update latency, all in ms.
+    """
+    df = read_onsets(path)
+    df['lateness_ms'] = df['lateness_ns'] / 1e6
+    df['duration_error_ms'] = (df['duration_ns'] / 1e6 - digit_duration_ms).abs()
+    df['render_ms'] = df['render_ns'] / 1e6
+    grouped = df.groupby('session_id')
+    return pd.DataFrame({
+        'n': grouped.size(),
+        'mean_lateness_ms': grouped['lateness_ms'].mean(),
+        'sd_lateness_ms': grouped['lateness_ms'].std(),
+        'max_lateness_ms': grouped['lateness_ms'].max(),
+        'mean_duration_error_ms': grouped['duration_error_ms'].mean(),
+        'mean_render_ms': grouped['render_ms'].mean(),
+        'max_render_ms': grouped['render_ms'].max(),
+    }).reset_index()
+
+
+def read_keystrokes(path):
+    """
+    Loads the per-keystroke response timing written next to a trial log.
+
+    Args:
+    - path (str): The trial log path.
+
+    Returns:
+    - pd.DataFrame: One row per keystroke with the typed character and the
+      interval to the previous keystroke of the same trial (NaN for the first).
+    """
+    keys_path = path + KEYS_SUFFIX
+    count = os.path.getsize(keys_path) // KEY_DTYPE.itemsize
+    records = np.fromfile(keys_path, dtype=KEY_DTYPE, count=count)
+
+    df = pd.DataFrame({name: records[name] for name in KEY_DTYPE.names if name not in ('pad', 'char')})
+    df['char'] = [chr(code) if code else '' for code in records['char']]
+    df['interval_ns'] = df.groupby(['session_id', 'presented_ns'])['time_ns'].diff()
+    return df
@@ -0,0 +1,497 @@
+import json
+import time
+import secrets
+import asyncio
+import argparse
+from span_engine import DEFAULT_PROTOCOL
+from session_journal import make_engine
+from result_writer import ResultWriter, Result, save_result, SPOOLED, FAILED, REJECTED
+from collector import parse_address
+from trial_log import TrialLog
+
+# Address the server listens on by default
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+
+# Sessions without a request for this long are dropped, in seconds
+IDLE_TIMEOUT = 30 * 60
+PRUNE_INTERVAL = 60
+
+# Largest request body accepted, in bytes
+MAX_BODY = 64 * 1024
+
+# Seconds between checks for results saved by the result writer
+SAVE_POLL_INTERVAL = 0.05
+
+TEST_TYPES = ('pre', 'post', 'practice')
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 409: 'Conflict',
+                413: 'Payload Too Large'}
+
+# The browser client. Digits are timed on the client against performance.now(), and each
+# response reports when every digit and the input prompt were actually drawn.
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Digit Span Test for Working Memory Evaluation</title>
+<style>
+body { background: #FDF5E6; color: darkblue; font-family: Arial; text-align: center; margin-top: 15vh; }
+#digit { font: 160px Times; }
+.hidden { display: none; }
+button { font-size: 24px; background: #4682B4; margin: 1em; }
+input { font-size: 32px; }
+</style></head>
+<body>
+<div id="id-screen"><p style="font-size: 26px">Please enter your ID:</p><input id="user-id" autofocus></div>
+<div id="intro" class="hidden">
+<h1 style="font-size: 52px">Digit Span Test for Working Memory Evaluation</h1>
+<p style="font-size: 26px">This is a Digit Span Test that evaluates working memory performance.<br>
+Try to remember the digits in the order they are presented and<br>repeat them once the sequence has stopped.<br>
+Choose if you'd like to start the test or practice first.</p>
+<button data-type="practice">Practice</button><button data-type="pre">Start Pre-test</button><button data-type="post">Start Post-test</button>
+</div>
+<div id="digit" class="hidden"></div>
+<div id="notice" class="hidden" style="font-size: 26px">Now, input the numbers backwards.</div>
+<div id="input" class="hidden"><p id="prompt" style="font-size: 26px"></p><input id="response"></div>
+<div id="results" class="hidden" style="font-size: 22px"></div>
+<script>
+let session = null, protocol = null, stimulus = null, onsets = [], keys = [], promptAt = 0, submitting = false;
+const $ = id => document.getElementById(id);
+function show(id) {
+  for (const s of ['id-screen', 'intro', 'digit', 'notice', 'input', 'results']) $(s).classList.toggle('hidden', s !== id);
+}
+async function post(path, body) {
+  const r = await fetch(path, {method: 'POST', headers: {'Content-Type': 'application/json'}, body: JSON.stringify(body)});
+  const data = await r.json();
+  if (!r.ok) throw new Error(data.error);
+  return data;
+}
+$('user-id').addEventListener('keydown', e => {
+  if (e.key === 'Enter' && $('user-id').value.trim()) show('intro');
+});
+for (const b of document.querySelectorAll('#intro button')) {
+  b.onclick = async () => {
+    const data = await post('/api/sessions', {user_id: $('user-id').value.trim(), test_type: b.dataset.type});
+    session = data.token; protocol = data.protocol;
+    next(data);
+  };
+}
+function next(data) {
+  if (data.finished) return finish(data);
+  stimulus = data;
+  if (data.notice) { show('notice'); setTimeout(present, protocol.notice_ms); } else present();
+}
+function present() {
+  // Each digit is drawn on the first frame at or after its target, relative to the first frame
+  const digits = stimulus.sequence.split('');
+  onsets = [];
+  show('digit');
+  let start = null;
+  function frame(now) {
+    if (start === null) start = now;
+    const due = Math.floor((now - start) / protocol.digit_ms);
+    if (due > onsets.length - 1 && onsets.length < digits.length) {
+      $('digit').textContent = digits[onsets.length];
+      onsets.push(now - start);
+    } else if (due >= digits.length) {
+      onsets.push(now - start);
+      return prompt();
+    }
+    requestAnimationFrame(frame);
+  }
+  requestAnimationFrame(frame);
+}
+function prompt() {
+  $('prompt').textContent = stimulus.forward ? 'Input the numbers forwards:' : 'Input the numbers backwards:';
+  $('response').value = '';
+  show('input');
+  $('response').focus();
+  keys = [];
+  promptAt = performance.now();
+}
+$('response').addEventListener('keydown', async e => {
+  if (submitting) return;
+  // As in the Tk app, the submitting Enter is not a keystroke of the response
+  if (e.key !== 'Enter') {
+    keys.push([e.key.length === 1 ? e.key : '', performance.now() - promptAt]);
+    return;
+  }
+  const submitted = performance.now() - promptAt;
+  // Ignore further keys, and a second Enter, until the server has answered
+  submitting = true;
+  try {
+    next(await post('/api/sessions/' + session + '/responses',
+                    {trial: stimulus.trial, response: $('response').value, onsets_ms: onsets, keys_ms: keys,
+                     submitted_ms: submitted}));
+  } finally {
+    submitting = false;
+  }
+});
+function finish(data) {
+  const lines = [`Test complete, ${$('user-id').value}!`, `Max Forward Length: ${data.forward}`,
+                 `Max Backward Length: ${data.backward}`, `Combined Test Score: ${data.combined}`, data.note];
+  $('results').replaceChildren(...lines.map(text => {
+    const p = document.createElement('p');
+    p.textContent = text;
+    return p;
+  }));
+  show('results');
+  if (data.practice) setTimeout(() => show('intro'), 4000);
+}
+</script></body></html>
+"""
+
+
+class HTTPError(Exception):
+    """
+    An error answered with a JSON body {"error": message}.
+
+    Attributes:
+    - status: the HTTP status code
+    """
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class WebSession:
+    """
+    The server-side state of one browser session.
+
+    Attributes:
+    - engine: the engine running the session's procedure
+    - user_id: the participant ID
+    - test_type: 'pre', 'post' or 'practice'
+    - session_id: the numeric id of the session, as in the trial log and the collector
+    - presented_ns: the unix time in ns at which the current sequence was sent
+    - last_seen: the monotonic time of the session's last request
+    """
+    def __init__(self, engine, user_id, test_type, session_id):
+        self.engine = engine
+        self.user_id = user_id
+        self.test_type = test_type
+        self.session_id = session_id
+        self.presented_ns = None
+        self.last_seen = time.monotonic()
+
+
+class WebTestServer:
+    """
+    Serves the digit span test to many browsers from one asyncio process.
+
+    The procedure runs on the server in the same engines as DigitSpanTest, one
+    per session, while the browser only presents the digits it is sent and
+    reports the response with its drawing and keystroke timing. Each trial is
+    one JSON request over a keep-alive HTTP/1.1 connection. Scores are saved
+    with the same backends as DigitSpanTest, off the event loop.
+
+    Attributes:
+    - store_path: the path of the consolidated score store, or None
+    - db_path: the path of the SQLite score database, or None
+    - collector: the (host, port) of a result collector, or None
+    - data_dir: the directory of the per-session text files
+    - trial_log: the TrialLog receiving every trial, or None
+    - protocol: the Protocol of the procedure
+    - bayesian: whether sessions use the BayesianSpanEngine
+    - no_runs: whether runs of three digits are forbidden
+    - balanced: whether digit frequencies are balanced within each sequence
+    - sessions: the active WebSessions keyed by their URL token
+    """
+    def __init__(self, store_path=None, db_path=None, collector=None, data_dir='data', trial_log_path=None,
+                 protocol=DEFAULT_PROTOCOL, bayesian=False, no_runs=False, balanced=False):
+        """
+        Initializes the WebTestServer object.
+
+        Args:
+        - store_path: the path of the consolidated score store (default None)
+        - db_path: the path of the SQLite score database (default None)
+        - collector: the (host, port) of a result collector (default None)
+        - data_dir: the directory of the per-session text files (default data)
+        - trial_log_path: the path of the trial log (default None, no trial logging)
+        - protocol: the Protocol of the procedure (default DEFAULT_PROTOCOL)
+        - bayesian: whether to use the BayesianSpanEngine (default False)
+        - no_runs: whether to forbid runs of three digits (default False)
+        - balanced: whether to balance digit frequencies within each sequence (default False)
+        """
+        self.store_path = store_path
+        self.db_path = db_path
+        self.collector = collector
+        self.data_dir = data_dir
+        self.trial_log = TrialLog(trial_log_path) if trial_log_path else None
+        self.protocol = protocol
+        self.bayesian = bayesian
+        self.no_runs = no_runs
+        self.balanced = balanced
+        self.sessions = {}
+        self.last_session_id = 0
+        self.result_writer = ResultWriter(lambda result: save_result(result, store_path, db_path, collector, data_dir))
+        self.saving = {}
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Starts listening.
+
+        Args:
+        - host: the interface to listen on (default 127.0.0.1)
+        - port: the port to listen on, 0 for any free port (default 8080)
+
+        Returns:
+        - int: the port listened on
+        """
+        self.server = await asyncio.start_server(self._handle, host, port)
+        self.pruner = asyncio.create_task(self._prune())
+        self.saver = asyncio.create_task(self._collect_saved())
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """
+        Stops listening, finishes pending writes and flushes the trial log.
+        """
+        self.pruner.cancel()
+        self.server.close()
+        await self.server.wait_closed()
+        self.saver.cancel()
+        await asyncio.get_running_loop().run_in_executor(None, self.result_writer.close)
+        if self.trial_log:
+            self.trial_log.flush()
+
+    async def _prune(self):
+        while True:
+            await asyncio.sleep(PRUNE_INTERVAL)
+            cutoff = time.monotonic() - IDLE_TIMEOUT
+            for token in [t for t, s in self.sessions.items() if s.last_seen < cutoff]:
+                del self.sessions[token]
+
+    async def _collect_saved(self):
+        # Hands the outcomes of the result writer to the requests waiting for them
+        while True:
+            await asyncio.sleep(SAVE_POLL_INTERVAL)
+            for result, outcome in self.result_writer.poll():
+                future = self.saving.pop(result, None)
+                if future is not None and not future.done():
+                    future.set_result(outcome)
+
+    def _new_session_id(self):
+        # Unique even for sessions created within the same nanosecond
+        self.last_session_id = max(time.time_ns(), self.last_session_id + 1)
+        return self.last_session_id
+
+    async def create_session(self, request):
+        """
+        Starts a session and returns its first stimulus.
+
+        Args:
+        - request (dict): user_id and test_type.
+
+        Returns:
+        - dict: the session token, the protocol timings and the first stimulus.
+        """
+        user_id = str(request.get('user_id', '')).strip()
+        test_type = request.get('test_type')
+        if not user_id or test_type not in TEST_TYPES:
+            raise HTTPError(400, "user_id and a test_type of pre, post or practice are required")
+        # Every backend keys on the ID, and the text files are named after it, so only digits are accepted
+        if not user_id.isdigit():
+            raise HTTPError(400, "the ID must be numeric")
+
+        practice = test_type == 'practice'
+        # Generating the sequence bank is the only heavy step; keep it off the event loop
+        engine = await asyncio.get_running_loop().run_in_executor(
+            None, make_engine, practice, None, self.protocol, self.no_runs, self.balanced, self.bayesian)
+        session_id = self._new_session_id()
+        if self.trial_log:
+            self.trial_log.start_session(user_id, test_type, engine.sequence_bank.seed, session_id)
+        token = secrets.token_urlsafe(16)
+        session = WebSession(engine, user_id, test_type, session_id)
+        self.sessions[token] = session
+        return dict(self._stimulus(session), token=token,
+                    protocol={'digit_ms': self.protocol.digit_ms, 'notice_ms': self.protocol.notice_ms})
+
+    async def submit_response(self, token, request):
+        """
+        Scores a response and returns the next stimulus or the final scores.
+
+        Args:
+        - token (str): The session token.
+        - request (dict): trial, the index of the stimulus answered, response, and optionally
+          onsets_ms, keys_ms and submitted_ms as measured by the browser.
+
+        Returns:
+        - dict: the next stimulus, or the scores once the session has finished.
+        """
+        session = self.sessions.get(token)
+        if session is None:
+            raise HTTPError(404, "unknown or expired session")
+        session.last_seen = time.monotonic()
+        engine = session.engine
+        # A retried or duplicated request must not be scored against the next sequence
+        trial = request.get('trial')
+        if isinstance(trial, bool) or trial != len(engine.trials):
+            raise HTTPError(409, "the response does not answer the current trial")
+        response = str(request.get('response', ''))
+        # Reject a malformed payload before the engine consumes the trial
+        timing = self._parse_timing(request)
+        engine.submit(response)
+        if self.trial_log:
+            self._log_trial(session, *timing)
+
+        if not engine.finished:
+            return self._stimulus(session)
+        del self.sessions[token]
+        scores = {'finished': True, 'forward': engine.max_forward_length, 'backward': engine.max_backward_length,
+                  'combined': engine.combined_score, 'practice': session.test_type == 'practice'}
+        if scores['practice']:
+            return dict(scores, note="Practice Complete!")
+        result = Result(session.user_id, session.test_type, engine.max_forward_length, engine.max_backward_length,
+                        engine.combined_score, session.session_id)
+        return dict(scores, note=await self._save(result))
+
+    async def _save(self, result):
+        # The result writer retries, spools locally and replays the spool once the target is back
+        future = asyncio.get_running_loop().create_future()
+        self.saving[result] = future
+        self.result_writer.submit(result)
+        saved = await future
+        if saved == SPOOLED:
+            return "The result storage is unreachable; the result was kept locally and will be saved later."
+        if saved == FAILED:
+            return "The result could not be saved. Please note down the scores above."
+        if saved == REJECTED:
+            return "The result was rejected as invalid and was not saved. Please note down the scores above."
+        if not saved:
+            return f"A {result.test_type}-test result for ID {result.user_id} already exists; this result was not saved."
+        return ""
+
+    def _stimulus(self, session):
+        engine = session.engine
+        notice = engine.notice_pending
+        sequence = engine.next_stimulus()
+        session.presented_ns = time.time_ns()
+        return {'sequence': ''.join(sequence), 'forward': engine.forward, 'notice': notice, 'trial': len(engine.trials)}
+
+    @staticmethod
+    def _parse_timing(request):
+        # The browser's timing fields converted to ns; raises HTTPError if any is malformed
+        def to_ns(ms):
+            if isinstance(ms, bool) or not isinstance(ms, (int, float)) or not abs(ms) < 1e12:
+                raise HTTPError(400, "timings must be numbers of ms")
+            return int(ms * 1e6)
+
+        keys_ms, onsets_ms = request.get('keys_ms', []), request.get('onsets_ms', [])
+        if not isinstance(keys_ms, list) or not isinstance(onsets_ms, list):
+            raise HTTPError(400, "keys_ms and onsets_ms must be lists")
+        keystrokes = []
+        for key in keys_ms:
+            if not isinstance(key, list) or len(key) != 2 or not isinstance(key[0], str) or len(key[0]) > 1:
+                raise HTTPError(400, "keys_ms must hold [key, ms] pairs")
+            keystrokes.append((key[0], to_ns(key[1])))
+        submitted_ms = request.get('submitted_ms')
+        return keystrokes, None if submitted_ms is None else to_ns(submitted_ms), [to_ns(ms) for ms in onsets_ms]
+
+    def _log_trial(self, session, keystrokes, submitted_ns, onsets):
+        trial = session.engine.trials[-1]
+        self.trial_log.log_trial(session.session_id, trial.forward, trial.sequence, trial.response, trial.correct,
+                                 trial.attempt, session.presented_ns, time.time_ns(), keystrokes, submitted_ns)
+        if len(onsets) == len(trial.sequence) + 1:
+            targets = [idx * self.protocol.digit_ms * 1_000_000 for idx in range(len(onsets))]
+            # The browser cannot see when a frame reaches the screen, so no frame-update latency is logged
+            self.trial_log.log_onsets(session.session_id, session.presented_ns, targets, onsets, [0] * len(onsets))
+
+    async def _route(self, method, path, body):
+        if path == '/':
+            if method != 'GET':
+                raise HTTPError(405, "use GET")
+            return 'text/html; charset=utf-8', PAGE.encode()
+        parts = path.strip('/').split('/')
+        if parts[:2] != ['api', 'sessions'] or len(parts) not in (2, 4) or (len(parts) == 4 and parts[3] != 'responses'):
+            raise HTTPError(404, "not found")
+        if method != 'POST':
+            raise HTTPError(405, "use POST")
+        try:
+            request = json.loads(body or b'{}')
+        except ValueError:
+            raise HTTPError(400, "the body must be JSON")
+        if not isinstance(request, dict):
+            raise HTTPError(400, "the body must be a JSON object")
+        if len(parts) == 2:
+            reply = await self.create_session(request)
+        else:
+            reply = await self.submit_response(parts[2], request)
+        return 'application/json', json.dumps(reply).encode()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+
+                status = 200
+                # The body of a bad request cannot be skipped, so the connection is closed after the answer
+                if length < 0:
+                    status, content_type, payload = 400, 'application/json', b'{"error": "invalid Content-Length"}'
+                    keep_alive = False
+                elif length > MAX_BODY:
+                    status, content_type, payload = 413, 'application/json', b'{"error": "request too large"}'
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                    try:
+                        content_type, payload = await self._route(method, target.split('?', 1)[0], body)
+                    except HTTPError as e:
+                        status, content_type, payload = e.status, 'application/json', json.dumps({'error': str(e)}).encode()
+
+                writer.write((f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                              f"Content-Type: {content_type}\r\nContent-Length: {len(payload)}\r\n"
+                              f"Cache-Control: no-store\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode() + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(server, host, port):
+    port = await server.start(host, port)
+    print(f"Serving the Digit Span Test on http://{host}:{port}/")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the Digit Span Test to browsers")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    backend = parser.add_mutually_exclusive_group()
+    backend.add_argument('--store', metavar='PATH', help="append results to a consolidated score store (e.g. data/scores.bin) instead of one text file per session")
+    backend.add_argument('--db', metavar='PATH', help="insert results into a shared SQLite database (e.g. data/scores.db) instead of one text file per session")
+    backend.add_argument('--collector', metavar='HOST:PORT', type=parse_address, help="submit results to a collector service instead of one text file per session")
+    parser.add_argument('--trial-log', metavar='PATH', default='data/trials.bin', help="append every trial to this log (default data/trials.bin)")
+    parser.add_argument('--no-trial-log', dest='trial_log', action='store_const', const=None, help="disable the trial log")
+    parser.add_argument('--bayesian', action='store_true', help="choose sequence lengths adaptively from a posterior over the span instead of the staircase")
+    args = parser.parse_args()
+
+    server = WebTestServer(store_path=args.store, db_path=args.db, collector=args.collector,
+                           trial_log_path=args.trial_log, bayesian=args.bayesian)
+    try:
+        asyncio.run(serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass